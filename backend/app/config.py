@@ -2,6 +2,7 @@
 
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 import os
 
 
@@ -14,14 +15,111 @@ class Settings(BaseSettings):
     # ChromaDB
     chroma_db_path: str = "./data/chroma_db"
     chroma_collection_name: str = "support_tickets"
+    document_store_path: str = "./data/doc_store"
+    quantized_index_path: str = "./data/quantized_index"
+    snapshot_path: str = "./data/agents/snapshots"
+    # Optional shared Chroma server; embedded on-disk mode when unset
+    chroma_server_host: Optional[str] = None
+    chroma_server_port: int = 8000
+    vector_store_max_workers: int = 8
+    # Threads searching the shards of a sharded agent concurrently
+    shard_search_workers: int = 8
+    # Replaced collection builds are kept this long for rollback, then deleted
+    collection_gc_grace_seconds: float = 900.0
+
+    # Multi-worker coordination
+    workers: int = 1
+    coordination_path: str = "./data/coordination"
+    generation_check_interval_seconds: float = 1.0
     
     # Models
     embedding_model: str = "text-embedding-3-small"
     llm_model: str = "gpt-4o"
+    llm_temperature: float = 0.7
+    llm_max_tokens: int = 500
+    # Cascading agents send a best retrieval similarity in [low, high) straight to their full model
+    llm_cascade_band_low: float = 0.75
+    llm_cascade_band_high: float = 0.85
+
+    # OpenAI HTTP client
+    openai_max_connections: int = 20
+    openai_max_keepalive_connections: int = 10
+    openai_keepalive_expiry: float = 60.0
+    openai_connect_timeout: float = 5.0
+    openai_embedding_timeout: float = 15.0
+    openai_chat_timeout: float = 60.0
+    openai_max_retries: int = 3
+    openai_backoff_base: float = 0.5
+    openai_backoff_max: float = 8.0
+    circuit_breaker_failure_threshold: int = 5
+    circuit_breaker_recovery_seconds: float = 30.0
+
+    # OpenAI rate-limit budgets per minute for the whole account (0 disables a limit)
+    embedding_rpm_limit: int = 3000
+    embedding_tpm_limit: int = 1_000_000
+    chat_rpm_limit: int = 5000
+    chat_tpm_limit: int = 450_000
+    rate_limit_interactive_reserve: float = 0.2
+    rate_limit_max_wait_seconds: float = 10.0
+    embedding_batch_size: int = 256
+    query_embedding_cache_size: int = 2048
+
+    # Synthetic benchmark results (benchmarks/capacity.py) used to project query latency
+    capacity_benchmark_path: str = "./data/capacity_benchmark.json"
+
+    # Startup warmup (runs before /readyz reports ready)
+    warmup_enabled: bool = True
+    warmup_top_n: int = 20
+    warmup_connections: int = 4
+
+    # Chat admission control
+    chat_max_concurrency: int = 32
+    chat_max_concurrency_per_agent: int = 16
+    chat_max_queue_size: int = 64
+    chat_queue_timeout_seconds: float = 10.0
+
+    # Chat latency budget (per-agent `latency_budget_seconds` and the request override take precedence)
+    chat_latency_budget_seconds: float = 15.0
+    # With less time left than this the completion is skipped for a degraded answer
+    chat_min_completion_seconds: float = 1.0
+    
+    # Conversation sessions (0 sessions disables them; set a path to persist sessions to disk)
+    session_max_sessions: int = 1000
+    session_ttl_seconds: float = 3600.0
+    session_max_turns: int = 10
+    session_history_token_budget: int = 800
+    session_store_path: str = ""
+    # A follow-up this similar to the session's last retrieval query reuses its tickets as is
+    session_reuse_similarity: float = 0.9
+    # Otherwise new results are merged with the session's tickets, whose scores decay per turn
+    session_carryover_decay: float = 0.9
+    session_max_tickets: int = 6
+    
+    # Batch chat
+    batch_max_items: int = 5000
+    batch_max_concurrency: int = 8
+    batch_chunk_size: int = 256
     
+    # Response compression (gzip for bodies of at least this many bytes)
+    response_gzip_enabled: bool = True
+    response_gzip_minimum_size: int = 1024
+    response_gzip_level: int = 5
+
     # App settings
     debug: bool = False
     similarity_threshold: float = 0.75
+    context_token_budget: int = 1200
+    
+    # Retrieval
+    retrieval_top_k: int = 3
+    retrieval_fetch_k: int = 20
+    mmr_lambda: float = 0.5
+    quantized_rescore_factor: int = 4
+    
+    # Index-time deduplication (a threshold above 1 merges exact duplicates only)
+    dedup_enabled: bool = True
+    dedup_similarity_threshold: float = 0.95
+    dedup_block_size: int = 1024
     
     class Config:
         env_file = ".env"
@@ -5,32 +5,75 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from app.config import get_settings
 from app.routers import chat_router, ingest_router
 from app.routers.agents import router as agents_router
+from app.routers.admin import router as admin_router
 from app.services.auto_indexer import AutoIndexerService
+from app.services.openai_client import OpenAIClientService
+from app.services.rag_chain import RAGChainService
+from app.services.vector_store import VectorStoreService
+from app.services.metrics import MetricsRegistry
+from app.services.coordination import WorkerCoordinator
+from app.services.embedding_service import EmbeddingService
+from app.services.warmup import WarmupService
+
+try:
+    import orjson  # noqa: F401 - optional, enables the faster response class
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    DefaultResponse = JSONResponse
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Compress large responses (sources carry full ticket resolutions). Streamed
+# NDJSON is left alone: gzip would hold lines back until its buffer fills
+STREAMING_PATHS = {"/api/chat/batch"}
+
+
+class ResponseCompressionMiddleware:
+    """GZip responses except on streaming endpoints"""
+    
+    def __init__(self, app, minimum_size: int, compresslevel: int):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=compresslevel)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] not in STREAMING_PATHS:
+            await self.gzip(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown lifecycle events"""
-    # Startup: Auto-index all agents
-    logger.info("Starting auto-indexer...")
-    auto_indexer = AutoIndexerService.get_instance()
-    results = auto_indexer.index_all_agents(force=False)
+    # Startup: Auto-index all agents (indexing leader only), without blocking
+    # the server from accepting requests; /readyz reports when it is done
+    coordinator = WorkerCoordinator.get_instance()
+    if coordinator.try_become_leader():
+        logger.info("Starting auto-indexer...")
+        AutoIndexerService.get_instance().start_background_indexing()
+    else:
+        logger.info("Follower worker: serving the index built by the indexing leader")
+        AutoIndexerService.get_instance().follow_startup_indexing()
     
-    for agent_id, count in results.items():
-        logger.info(f"Agent '{agent_id}': {count} tickets indexed")
+    # Every worker warms its own collections, connections and query cache
+    # once startup indexing is done (the leader's, on a follower)
+    WarmupService.get_instance().start_background()
     
     yield
     
     # Shutdown: Cleanup if needed
     logger.info("Shutting down...")
+    OpenAIClientService.get_instance().close()
+    VectorStoreService.get_instance().close()
+    coordinator.release_leadership()
 
 
 # Initialize FastAPI app
@@ -38,7 +81,8 @@ app = FastAPI(
     title="Bain AI Support Hub",
     description="Modular AI Support Agent Platform with specialized agents for Pricing, Cortex CRM, and Integrations",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=DefaultResponse
 )
 
 # Configure CORS for frontend
@@ -50,9 +94,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if get_settings().response_gzip_enabled:
+    app.add_middleware(
+        ResponseCompressionMiddleware,
+        minimum_size=get_settings().response_gzip_minimum_size,
+        compresslevel=get_settings().response_gzip_level
+    )
+
 # Include routers
 app.include_router(chat_router)
 app.include_router(agents_router)
+app.include_router(admin_router)
 app.include_router(ingest_router)  # Keep for backwards compatibility
 
 
@@ -66,11 +118,35 @@ async def root():
     }
 
 
+@app.get("/healthz", tags=["health"])
+async def healthz():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "ok"}
+
+
+@app.get("/readyz", tags=["health"])
+async def readyz():
+    """Readiness probe: startup indexing (the leader's, on a follower) and warmup have finished"""
+    auto_indexer = AutoIndexerService.get_instance()
+    warmup = WarmupService.get_instance()
+    ready = auto_indexer.is_startup_complete and warmup.is_complete
+    body = {
+        "status": "ready" if ready else "starting",
+        "startup_indexing": auto_indexer.startup_state,
+        "startup_indexing_seconds": auto_indexer.startup_duration_seconds,
+        "warmup": warmup.state,
+        "warmup_seconds": warmup.duration_seconds,
+    }
+    if not ready:
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+
 @app.get("/api/status", tags=["health"])
 async def get_status():
     """Get detailed status of all agents"""
     auto_indexer = AutoIndexerService.get_instance()
-    agents_status = auto_indexer.get_all_agents_status()
+    agents_status = await auto_indexer.aget_all_agents_status()
     
     total_tickets = sum(a["tickets_count"] for a in agents_status)
     all_ready = all(a["is_ready"] for a in agents_status)
@@ -83,6 +159,39 @@ async def get_status():
     }
 
 
+@app.get("/api/status/openai", tags=["health"])
+async def get_openai_status():
+    """Get connection pool and circuit breaker state of the OpenAI client"""
+    return OpenAIClientService.get_instance().get_stats()
+
+
+@app.get("/api/status/warmup", tags=["health"])
+async def get_warmup_status():
+    """Get warmup timings and query embedding cache stats"""
+    return {
+        **WarmupService.get_instance().get_status(),
+        "query_embedding_cache": EmbeddingService.get_instance().get_cache_stats(),
+    }
+
+
+@app.get("/api/status/llm", tags=["health"])
+async def get_llm_status():
+    """Get completion latency and token use per cascade tier, and escalation rates"""
+    return RAGChainService.get_instance().get_llm_stats()
+
+
+@app.get("/api/status/worker", tags=["health"])
+async def get_worker_status():
+    """Get this worker's role and loaded index generation"""
+    return WorkerCoordinator.get_instance().get_status()
+
+
+@app.get("/metrics", tags=["health"], response_class=PlainTextResponse)
+async def get_metrics():
+    """Export metrics in the Prometheus text format"""
+    return MetricsRegistry.get_instance().render_prometheus()
+
+
 if __name__ == "__main__":
     import uvicorn
     settings = get_settings()
@@ -90,5 +199,6 @@ if __name__ == "__main__":
         "app.main:app",
         host="0.0.0.0",
         port=5000,
-        reload=settings.debug
+        reload=settings.debug,
+        workers=1 if settings.debug else settings.workers
     )
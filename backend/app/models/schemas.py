@@ -1,7 +1,35 @@
 """Pydantic schemas for request/response models"""
 
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import Literal, Optional, Union
+
+
+def _category_list(value: Optional[Union[str, list[str]]]) -> Optional[list[str]]:
+    """Accept one category or a list of them; empty means no filter"""
+    if value is None:
+        return None
+    categories = [value] if isinstance(value, str) else list(value)
+    categories = [c for c in dict.fromkeys(categories) if c]
+    return categories or None
+
+
+SourcesMode = Literal["full", "ids", "none"]
+
+# Source fields kept with sources="ids"
+SOURCE_ID_FIELDS = {"ticket_id", "similarity_score"}
+
+
+def sources_exclude(mode: SourcesMode) -> Optional[dict]:
+    """
+    `exclude` argument for dumping a ChatResponse with the requested
+    source detail: everything, only ticket ids and scores, or no sources
+    """
+    if mode == "ids":
+        # Everything but SOURCE_ID_FIELDS, so fields added later stay out too
+        return {"sources": {"__all__": set(RetrievedContext.model_fields) - SOURCE_ID_FIELDS}}
+    if mode == "none":
+        return {"sources": True}
+    return None
 
 
 class SupportTicket(BaseModel):
@@ -10,6 +38,10 @@ class SupportTicket(BaseModel):
     query: str = Field(..., description="Customer question/issue")
     resolution: str = Field(..., description="How the issue was resolved")
     category: Optional[str] = Field(None, description="Ticket category")
+    aliases: list[str] = Field(
+        default_factory=list,
+        description="Ids of duplicate tickets merged into this one at index time"
+    )
 
 
 class AgentConfig(BaseModel):
@@ -21,12 +53,139 @@ class AgentConfig(BaseModel):
     collection_name: str = Field(..., description="ChromaDB collection name")
     data_source: str = Field(..., description="Path to the agent's data file")
     system_prompt: str = Field(..., description="System prompt for the agent")
+    context_token_budget: Optional[int] = Field(
+        None,
+        gt=0,
+        description="Maximum tokens of retrieved ticket context in the prompt (defaults to the global setting)"
+    )
+    similarity_threshold: Optional[float] = Field(
+        None,
+        ge=0.0,
+        le=1.0,
+        description="Best retrieved similarity below which the query is redirected to a human (defaults to the global setting)"
+    )
+    top_k: Optional[int] = Field(None, gt=0, description="Number of tickets passed to the LLM")
+    fetch_k: Optional[int] = Field(
+        None,
+        gt=0,
+        description="Number of candidates over-fetched for MMR re-ranking (<= top_k disables re-ranking)"
+    )
+    mmr_lambda: Optional[float] = Field(
+        None,
+        ge=0.0,
+        le=1.0,
+        description="MMR trade-off: 1.0 ranks purely by relevance, 0.0 purely by diversity"
+    )
+    embedding_dimensions: Optional[int] = Field(
+        None,
+        gt=0,
+        description="Reduced embedding dimension (defaults to the model's full width; changing it requires a reindex)"
+    )
+    warmup_questions: list[str] = Field(
+        default_factory=list,
+        description="Frequently asked questions embedded during startup warmup"
+    )
+    vector_precision: Literal["float32", "float16", "int8"] = Field(
+        default="float32",
+        description="float32 searches Chroma; float16/int8 search a quantized in-memory index with full-precision re-scoring"
+    )
+    shards: int = Field(
+        default=1,
+        ge=1,
+        description="Split the collection into this many shards, searched in parallel (changing it requires a reindex)"
+    )
+    shard_by: Literal["hash", "category"] = Field(
+        default="hash",
+        description="Spread tickets over shards by a hash of their id, or keep each category in one shard"
+    )
+    latency_budget_seconds: Optional[float] = Field(
+        None,
+        gt=0,
+        description="End-to-end chat latency budget; slower answers degrade to the top resolution (defaults to the global setting)"
+    )
+    llm_model: Optional[str] = Field(None, description="Chat model answering for this agent (defaults to the global setting)")
+    temperature: Optional[float] = Field(
+        None,
+        ge=0.0,
+        le=2.0,
+        description="Sampling temperature of the agent's completions (defaults to the global setting)"
+    )
+    max_tokens: Optional[int] = Field(None, gt=0, description="Maximum completion tokens (defaults to the global setting)")
+    cascade_model: Optional[str] = Field(
+        None,
+        description="Faster model tried first; escalates to llm_model on HUMAN_REDIRECT or ambiguous retrieval confidence"
+    )
+    cascade_band: Optional[tuple[float, float]] = Field(
+        None,
+        description="Best similarity range [low, high) treated as ambiguous and sent straight to llm_model (defaults to the global setting)"
+    )
+    
+    @field_validator("cascade_band")
+    @classmethod
+    def _ordered_band(cls, value: Optional[tuple[float, float]]) -> Optional[tuple[float, float]]:
+        if value is not None and not 0.0 <= value[0] <= value[1] <= 1.0:
+            raise ValueError("cascade_band must be [low, high] with 0 <= low <= high <= 1")
+        return value
 
 
 class ChatRequest(BaseModel):
     """Request schema for chat endpoint"""
     question: str = Field(..., min_length=1, description="User's question")
     agent_id: str = Field(..., description="ID of the agent to use")
+    category: Optional[list[str]] = Field(
+        None,
+        description="Only search tickets in these categories (a single string is also accepted)"
+    )
+    sources: SourcesMode = Field(
+        default="full",
+        description="Source detail in the response: full tickets, only ids and scores, or none"
+    )
+    latency_budget_seconds: Optional[float] = Field(
+        None,
+        gt=0,
+        description="Latency budget for this request (overrides the agent's)"
+    )
+    session_id: Optional[str] = Field(
+        None,
+        pattern=r"^[A-Za-z0-9_-]{1,128}$",
+        description="Conversation to continue (a new one is started under this id if unknown)"
+    )
+    start_session: bool = Field(
+        default=False,
+        description="Start a conversation without choosing its id; the answer's session_id continues it"
+    )
+    
+    _normalize_category = field_validator("category", mode="before")(_category_list)
+
+
+class BatchChatItem(BaseModel):
+    """A single question in a batch chat request"""
+    agent_id: str = Field(..., description="ID of the agent to use")
+    question: str = Field(..., min_length=1, description="User's question")
+    category: Optional[list[str]] = Field(
+        None,
+        description="Only search tickets in these categories (a single string is also accepted)"
+    )
+
+    _normalize_category = field_validator("category", mode="before")(_category_list)
+
+
+class BatchChatRequest(BaseModel):
+    """Request schema for the batch chat endpoint"""
+    items: list[BatchChatItem] = Field(..., min_length=1, description="Questions to answer")
+    order: Literal["input", "completion"] = Field(
+        default="input",
+        description="Stream results in input order or as soon as each completes"
+    )
+    max_concurrency: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Maximum concurrent completions (capped by the server limit)"
+    )
+    sources: SourcesMode = Field(
+        default="full",
+        description="Source detail in each response: full tickets, only ids and scores, or none"
+    )
 
 
 class RetrievedContext(BaseModel):
@@ -36,6 +195,7 @@ class RetrievedContext(BaseModel):
     resolution: str
     similarity_score: float
     category: Optional[str] = None
+    alias_count: int = 0
 
 
 class ActionLink(BaseModel):
@@ -55,7 +215,10 @@ class ChatResponse(BaseModel):
     )
     sources: list[RetrievedContext] = Field(
         default_factory=list,
-        description="Source tickets used to generate response"
+        description=(
+            "Source tickets used to generate response (only ticket_id and similarity_score "
+            "with sources=\"ids\", left out with sources=\"none\")"
+        )
     )
     confidence: float = Field(
         default=0.0,
@@ -65,6 +228,33 @@ class ChatResponse(BaseModel):
         default_factory=list,
         description="Action links for tool calling or navigation"
     )
+    prompt_tokens: int = Field(
+        default=0,
+        description="Approximate prompt tokens sent to the LLM (0 if no LLM call was made)"
+    )
+    answer_path: Literal["llm", "top_resolution", "servicenow"] = Field(
+        default="llm",
+        description="How the answer was produced: generated by the LLM, the top retrieved resolution as is, or the ServiceNow fallback"
+    )
+    degraded: bool = Field(
+        default=False,
+        description="Whether the latency budget ran out and a fallback answer was returned instead"
+    )
+    model: Optional[str] = Field(
+        default=None,
+        description="Chat model whose answer was used (None if no completion was made)"
+    )
+    escalated: bool = Field(
+        default=False,
+        description="Whether the agent's cascade escalated from its fast model to its full model"
+    )
+    session_id: Optional[str] = Field(
+        default=None,
+        description=(
+            "Conversation this answer belongs to, if session_id or start_session was sent; "
+            "send it back with follow-up questions"
+        )
+    )
 
 
 class UploadResponse(BaseModel):
@@ -72,6 +262,7 @@ class UploadResponse(BaseModel):
     success: bool
     message: str
     tickets_processed: int = 0
+    duplicates_merged: int = 0
 
 
 class HealthResponse(BaseModel):
@@ -89,9 +280,26 @@ class AgentStatusResponse(BaseModel):
     icon: str
     tickets_count: int
     is_ready: bool
+    categories: dict[str, int] = Field(
+        default_factory=dict,
+        description="Indexed tickets per category"
+    )
+    shards: dict[str, int] = Field(
+        default_factory=dict,
+        description="Indexed tickets per shard collection (empty for unsharded agents)"
+    )
 
 
 class AgentListResponse(BaseModel):
     """Response schema for listing agents"""
     agents: list[dict]
     total: int
+
+
+class AdmissionLimitsUpdate(BaseModel):
+    """Request schema for changing chat admission limits at runtime"""
+    max_concurrency: Optional[int] = Field(None, ge=1, description="Global concurrent chat limit")
+    max_concurrency_per_agent: Optional[int] = Field(None, ge=1, description="Default per-agent concurrent chat limit")
+    max_queue_size: Optional[int] = Field(None, ge=0, description="Maximum requests waiting for a slot")
+    queue_timeout_seconds: Optional[float] = Field(None, gt=0, description="Maximum time a request may wait for a slot")
+    agent_overrides: Optional[dict[str, int]] = Field(None, description="Per-agent concurrency limits by agent ID")
@@ -0,0 +1,61 @@
+"""Admin Router - Runtime operational controls"""
+
+from fastapi import APIRouter, Depends
+from starlette.concurrency import run_in_threadpool
+
+from app.models.schemas import AdmissionLimitsUpdate
+from app.services.admission import AdmissionController, get_admission_controller
+from app.services.capacity import CapacityService, get_capacity
+from app.services.rate_limiter import RateLimiter, get_rate_limiter
+
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+@router.get("/admission")
+async def get_admission(
+    admission: AdmissionController = Depends(get_admission_controller)
+):
+    """
+    Get chat admission limits, queue depth and shed counts.
+    """
+    return admission.get_stats()
+
+
+@router.put("/admission")
+async def update_admission(
+    update: AdmissionLimitsUpdate,
+    admission: AdmissionController = Depends(get_admission_controller)
+):
+    """
+    Change chat admission limits without a restart.
+    """
+    limits = await admission.update_limits(**update.model_dump(exclude_none=True))
+    
+    return {
+        "success": True,
+        "limits": limits
+    }
+
+
+@router.get("/rate-limit")
+async def get_rate_limit(
+    rate_limiter: RateLimiter = Depends(get_rate_limiter)
+):
+    """
+    Get OpenAI rate-limit budgets: limits, remaining capacity, waiting
+    calls and the last minute's usage by priority.
+    """
+    return rate_limiter.get_stats()
+
+
+@router.get("/capacity")
+async def get_capacity_report(
+    capacity: CapacityService = Depends(get_capacity)
+):
+    """
+    Get estimated memory per collection (vectors, index, metadata and
+    quantized index bytes), cache sizes, process RSS and on-disk sizes,
+    with memory and query latency projected to 10x and 100x the tickets.
+    """
+    return await run_in_threadpool(capacity.get_report)
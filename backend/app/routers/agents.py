@@ -1,9 +1,11 @@
 """Agents Router - Endpoints for managing AI agents"""
 
 from fastapi import APIRouter, Depends, HTTPException
+from starlette.concurrency import run_in_threadpool
 
 from app.models.schemas import AgentStatusResponse, AgentListResponse
 from app.services.auto_indexer import AutoIndexerService, get_auto_indexer
+from app.services.coordination import ReadOnlyWorkerError
 
 
 router = APIRouter(prefix="/api/agents", tags=["agents"])
@@ -16,7 +18,7 @@ async def list_agents(
     """
     Get list of all available AI agents with their status.
     """
-    agents_status = auto_indexer.get_all_agents_status()
+    agents_status = await auto_indexer.aget_all_agents_status()
     
     return AgentListResponse(
         agents=agents_status,
@@ -37,7 +39,7 @@ async def get_agent(
     if not agent:
         raise HTTPException(status_code=404, detail=f"Agent '{agent_id}' not found")
     
-    status = auto_indexer.get_agent_status(agent_id)
+    status = await auto_indexer.aget_agent_status(agent_id)
     return AgentStatusResponse(**status)
 
 
@@ -54,15 +56,91 @@ async def reindex_agent(
     if not agent:
         raise HTTPException(status_code=404, detail=f"Agent '{agent_id}' not found")
     
-    count = auto_indexer.index_agent(agent, force=True)
+    try:
+        count = await run_in_threadpool(auto_indexer.index_agent, agent, force=True)
+    except ReadOnlyWorkerError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     
     return {
         "success": True,
         "message": f"Reindexed {count} tickets for agent '{agent_id}'",
+        "tickets_indexed": count,
+        "deduplication": auto_indexer.dedup_reports.get(agent_id)
+    }
+
+
+@router.post("/{agent_id}/shards/{shard}/reindex")
+async def reindex_agent_shard(
+    agent_id: str,
+    shard: int,
+    auto_indexer: AutoIndexerService = Depends(get_auto_indexer)
+):
+    """
+    Force reindex one shard of a sharded agent; the other shards keep serving.
+    """
+    agent = auto_indexer.get_agent(agent_id)
+    
+    if not agent:
+        raise HTTPException(status_code=404, detail=f"Agent '{agent_id}' not found")
+    
+    try:
+        count = await run_in_threadpool(auto_indexer.index_shard, agent, shard)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ReadOnlyWorkerError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    return {
+        "success": True,
+        "message": f"Reindexed {count} tickets in shard {shard} of agent '{agent_id}'",
         "tickets_indexed": count
     }
 
 
+@router.get("/{agent_id}/versions")
+async def get_agent_versions(
+    agent_id: str,
+    auto_indexer: AutoIndexerService = Depends(get_auto_indexer)
+):
+    """
+    Index builds of an agent: the build serving each collection and the
+    replaced builds still kept for rollback.
+    """
+    agent = auto_indexer.get_agent(agent_id)
+    
+    if not agent:
+        raise HTTPException(status_code=404, detail=f"Agent '{agent_id}' not found")
+    
+    return {"agent_id": agent_id, "collections": auto_indexer.get_agent_versions(agent)}
+
+
+@router.post("/{agent_id}/rollback")
+async def rollback_agent(
+    agent_id: str,
+    auto_indexer: AutoIndexerService = Depends(get_auto_indexer)
+):
+    """
+    Switch an agent back to the index build its last reindex replaced.
+    """
+    agent = auto_indexer.get_agent(agent_id)
+    
+    if not agent:
+        raise HTTPException(status_code=404, detail=f"Agent '{agent_id}' not found")
+    
+    try:
+        serving = await run_in_threadpool(auto_indexer.rollback_agent, agent)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ReadOnlyWorkerError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    return {
+        "success": True,
+        "message": f"Rolled back agent '{agent_id}' to its previous index build",
+        "collections": serving
+    }
+
+
 @router.post("/reindex-all")
 async def reindex_all_agents(
     auto_indexer: AutoIndexerService = Depends(get_auto_indexer)
@@ -70,7 +148,10 @@ async def reindex_all_agents(
     """
     Force reindex all agents' knowledge bases.
     """
-    results = auto_indexer.index_all_agents(force=True)
+    try:
+        results = await run_in_threadpool(auto_indexer.index_all_agents, force=True)
+    except ReadOnlyWorkerError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     
     total = sum(results.values())
     
@@ -1,20 +1,48 @@
 """Chat Router - Agent-aware chat endpoint"""
 
+import json
+import math
+from contextlib import nullcontext
+
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import Response, StreamingResponse
 
-from app.models.schemas import ChatRequest, ChatResponse
+from app.config import get_settings
+from app.models.schemas import ChatRequest, ChatResponse, BatchChatRequest, sources_exclude
 from app.services.rag_chain import RAGChainService, get_rag_chain
 from app.services.auto_indexer import AutoIndexerService, get_auto_indexer
+from app.services.batch_chat import BatchChatService, get_batch_chat
+from app.services.admission import (
+    AdmissionController,
+    AdmissionRejectedError,
+    get_admission_controller
+)
+from app.services.rate_limiter import RateLimitedError
+from app.services.session_store import (
+    SessionAgentMismatchError,
+    SessionBusyError,
+    SessionStore,
+    get_session_store
+)
 
 
 router = APIRouter(prefix="/api", tags=["chat"])
 
 
-@router.post("/chat", response_model=ChatResponse)
+@router.post(
+    "/chat",
+    response_model=ChatResponse,
+    response_description=(
+        "The answer. With sources=\"ids\" each source has only ticket_id and "
+        "similarity_score, and with sources=\"none\" the sources field is left out."
+    )
+)
 async def chat(
     request: ChatRequest,
     rag_chain: RAGChainService = Depends(get_rag_chain),
-    auto_indexer: AutoIndexerService = Depends(get_auto_indexer)
+    auto_indexer: AutoIndexerService = Depends(get_auto_indexer),
+    admission: AdmissionController = Depends(get_admission_controller),
+    sessions: SessionStore = Depends(get_session_store)
 ):
     """
     Send a message to a specific AI support agent.
@@ -23,6 +51,24 @@ async def chat(
     1. Search for similar questions in its indexed knowledge base
     2. Use the relevant resolutions to generate a helpful response
     3. If no relevant information is found, indicate that a human agent is needed
+    
+    Set `sources` to "ids" to get only the ids and scores of the source
+    tickets, or "none" to leave them out.
+    
+    The request runs within the agent's latency budget (or
+    `latency_budget_seconds`). If the answer cannot be generated in time,
+    the top retrieved resolution or the ServiceNow fallback is returned
+    with `degraded` set; `answer_path` tells which path produced it.
+    
+    Send a `session_id` of your choosing, or `start_session`, to start a
+    conversation; the answer then carries its `session_id`. Send it back
+    with the next question to ask a follow-up: it is searched together
+    with the previous question, reuses that question's tickets and sees
+    the recent turns. Questions in one session are answered one at a time.
+    Without either, nothing is kept about the request.
+    
+    Under overload, or when the OpenAI rate-limit budget is exhausted, the
+    request is shed with a 429 and a Retry-After header.
     """
     # Get agent configuration
     agent = auto_indexer.get_agent(request.agent_id)
@@ -33,8 +79,10 @@ async def chat(
             detail=f"Agent '{request.agent_id}' not found"
         )
     
+    deadline = rag_chain.start_deadline(agent, request.latency_budget_seconds)
+    
     # Check if agent's knowledge base has data
-    status = auto_indexer.get_agent_status(request.agent_id)
+    status = await auto_indexer.aget_agent_status(request.agent_id)
     
     if not status.get("is_ready"):
         raise HTTPException(
@@ -42,14 +90,137 @@ async def chat(
             detail=f"Agent '{request.agent_id}' is not ready. Knowledge base is empty."
         )
     
+    if sessions.enabled and (request.session_id or request.start_session):
+        session_turn = sessions.turn(request.session_id, agent.id, timeout=deadline.remaining())
+    else:
+        session_turn = nullcontext()
+    
     try:
-        response = await rag_chain.generate_response(
-            question=request.question,
-            agent_config=agent
+        async with session_turn as session:
+            async with admission.slot(agent.id, timeout=deadline.remaining()):
+                response = await rag_chain.generate_response(
+                    question=request.question,
+                    agent_config=agent,
+                    categories=request.category,
+                    deadline=deadline,
+                    session=session
+                )
+        # Serialized straight to JSON bytes by pydantic-core, skipping
+        # response_model re-validation and the intermediate dict
+        return Response(
+            content=response.model_dump_json(exclude=sources_exclude(request.sources)),
+            media_type="application/json"
+        )
+    except SessionAgentMismatchError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except SessionBusyError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"{e} Please retry shortly.",
+            headers={"Retry-After": "1"}
+        )
+    except AdmissionRejectedError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Agent '{request.agent_id}' is overloaded ({e.reason}). Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except RateLimitedError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"OpenAI {e.budget} rate limit reached. Please retry shortly.",
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
         )
-        return response
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error generating response: {str(e)}"
         )
+
+
+@router.get("/chat/sessions/{session_id}")
+async def get_session(
+    session_id: str,
+    sessions: SessionStore = Depends(get_session_store)
+):
+    """Get a conversation's recent turns and the tickets follow-ups build on"""
+    session = sessions.get(session_id)
+    
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found")
+    
+    data = session.to_dict()
+    data.pop("embedding")
+    return data
+
+
+@router.delete("/chat/sessions/{session_id}")
+async def delete_session(
+    session_id: str,
+    sessions: SessionStore = Depends(get_session_store)
+):
+    """End a conversation; the next question with its id starts afresh"""
+    if not sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found")
+    return {"success": True, "session_id": session_id}
+
+
+@router.post("/chat/batch")
+async def chat_batch(
+    request: BatchChatRequest,
+    batch_chat: BatchChatService = Depends(get_batch_chat),
+    auto_indexer: AutoIndexerService = Depends(get_auto_indexer)
+):
+    """
+    Answer many questions in one request, streamed back as NDJSON.
+    
+    Questions are embedded in a few batched calls and searched with one
+    vector query per agent; completions run concurrently. Each output line
+    is a JSON object with `index`, `agent_id`, `question`, `response`
+    (a ChatResponse, or null) and `error`.
+    """
+    settings = get_settings()
+    
+    if len(request.items) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch too large: {len(request.items)} items (max {settings.batch_max_items})"
+        )
+    
+    # Resolve each agent once; items for unknown or empty agents fail individually
+    agents = {}
+    unavailable = {}
+    for agent_id in {item.agent_id for item in request.items}:
+        agent = auto_indexer.get_agent(agent_id)
+        if not agent:
+            unavailable[agent_id] = f"Agent '{agent_id}' not found"
+            continue
+        status = await auto_indexer.aget_agent_status(agent_id)
+        if not status.get("is_ready"):
+            unavailable[agent_id] = f"Agent '{agent_id}' is not ready. Knowledge base is empty."
+        else:
+            agents[agent_id] = agent
+    
+    errors = {
+        i: unavailable[item.agent_id]
+        for i, item in enumerate(request.items)
+        if item.agent_id in unavailable
+    }
+    
+    max_concurrency = min(
+        request.max_concurrency or settings.batch_max_concurrency,
+        settings.batch_max_concurrency
+    )
+    
+    async def stream():
+        async for result in batch_chat.run(
+            request.items,
+            agents,
+            errors,
+            order=request.order,
+            max_concurrency=max_concurrency,
+            sources=request.sources
+        ):
+            yield json.dumps(result) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
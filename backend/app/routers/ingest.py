@@ -1,77 +1,59 @@
 """Ingest Router - File upload and indexing endpoints"""
 
-import json
-import csv
-import io
+from typing import Optional
+
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from starlette.concurrency import run_in_threadpool
 
-from app.models.schemas import SupportTicket, UploadResponse
+from app.config import get_settings
+from app.models.schemas import AgentConfig, UploadResponse
 from app.services.vector_store import VectorStoreService, get_vector_store
 from app.services.embedding_service import EmbeddingService, get_embedding_service
+from app.services.auto_indexer import AutoIndexerService, get_auto_indexer
+from app.services.coordination import ReadOnlyWorkerError, WorkerCoordinator
+from app.services.rate_limiter import BACKGROUND
+from app.services.sharding import shard_collections
+from app.services.ticket_loader import TicketFormatError, detect_format, parse_tickets
 
 
 router = APIRouter(prefix="/api", tags=["ingest"])
 
 
-def parse_json_file(content: str) -> list[SupportTicket]:
-    """Parse JSON file content into support tickets"""
-    try:
-        data = json.loads(content)
-        
-        # Handle both array and object with tickets key
-        if isinstance(data, dict):
-            data = data.get("tickets", [])
-        
-        tickets = []
-        for item in data:
-            ticket = SupportTicket(
-                id=str(item.get("id", "")),
-                query=item.get("query", item.get("question", "")),
-                resolution=item.get("resolution", item.get("answer", "")),
-                category=item.get("category")
-            )
-            if ticket.query and ticket.resolution:
-                tickets.append(ticket)
-        
-        return tickets
-    except json.JSONDecodeError as e:
-        raise HTTPException(status_code=400, detail=f"Invalid JSON format: {str(e)}")
+def resolve_agent(agent_id: Optional[str], auto_indexer: AutoIndexerService) -> Optional[AgentConfig]:
+    """Agent targeted by an upload, or None for the default collection"""
+    if agent_id is None:
+        return None
+    agent = auto_indexer.get_agent(agent_id)
+    if not agent:
+        raise HTTPException(status_code=404, detail=f"Agent '{agent_id}' not found")
+    return agent
 
 
-def parse_csv_file(content: str) -> list[SupportTicket]:
-    """Parse CSV file content into support tickets"""
-    try:
-        reader = csv.DictReader(io.StringIO(content))
-        tickets = []
-        
-        for i, row in enumerate(reader):
-            # Support multiple column naming conventions
-            ticket_id = row.get("id", row.get("ticket_id", str(i + 1)))
-            query = row.get("query", row.get("question", ""))
-            resolution = row.get("resolution", row.get("answer", ""))
-            category = row.get("category")
-            
-            if query and resolution:
-                tickets.append(SupportTicket(
-                    id=str(ticket_id),
-                    query=query,
-                    resolution=resolution,
-                    category=category
-                ))
-        
-        return tickets
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid CSV format: {str(e)}")
+def collections_for(agent: Optional[AgentConfig]) -> list[str]:
+    """An agent's collections (one per shard), or the default collection"""
+    return shard_collections(agent) if agent else [get_settings().chroma_collection_name]
+
+
+def publish_write(fn, *args, **kwargs):
+    """Run an index write under the cross-worker write lock so other workers reload"""
+    with WorkerCoordinator.get_instance().write_lock() as write:
+        write.changed = True
+        return fn(*args, **kwargs)
 
 
 @router.post("/upload", response_model=UploadResponse)
 async def upload_tickets(
     file: UploadFile = File(...),
+    agent_id: Optional[str] = None,
     vector_store: VectorStoreService = Depends(get_vector_store),
-    embedding_service: EmbeddingService = Depends(get_embedding_service)
+    embedding_service: EmbeddingService = Depends(get_embedding_service),
+    auto_indexer: AutoIndexerService = Depends(get_auto_indexer)
 ):
     """
-    Upload a CSV or JSON file of support tickets for indexing.
+    Upload a JSON, NDJSON or CSV file of support tickets for indexing.
+    
+    The tickets replace the contents of the agent's collection (or of the
+    default collection when no agent_id is given).
     
     The file should contain tickets with:
     - id: Unique identifier
@@ -83,25 +65,25 @@ async def upload_tickets(
     if not file.filename:
         raise HTTPException(status_code=400, detail="No file provided")
     
-    filename = file.filename.lower()
-    if not (filename.endswith(".json") or filename.endswith(".csv")):
+    try:
+        file_format = detect_format(file.filename)
+    except TicketFormatError:
         raise HTTPException(
             status_code=400, 
-            detail="Only JSON and CSV files are supported"
+            detail="Only JSON, NDJSON and CSV files are supported"
         )
     
     # Read file content
     try:
         content = await file.read()
-        content_str = content.decode("utf-8")
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error reading file: {str(e)}")
     
-    # Parse tickets based on file type
-    if filename.endswith(".json"):
-        tickets = parse_json_file(content_str)
-    else:
-        tickets = parse_csv_file(content_str)
+    # Parse and validate tickets off the event loop
+    try:
+        tickets = await run_in_threadpool(parse_tickets, content, file_format)
+    except TicketFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     if not tickets:
         raise HTTPException(
@@ -109,23 +91,45 @@ async def upload_tickets(
             detail="No valid tickets found in the file"
         )
     
-    # Clear existing data (reindex)
-    vector_store.clear_collection()
+    agent = resolve_agent(agent_id, auto_indexer)
     
     # Generate embeddings for queries only
     queries = [ticket.query for ticket in tickets]
     
     try:
-        embeddings = embedding_service.embed_texts(queries)
+        embeddings = await run_in_threadpool(
+            embedding_service.embed_texts,
+            queries,
+            dimensions=agent.embedding_dimensions if agent else None,
+            priority=BACKGROUND
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500, 
             detail=f"Error generating embeddings: {str(e)}"
         )
     
-    # Store in vector database
+    # Replace existing data (reindex) in one step per collection. Duplicate
+    # questions are merged first so they do not take up index slots. Waiting
+    # for the write lock (held for whole reindexes) and deduplicating stay
+    # off the vector-store executor, which serves the chat retrievals
     try:
-        count = vector_store.add_tickets(tickets, embeddings)
+        if agent:
+            deduped = await run_in_threadpool(
+                publish_write, auto_indexer.store_tickets, agent, tickets, embeddings
+            )
+        else:
+            deduped = await run_in_threadpool(auto_indexer.deduplicate, tickets, embeddings)
+            await run_in_threadpool(
+                publish_write,
+                vector_store.replace_collection,
+                collections_for(agent)[0],
+                deduped.tickets,
+                deduped.embeddings
+            )
+        count = len(deduped.tickets)
+    except ReadOnlyWorkerError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500, 
@@ -134,17 +138,30 @@ async def upload_tickets(
     
     return UploadResponse(
         success=True,
-        message=f"Successfully indexed {count} support tickets",
-        tickets_processed=count
+        message=(
+            f"Successfully indexed {count} support tickets "
+            f"({deduped.merged} of {deduped.input_count} merged as duplicates)"
+        ),
+        tickets_processed=count,
+        duplicates_merged=deduped.merged
     )
 
 
 @router.delete("/clear", response_model=UploadResponse)
 async def clear_tickets(
-    vector_store: VectorStoreService = Depends(get_vector_store)
+    agent_id: Optional[str] = None,
+    vector_store: VectorStoreService = Depends(get_vector_store),
+    auto_indexer: AutoIndexerService = Depends(get_auto_indexer)
 ):
-    """Clear all indexed tickets from the vector store"""
-    success = vector_store.clear_collection()
+    """Clear all indexed tickets from an agent's (or the default) collection"""
+    agent = resolve_agent(agent_id, auto_indexer)
+    def clear_all(collection_names: list[str]) -> bool:
+        return all([vector_store.clear_collection(name) for name in collection_names])
+    
+    try:
+        success = await run_in_threadpool(publish_write, clear_all, collections_for(agent))
+    except ReadOnlyWorkerError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     
     if success:
         return UploadResponse(
@@ -1,12 +1,20 @@
 """Services for the AI Support Agent"""
 
-from .vector_store import VectorStoreService
-from .embedding_service import EmbeddingService
-from .rag_chain import RAGChainService
+from importlib import import_module
 
-__all__ = [
-    "VectorStoreService",
-    "EmbeddingService", 
-    "RAGChainService"
-]
+# Services are imported on first access so that importing one light module
+# (e.g. the admission controller) does not pull in Chroma or the OpenAI SDK
+_EXPORTS = {
+    "VectorStoreService": ".vector_store",
+    "EmbeddingService": ".embedding_service",
+    "RAGChainService": ".rag_chain",
+    "OpenAIClientService": ".openai_client",
+}
 
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(_EXPORTS[name], __name__), name)
@@ -0,0 +1,205 @@
+"""Admission Control - Concurrency limits and load shedding for chat requests"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from app.config import get_settings
+from app.services.metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a request is shed instead of admitted"""
+
+    def __init__(self, reason: str, retry_after: int):
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(f"Request shed ({reason}). Retry after {retry_after}s")
+
+
+class AdmissionController:
+    """
+    Bounds concurrent chat work globally and per agent.
+
+    Requests beyond the limits wait in a bounded queue for at most
+    `queue_timeout` seconds. When the queue is full, or the wait times out,
+    the request is shed with an AdmissionRejectedError carrying a
+    Retry-After estimate. Limits can be changed at runtime.
+    """
+
+    _instance: Optional["AdmissionController"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        settings = get_settings()
+        self.max_concurrency = settings.chat_max_concurrency
+        self.max_concurrency_per_agent = settings.chat_max_concurrency_per_agent
+        self.max_queue_size = settings.chat_max_queue_size
+        self.queue_timeout = settings.chat_queue_timeout_seconds
+        self.agent_overrides: dict[str, int] = {}
+
+        self._condition = asyncio.Condition()
+        self._active = 0
+        self._active_per_agent: dict[str, int] = {}
+        self._waiting = 0
+        self._waiting_per_agent: dict[str, int] = {}
+        # Smoothed service time, used to estimate Retry-After
+        self._avg_service_seconds = 1.0
+
+        self.metrics = MetricsRegistry.get_instance()
+        self.metrics.describe("chat_admitted_total", "Chat requests admitted")
+        self.metrics.describe("chat_shed_total", "Chat requests shed by admission control")
+        self.metrics.describe("chat_queue_wait_seconds", "Time spent waiting for admission")
+        self.metrics.register_collector(self._collect)
+
+    @classmethod
+    def get_instance(cls) -> "AdmissionController":
+        """Get singleton instance of AdmissionController"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def _agent_limit(self, agent_id: str) -> int:
+        return self.agent_overrides.get(agent_id, self.max_concurrency_per_agent)
+
+    def _can_run(self, agent_id: str) -> bool:
+        return (
+            self._active < self.max_concurrency
+            and self._active_per_agent.get(agent_id, 0) < self._agent_limit(agent_id)
+        )
+
+    def _retry_after(self) -> int:
+        """Estimate seconds until a slot frees up for a new request"""
+        backlog = (self._waiting + 1) / max(1, self.max_concurrency)
+        return max(1, math.ceil(backlog * self._avg_service_seconds))
+
+    def _shed(self, agent_id: str, reason: str) -> AdmissionRejectedError:
+        self.metrics.inc("chat_shed_total", agent=agent_id, reason=reason)
+        return AdmissionRejectedError(reason, self._retry_after())
+
+    async def acquire(self, agent_id: str, timeout: Optional[float] = None):
+        """Wait for a slot (no longer than `timeout`, if given), or raise AdmissionRejectedError"""
+        start = time.monotonic()
+        async with self._condition:
+            if not self._can_run(agent_id):
+                if self._waiting >= self.max_queue_size:
+                    raise self._shed(agent_id, "queue_full")
+
+                self._waiting += 1
+                self._waiting_per_agent[agent_id] = self._waiting_per_agent.get(agent_id, 0) + 1
+                try:
+                    await asyncio.wait_for(
+                        self._condition.wait_for(lambda: self._can_run(agent_id)),
+                        timeout=min(self.queue_timeout, timeout) if timeout is not None else self.queue_timeout
+                    )
+                except asyncio.TimeoutError:
+                    raise self._shed(agent_id, "queue_timeout")
+                finally:
+                    self._waiting -= 1
+                    self._waiting_per_agent[agent_id] -= 1
+
+            self._active += 1
+            self._active_per_agent[agent_id] = self._active_per_agent.get(agent_id, 0) + 1
+
+        self.metrics.inc("chat_admitted_total", agent=agent_id)
+        self.metrics.observe("chat_queue_wait_seconds", time.monotonic() - start, agent=agent_id)
+
+    async def release(self, agent_id: str, service_seconds: Optional[float] = None):
+        """Free a slot and wake up waiters"""
+        async with self._condition:
+            self._active -= 1
+            self._active_per_agent[agent_id] -= 1
+            if service_seconds is not None:
+                self._avg_service_seconds = 0.8 * self._avg_service_seconds + 0.2 * service_seconds
+            self._condition.notify_all()
+
+    @asynccontextmanager
+    async def slot(self, agent_id: str, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        """Hold an admission slot for the duration of the block"""
+        await self.acquire(agent_id, timeout)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            await self.release(agent_id, time.monotonic() - start)
+
+    async def update_limits(
+        self,
+        max_concurrency: Optional[int] = None,
+        max_concurrency_per_agent: Optional[int] = None,
+        max_queue_size: Optional[int] = None,
+        queue_timeout_seconds: Optional[float] = None,
+        agent_overrides: Optional[dict[str, int]] = None
+    ) -> dict:
+        """Change limits at runtime. Waiters are re-evaluated immediately."""
+        async with self._condition:
+            if max_concurrency is not None:
+                self.max_concurrency = max_concurrency
+            if max_concurrency_per_agent is not None:
+                self.max_concurrency_per_agent = max_concurrency_per_agent
+            if max_queue_size is not None:
+                self.max_queue_size = max_queue_size
+            if queue_timeout_seconds is not None:
+                self.queue_timeout = queue_timeout_seconds
+            if agent_overrides is not None:
+                self.agent_overrides = dict(agent_overrides)
+            self._condition.notify_all()
+
+        logger.info(f"Admission limits updated: {self.get_limits()}")
+        return self.get_limits()
+
+    def get_limits(self) -> dict:
+        """Current admission limits"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_concurrency_per_agent": self.max_concurrency_per_agent,
+            "max_queue_size": self.max_queue_size,
+            "queue_timeout_seconds": self.queue_timeout,
+            "agent_overrides": dict(self.agent_overrides),
+        }
+
+    def get_stats(self) -> dict:
+        """Current load, queue depth and shed counts"""
+        agents = set(self._active_per_agent) | set(self._waiting_per_agent)
+        return {
+            "limits": self.get_limits(),
+            "active": self._active,
+            "queue_depth": self._waiting,
+            "agents": {
+                agent_id: {
+                    "active": self._active_per_agent.get(agent_id, 0),
+                    "queued": self._waiting_per_agent.get(agent_id, 0),
+                    "admitted": self.metrics.get_counter("chat_admitted_total", agent=agent_id),
+                    "shed_queue_full": self.metrics.get_counter(
+                        "chat_shed_total", agent=agent_id, reason="queue_full"
+                    ),
+                    "shed_queue_timeout": self.metrics.get_counter(
+                        "chat_shed_total", agent=agent_id, reason="queue_timeout"
+                    ),
+                }
+                for agent_id in sorted(agents)
+            },
+            "avg_service_seconds": round(self._avg_service_seconds, 3),
+        }
+
+    def _collect(self) -> list[tuple[str, dict, float]]:
+        samples = [
+            ("chat_active_requests", {}, self._active),
+            ("chat_queue_depth", {}, self._waiting),
+        ]
+        for agent_id, count in self._waiting_per_agent.items():
+            samples.append(("chat_queue_depth_by_agent", {"agent": agent_id}, count))
+        return samples
+
+
+def get_admission_controller() -> AdmissionController:
+    """FastAPI dependency for admission control"""
+    return AdmissionController.get_instance()
@@ -2,6 +2,8 @@
 
 import json
 import logging
+import threading
+import time
 from pathlib import Path
 from typing import Optional
 
@@ -9,27 +11,59 @@ from app.config import get_settings
 from app.models.schemas import SupportTicket, AgentConfig
 from app.services.vector_store import VectorStoreService
 from app.services.embedding_service import EmbeddingService
+from app.services.coordination import IndexWrite, WorkerCoordinator
+from app.services.deduplicator import DedupResult, deduplicate
+from app.services.rate_limiter import BACKGROUND
+from app.services.sharding import belongs_to_agent, partition, shard_collections, shard_of
+from app.services.ticket_loader import load_tickets
+from app.services.index_snapshot import (
+    IndexSnapshot,
+    SnapshotError,
+    file_sha256,
+    read_manifest,
+    read_snapshot,
+    snapshot_path,
+    stale_reason,
+    write_snapshot,
+)
 
 logger = logging.getLogger(__name__)
 
+# How often a follower checks whether the leader's startup indexing has finished
+STARTUP_POLL_SECONDS = 1.0
+
 
 class AutoIndexerService:
     """Service for automatically indexing agent knowledge bases on startup"""
     
     _instance: Optional["AutoIndexerService"] = None
+    _instance_lock = threading.Lock()
     
     def __init__(self):
         self.settings = get_settings()
         self.vector_store = VectorStoreService.get_instance()
         self.embedding_service = EmbeddingService.get_instance()
+        self.coordinator = WorkerCoordinator.get_instance()
+        self.snapshot_root = Path(self.settings.snapshot_path)
         self.agents_config: list[AgentConfig] = []
         self._load_agents_config()
+        
+        # Startup indexing runs in the background so the server can answer probes
+        self.startup_state = "not_started"
+        self.startup_results: dict[str, int] = {}
+        self.startup_duration_seconds: Optional[float] = None
+        self._startup_thread: Optional[threading.Thread] = None
+        
+        # Deduplication summary of each agent's last index build on this worker
+        self.dedup_reports: dict[str, dict] = {}
     
     @classmethod
     def get_instance(cls) -> "AutoIndexerService":
         """Get singleton instance"""
         if cls._instance is None:
-            cls._instance = cls()
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
         return cls._instance
     
     def _load_agents_config(self):
@@ -58,32 +92,20 @@ class AutoIndexerService:
                 return agent
         return None
     
+    def _data_source_path(self, data_source: str) -> Path:
+        """Resolve a data source path relative to the backend directory"""
+        return Path(__file__).parent.parent.parent / data_source
+    
     def _load_tickets_from_file(self, data_source: str) -> list[SupportTicket]:
-        """Load tickets from a JSON file"""
-        # Resolve path relative to backend directory
-        base_path = Path(__file__).parent.parent.parent
-        file_path = base_path / data_source
+        """Load tickets from a JSON, NDJSON or CSV file"""
+        file_path = self._data_source_path(data_source)
         
         if not file_path.exists():
             logger.warning(f"Data file not found: {file_path}")
             return []
         
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
-            tickets = []
-            for item in data:
-                ticket = SupportTicket(
-                    id=str(item.get("id", "")),
-                    query=item.get("query", item.get("question", "")),
-                    resolution=item.get("resolution", item.get("answer", "")),
-                    category=item.get("category")
-                )
-                if ticket.query and ticket.resolution:
-                    tickets.append(ticket)
-            
-            return tickets
+            return load_tickets(file_path)
         except Exception as e:
             logger.error(f"Failed to load tickets from {file_path}: {e}")
             return []
@@ -98,20 +120,96 @@ class AutoIndexerService:
             
         Returns:
             Number of tickets indexed
+            
+        Raises:
+            ReadOnlyWorkerError: If this worker is a read-only follower
+        """
+        with self.coordinator.write_lock() as write:
+            return self._index_agent(agent, force, write)
+    
+    def index_shard(self, agent: AgentConfig, shard: int) -> int:
+        """
+        Rebuild one shard of a sharded agent, leaving the other shards serving.
+        
+        The whole data source is embedded (or loaded from its snapshot) and
+        deduplicated, so duplicates are merged across shards exactly as in
+        a full reindex; only this shard's part is then stored.
+        
+        Returns:
+            Number of tickets indexed in the shard
+            
+        Raises:
+            ValueError: If the agent has no such shard
+            ReadOnlyWorkerError: If this worker is a read-only follower
+        """
+        if not 0 <= shard < agent.shards:
+            raise ValueError(f"Agent '{agent.id}' has {agent.shards} shard(s); no shard {shard}")
+        with self.coordinator.write_lock() as write:
+            return self._index_agent(agent, True, write, shard=shard)
+    
+    def rollback_agent(self, agent: AgentConfig) -> dict[str, str]:
+        """
+        Switch an agent back to the index build its last rebuild replaced.
+        
+        Every collection (shard) of the agent that still has a previous
+        build is rolled back; the others keep their current build.
+        
+        Returns:
+            Collection name -> build now serving it, for the rolled back collections
+            
+        Raises:
+            ValueError: If no previous build is kept for the agent
+            ReadOnlyWorkerError: If this worker is a read-only follower
         """
-        collection_name = agent.collection_name
+        with self.coordinator.write_lock() as write:
+            serving = {}
+            for collection_name in shard_collections(agent):
+                try:
+                    serving[collection_name] = self.vector_store.rollback_collection(collection_name)
+                except ValueError:
+                    continue
+            if not serving:
+                raise ValueError(f"Agent '{agent.id}' has no previous index build to roll back to")
+            write.changed = True
+            self.dedup_reports.pop(agent.id, None)
+            return serving
+    
+    def get_agent_versions(self, agent: AgentConfig) -> dict[str, dict]:
+        """Serving and replaced builds of each of the agent's collections"""
+        return {
+            collection_name: self.vector_store.get_versions(collection_name)
+            for collection_name in shard_collections(agent)
+        }
+    
+    def _index_agent(
+        self,
+        agent: AgentConfig,
+        force: bool,
+        write: IndexWrite,
+        shard: Optional[int] = None
+    ) -> int:
+        """Index an agent (or one of its shards) while holding the cross-worker write lock"""
+        collections = shard_collections(agent)
         
         # Check if collection already has data
-        current_count = self.vector_store.get_collection_count(collection_name)
+        current_count = sum(self.vector_store.get_collection_count(c) for c in collections)
         
         if current_count > 0 and not force:
-            logger.info(f"Agent '{agent.id}' already indexed with {current_count} tickets. Skipping.")
-            return current_count
-        
-        # Clear existing data if reindexing
-        if force and current_count > 0:
-            self.vector_store.clear_collection(collection_name)
-            logger.info(f"Cleared existing data for agent '{agent.id}'")
+            stored_dimension = next(
+                (d for d in map(self.vector_store.get_collection_dimension, collections) if d),
+                None
+            )
+            # Going back to the model's full width (no `embedding_dimensions`) counts too
+            expected_dimension = self.embedding_service.output_dimensions(agent.embedding_dimensions)
+            if expected_dimension and stored_dimension != expected_dimension:
+                logger.info(
+                    f"Agent '{agent.id}' index has dimension {stored_dimension}, "
+                    f"queries are embedded at {expected_dimension}. Reindexing."
+                )
+                force = True
+            else:
+                logger.info(f"Agent '{agent.id}' already indexed with {current_count} tickets. Skipping.")
+                return current_count
         
         # Load tickets from data source
         tickets = self._load_tickets_from_file(agent.data_source)
@@ -120,28 +218,170 @@ class AutoIndexerService:
             logger.warning(f"No tickets found for agent '{agent.id}'")
             return 0
         
-        # Generate embeddings for queries only
-        queries = [ticket.query for ticket in tickets]
-        
-        try:
-            embeddings = self.embedding_service.embed_texts(queries)
-        except Exception as e:
-            logger.error(f"Failed to generate embeddings for agent '{agent.id}': {e}")
-            return 0
+        # A matching prebuilt snapshot replaces the embedding calls
+        snapshot = self._load_snapshot(agent)
+        if snapshot is not None:
+            tickets = snapshot.tickets
+            embeddings = snapshot.embeddings.tolist()
+            logger.info(f"Loaded {len(tickets)} embeddings for agent '{agent.id}' from snapshot")
+        else:
+            # Generate embeddings for queries only
+            queries = [ticket.query for ticket in tickets]
+            
+            try:
+                embeddings = self.embedding_service.embed_texts(
+                    queries,
+                    dimensions=agent.embedding_dimensions,
+                    priority=BACKGROUND
+                )
+            except Exception as e:
+                logger.error(f"Failed to generate embeddings for agent '{agent.id}': {e}")
+                return 0
         
-        # Store in vector database
+        # Swap the new data in; the old index keeps serving until then
+        write.changed = True
         try:
-            count = self.vector_store.add_tickets_to_collection(
-                collection_name=collection_name,
-                tickets=tickets,
-                embeddings=embeddings
+            deduped = self.store_tickets(agent, tickets, embeddings, shard=shard)
+            if shard is None:
+                self.dedup_reports[agent.id] = deduped.summary()
+                target = f"agent '{agent.id}'"
+                count = len(deduped.tickets)
+            else:
+                target = f"shard {shard} of agent '{agent.id}'"
+                count = sum(1 for t in deduped.tickets if shard_of(agent, t) == shard)
+            logger.info(
+                f"Indexed {count} tickets for {target} "
+                f"({deduped.input_count} loaded, {deduped.exact_duplicates} exact and "
+                f"{deduped.near_duplicates} near duplicates merged, "
+                f"index {deduped.summary()['reduction']:.0%} smaller)"
             )
-            logger.info(f"Indexed {count} tickets for agent '{agent.id}'")
             return count
         except Exception as e:
             logger.error(f"Failed to store tickets for agent '{agent.id}': {e}")
             return 0
     
+    def store_tickets(
+        self,
+        agent: AgentConfig,
+        tickets: list[SupportTicket],
+        embeddings: list[list[float]],
+        shard: Optional[int] = None
+    ) -> DedupResult:
+        """
+        Replace an agent's indexed tickets, shard by shard.
+        
+        The tickets are deduplicated as a whole first, so duplicates are
+        merged whichever shards they would fall in, and the canonical
+        tickets are then split into the agent's shards, each replaced on
+        its own. Collections left over from a different shard count are
+        dropped. The caller holds the cross-worker write lock.
+        
+        Args:
+            agent: Agent configuration
+            tickets: Tickets to index
+            embeddings: Their query embeddings, row for row
+            shard: Only replace this shard (canonical tickets of other shards are not stored)
+            
+        Returns:
+            The deduplicated tickets with deduplication counts (all shards' tickets, even with `shard`)
+        """
+        collections = shard_collections(agent)
+        deduped = self.deduplicate(tickets, embeddings)
+        for i, (shard_tickets, shard_embeddings) in enumerate(partition(agent, deduped.tickets, deduped.embeddings)):
+            if shard is not None and i != shard:
+                continue
+            self.vector_store.replace_collection(
+                collection_name=collections[i],
+                tickets=shard_tickets,
+                embeddings=shard_embeddings,
+                precision=agent.vector_precision
+            )
+        
+        if shard is None:
+            for name in self.vector_store.list_collection_names():
+                if belongs_to_agent(agent, name) and name not in collections:
+                    logger.info(f"Dropping collection '{name}' left over from a previous shard layout")
+                    self.vector_store.clear_collection(name)
+        return deduped
+    
+    def deduplicate(
+        self,
+        tickets: list[SupportTicket],
+        embeddings: list[list[float]]
+    ) -> DedupResult:
+        """Merge duplicate tickets per the deduplication settings"""
+        if not self.settings.dedup_enabled:
+            return DedupResult(tickets, embeddings, sum(1 + len(t.aliases) for t in tickets), 0, 0)
+        return deduplicate(
+            tickets,
+            embeddings,
+            self.settings.dedup_similarity_threshold,
+            self.settings.dedup_block_size
+        )
+    
+    def _load_snapshot(self, agent: AgentConfig) -> Optional[IndexSnapshot]:
+        """The agent's snapshot if it matches the data source and embedding settings"""
+        path = snapshot_path(self.snapshot_root, agent.id)
+        source_path = self._data_source_path(agent.data_source)
+        if not path.exists() or not source_path.exists():
+            return None
+        
+        try:
+            reason = stale_reason(
+                read_manifest(path),
+                embedding_model=self.embedding_service.model,
+                requested_dimensions=agent.embedding_dimensions,
+                source_sha256=file_sha256(source_path)
+            )
+            if reason:
+                logger.info(f"Snapshot for agent '{agent.id}' is stale ({reason}); embedding instead")
+                return None
+            return read_snapshot(path)
+        except SnapshotError as e:
+            logger.warning(f"Ignoring snapshot for agent '{agent.id}': {e}")
+            return None
+    
+    def export_snapshot(self, agent: AgentConfig) -> dict:
+        """
+        Write the agent's indexed collection to a snapshot file.
+        
+        Args:
+            agent: Agent configuration
+            
+        Returns:
+            The snapshot manifest
+            
+        Raises:
+            ValueError: If the index does not match the current data source
+        """
+        tickets, embeddings = [], []
+        for collection_name in shard_collections(agent):
+            shard_tickets, shard_embeddings = self.vector_store.export_collection(collection_name)
+            tickets.extend(shard_tickets)
+            embeddings.extend(shard_embeddings)
+        source_ids = {t.id for t in self._load_tickets_from_file(agent.data_source)}
+        indexed_ids = {t.id for t in tickets} | {alias for t in tickets for alias in t.aliases}
+        if not tickets or indexed_ids != source_ids:
+            raise ValueError(
+                f"Index of agent '{agent.id}' does not match {agent.data_source}; reindex before exporting"
+            )
+        if agent.embedding_dimensions and len(embeddings[0]) != agent.embedding_dimensions:
+            raise ValueError(
+                f"Index of agent '{agent.id}' has dimension {len(embeddings[0])}, "
+                f"config asks for {agent.embedding_dimensions}; reindex before exporting"
+            )
+        
+        return write_snapshot(
+            snapshot_path(self.snapshot_root, agent.id),
+            tickets=tickets,
+            embeddings=embeddings,
+            collection_name=agent.collection_name,
+            embedding_model=self.embedding_service.model,
+            requested_dimensions=agent.embedding_dimensions,
+            source_file=agent.data_source,
+            source_sha256=file_sha256(self._data_source_path(agent.data_source))
+        )
+    
     def reload_config(self):
         """Reload agents configuration from JSON file"""
         self._load_agents_config()
@@ -167,13 +407,111 @@ class AutoIndexerService:
         
         return results
     
+    def start_background_indexing(self):
+        """Run the startup `index_all_agents(force=False)` in a background thread"""
+        if self._startup_thread is not None:
+            return
+        self.startup_state = "running"
+        self._startup_thread = threading.Thread(
+            target=self._run_startup_indexing,
+            name="startup-indexer",
+            daemon=True
+        )
+        self._startup_thread.start()
+    
+    def _run_startup_indexing(self):
+        started = time.perf_counter()
+        try:
+            self.startup_results = self.index_all_agents(force=False)
+            for agent_id, count in self.startup_results.items():
+                logger.info(f"Agent '{agent_id}': {count} tickets indexed")
+            self.startup_state = "done"
+        except Exception as e:
+            logger.error(f"Startup indexing failed: {e}")
+            self.startup_state = "failed"
+        finally:
+            self.startup_duration_seconds = round(time.perf_counter() - started, 3)
+        try:
+            self.coordinator.publish_startup_state(self.startup_state)
+        except OSError as e:
+            logger.error(f"Could not record the end of startup indexing for other workers: {e}")
+        # Builds replaced before a restart are still due for deletion
+        self.vector_store.schedule_garbage_collection(0)
+    
+    def follow_startup_indexing(self):
+        """On a follower, track the indexing leader's startup indexing instead of running it"""
+        if self._startup_thread is None:
+            self.startup_state = "waiting_for_leader"
+    
+    @property
+    def is_startup_complete(self) -> bool:
+        """
+        True once startup indexing has finished, on this worker or (on a
+        follower) in the indexing leader; False before, or if it failed
+        """
+        return self.startup_state == "done"
+    
+    def wait_for_startup(self, timeout: Optional[float] = None):
+        """
+        Block until startup indexing has finished: this worker's own, or
+        on a follower the leader's. A follower that finds no leader left
+        takes over and runs it itself.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self.startup_state == "waiting_for_leader" and self._startup_thread is None:
+            state = self.coordinator.leader_startup_state()
+            if state is not None:
+                self.startup_state = state
+                # Open the collections the leader has just written
+                self.vector_store.reload()
+                return
+            if self.coordinator.try_become_leader():
+                logger.info("Indexing leader exited before finishing startup indexing; taking over")
+                self.start_background_indexing()
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            time.sleep(STARTUP_POLL_SECONDS)
+        
+        if self._startup_thread is not None:
+            self._startup_thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+    
+    def frequent_questions(self, agent: AgentConfig, limit: int) -> list[str]:
+        """
+        Questions an agent is most likely to be asked.
+        
+        The agent's configured `warmup_questions` come first, followed by
+        the issues with the most tickets in its data file (tickets sharing a
+        resolution count as the same issue), one question per issue.
+        """
+        questions = list(agent.warmup_questions)
+        groups: dict[str, list[str]] = {}
+        for ticket in self._load_tickets_from_file(agent.data_source):
+            groups.setdefault(ticket.resolution, []).append(ticket.query)
+        for queries in sorted(groups.values(), key=len, reverse=True):
+            if len(questions) >= limit:
+                break
+            questions.append(queries[0])
+        return list(dict.fromkeys(questions))[:limit]
+    
     def get_agent_status(self, agent_id: str) -> dict:
         """Get status of a specific agent"""
         agent = self.get_agent(agent_id)
         if not agent:
             return {"error": "Agent not found"}
         
-        count = self.vector_store.get_collection_count(agent.collection_name)
+        shard_counts = {
+            name: self.vector_store.get_collection_count(name)
+            for name in shard_collections(agent)
+        }
+        count = sum(shard_counts.values())
+        
+        categories: dict[str, int] = {}
+        if count:
+            for name, shard_count in shard_counts.items():
+                if shard_count:
+                    for category, n in self.vector_store.get_category_counts(name).items():
+                        categories[category] = categories.get(category, 0) + n
         
         return {
             "id": agent.id,
@@ -181,12 +519,22 @@ class AutoIndexerService:
             "description": agent.description,
             "icon": agent.icon,
             "tickets_count": count,
-            "is_ready": count > 0
+            "is_ready": count > 0,
+            "categories": categories,
+            "shards": shard_counts if agent.shards > 1 else {}
         }
     
     def get_all_agents_status(self) -> list[dict]:
         """Get status of all agents"""
         return [self.get_agent_status(agent.id) for agent in self.agents_config]
+    
+    async def aget_agent_status(self, agent_id: str) -> dict:
+        """`get_agent_status` on the vector store's thread pool"""
+        return await self.vector_store.run(self.get_agent_status, agent_id)
+    
+    async def aget_all_agents_status(self) -> list[dict]:
+        """`get_all_agents_status` on the vector store's thread pool"""
+        return await self.vector_store.run(self.get_all_agents_status)
 
 
 def get_auto_indexer() -> AutoIndexerService:
@@ -0,0 +1,189 @@
+"""Batch Chat Service - Bulk question answering with batched embedding and retrieval"""
+
+import asyncio
+import logging
+import threading
+from typing import AsyncIterator, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+from app.models.schemas import AgentConfig, BatchChatItem, RetrievedContext, SourcesMode, sources_exclude
+from app.services.embedding_service import EmbeddingService
+from app.services.retriever import RetrieverService
+from app.services.rag_chain import RAGChainService
+from app.services.rate_limiter import BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+
+class BatchChatService:
+    """
+    Answers many (agent_id, question) pairs in one request.
+
+    Items are processed in chunks: each chunk is embedded with one API call
+    per embedding dimension and searched with one multi-embedding query per
+    collection. Completions then run concurrently up to a limit while the
+    next chunk is being prepared. Results are yielded one per item, in
+    input order or as they complete.
+    """
+
+    _instance: Optional["BatchChatService"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        settings = get_settings()
+        self.chunk_size = settings.batch_chunk_size
+        self.default_concurrency = settings.batch_max_concurrency
+
+        self.embedding_service = EmbeddingService.get_instance()
+        self.retriever = RetrieverService.get_instance()
+        self.rag_chain = RAGChainService.get_instance()
+
+    @classmethod
+    def get_instance(cls) -> "BatchChatService":
+        """Get singleton instance of BatchChatService"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    async def _embed_chunk(
+        self,
+        indices: list[int],
+        items: list[BatchChatItem],
+        agents: dict[str, AgentConfig]
+    ) -> dict[int, list[float]]:
+        """Embed a chunk with one call per embedding dimension"""
+        by_dimension: dict[Optional[int], list[int]] = {}
+        for i in indices:
+            by_dimension.setdefault(agents[items[i].agent_id].embedding_dimensions, []).append(i)
+
+        embeddings = {}
+        for dimensions, group in by_dimension.items():
+            vectors = await run_in_threadpool(
+                self.embedding_service.embed_texts,
+                [items[i].question for i in group],
+                dimensions=dimensions,
+                priority=BACKGROUND
+            )
+            embeddings.update(zip(group, vectors))
+        return embeddings
+
+    async def _retrieve_chunk(
+        self,
+        embeddings: dict[int, list[float]],
+        items: list[BatchChatItem],
+        agents: dict[str, AgentConfig]
+    ) -> dict[int, list[RetrievedContext]]:
+        """Retrieve with one multi-embedding vector query per agent and category filter"""
+        by_agent: dict[tuple, list[int]] = {}
+        for i in embeddings:
+            key = (items[i].agent_id, tuple(items[i].category or ()))
+            by_agent.setdefault(key, []).append(i)
+
+        retrieved = {}
+        for (agent_id, categories), group in by_agent.items():
+            results = await self.retriever.aretrieve_batch(
+                agents[agent_id],
+                [embeddings[i] for i in group],
+                list(categories) or None
+            )
+            retrieved.update(zip(group, results))
+        return retrieved
+
+    async def run(
+        self,
+        items: list[BatchChatItem],
+        agents: dict[str, AgentConfig],
+        errors: dict[int, str],
+        order: str = "input",
+        max_concurrency: Optional[int] = None,
+        sources: SourcesMode = "full"
+    ) -> AsyncIterator[dict]:
+        """
+        Answer a batch of questions.
+
+        Args:
+            items: Questions with their agent IDs
+            agents: Configurations of the agents that can serve questions
+            errors: Items already rejected by the caller, by index
+            order: "input" to yield in input order, "completion" as answers finish
+            max_concurrency: Maximum concurrent completions
+            sources: Source detail in each response (see ChatRequest.sources)
+
+        Yields:
+            One result dict per item with index, agent_id, response and error
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(max_concurrency or self.default_concurrency)
+        tasks: list[asyncio.Task] = []
+        exclude = sources_exclude(sources)
+
+        def result(i: int, response=None, error: Optional[str] = None) -> dict:
+            return {
+                "index": i,
+                "agent_id": items[i].agent_id,
+                "question": items[i].question,
+                "response": response.model_dump(exclude=exclude) if response is not None else None,
+                "error": error,
+            }
+
+        async def complete(i: int, retrieved: list[RetrievedContext]):
+            async with semaphore:
+                try:
+                    response = await self.rag_chain.answer_with_context(
+                        items[i].question, agents[items[i].agent_id], retrieved, priority=BACKGROUND
+                    )
+                    await queue.put(result(i, response=response))
+                except Exception as e:
+                    await queue.put(result(i, error=f"Error generating response: {e}"))
+
+        async def produce():
+            for i, message in errors.items():
+                await queue.put(result(i, error=message))
+
+            valid = [i for i in range(len(items)) if i not in errors]
+            for start in range(0, len(valid), self.chunk_size):
+                chunk = valid[start:start + self.chunk_size]
+                try:
+                    embeddings = await self._embed_chunk(chunk, items, agents)
+                    retrieved = await self._retrieve_chunk(embeddings, items, agents)
+                except Exception as e:
+                    logger.error(f"Batch chunk of {len(chunk)} items failed: {e}")
+                    for i in chunk:
+                        await queue.put(result(i, error=f"Error retrieving context: {e}"))
+                    continue
+
+                # Wait for free completion slots before preparing the next chunk
+                for i in chunk:
+                    await semaphore.acquire()
+                    semaphore.release()
+                    tasks.append(asyncio.create_task(complete(i, retrieved[i])))
+
+        producer = asyncio.create_task(produce())
+        buffered: dict[int, dict] = {}
+        next_index = 0
+
+        try:
+            for _ in range(len(items)):
+                item_result = await queue.get()
+                if order == "completion":
+                    yield item_result
+                    continue
+                buffered[item_result["index"]] = item_result
+                while next_index in buffered:
+                    yield buffered.pop(next_index)
+                    next_index += 1
+            await producer
+        finally:
+            # Client disconnected or the batch failed: stop outstanding work
+            producer.cancel()
+            for task in tasks:
+                task.cancel()
+
+
+def get_batch_chat() -> BatchChatService:
+    """FastAPI dependency for batch chat service"""
+    return BatchChatService.get_instance()
@@ -0,0 +1,245 @@
+"""Capacity - Memory accounting for collections and caches, and growth projections"""
+
+import json
+import logging
+import math
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from app.config import get_settings
+from app.models.schemas import AgentConfig
+from app.services.auto_indexer import AutoIndexerService
+from app.services.embedding_service import EmbeddingService
+from app.services.session_store import SessionStore
+from app.services.sharding import shard_collections
+from app.services.vector_store import VectorStoreService
+
+logger = logging.getLogger(__name__)
+
+# Ticket counts the report projects to, as multiples of today's
+PROJECTION_FACTORS = (10, 100)
+
+# Per-collection figures that make up its resident memory estimate
+MEMORY_FIELDS = ("vector_bytes", "index_bytes", "metadata_bytes", "quantized_bytes")
+
+
+def process_rss_bytes() -> Optional[int]:
+    """Resident set size of this process (peak RSS where the current one is unavailable)"""
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def directory_bytes(path: Path) -> int:
+    """Total size of the files under a directory (0 if it does not exist)"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def fit_power_law(points: list[tuple[int, float]], x: float) -> tuple[Optional[float], bool]:
+    """
+    Predict y at x from measured (x, y) points with a log-log least-squares
+    line, so both linear scans and sub-linear HNSW searches are followed.
+
+    Returns:
+        (prediction, whether x lies outside the measured range); a single
+        point is scaled linearly
+    """
+    points = [(px, py) for px, py in points if px > 0 and py > 0]
+    if not points:
+        return None, True
+    xs = [px for px, _ in points]
+    extrapolated = not min(xs) <= x <= max(xs)
+    if len(points) == 1:
+        px, py = points[0]
+        return py * x / px, extrapolated
+    slope, intercept = np.polyfit(np.log([px for px, _ in points]), np.log([py for _, py in points]), 1)
+    return float(math.exp(intercept + slope * math.log(x))), extrapolated
+
+
+def benchmark_backend(agent: AgentConfig) -> str:
+    """Benchmark rows matching how an agent's collection is searched"""
+    if agent.vector_precision == "float32":
+        return "chroma"
+    return f"quantized-{agent.vector_precision}"
+
+
+class CapacityService:
+    """
+    Reports what the indexed collections and in-process caches cost, and
+    projects memory and query latency to larger ticket counts.
+
+    Collection figures are estimates from vector counts, dimensions and
+    stored metadata; the process RSS and on-disk sizes are measured.
+    Memory projections scale today's per-agent figures with the ticket
+    count. Latency projections come from the synthetic benchmark written
+    by `python -m benchmarks.capacity` to `capacity_benchmark_path`; without
+    it only memory is projected.
+    """
+
+    _instance: Optional["CapacityService"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        settings = get_settings()
+        self.benchmark_path = Path(settings.capacity_benchmark_path)
+        self.disk_paths = {
+            "chroma_db_path": Path(settings.chroma_db_path),
+            "document_store_path": Path(settings.document_store_path),
+            "quantized_index_path": Path(settings.quantized_index_path),
+        }
+
+    @classmethod
+    def get_instance(cls) -> "CapacityService":
+        """Get singleton instance of CapacityService"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def load_benchmark(self) -> Optional[dict]:
+        """The latest capacity benchmark results, or None"""
+        try:
+            with open(self.benchmark_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (ValueError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable capacity benchmark {self.benchmark_path}: {e}")
+            return None
+
+    def _agent_usage(self, agent: AgentConfig, vector_store: VectorStoreService) -> dict:
+        collections = []
+        for name in shard_collections(agent):
+            try:
+                collections.append(vector_store.get_memory_usage(name))
+            except Exception as e:
+                collections.append({"collection": name, "error": str(e)})
+
+        measured = [c for c in collections if "error" not in c]
+        vectors = sum(c["vectors"] for c in measured)
+        return {
+            "vectors": vectors,
+            "dimension": max((c["dimension"] for c in measured), default=0),
+            "shards": agent.shards,
+            "backend": benchmark_backend(agent),
+            "memory_bytes": sum(c[field] for c in measured for field in MEMORY_FIELDS),
+            "document_store_bytes": sum(c["document_store_bytes"] for c in measured),
+            "collections": collections,
+        }
+
+    def _project_agent(self, usage: dict, factor: int, benchmark: Optional[dict]) -> dict:
+        vectors = usage["vectors"] * factor
+        projection = {
+            "vectors": vectors,
+            "memory_bytes": usage["memory_bytes"] * factor,
+            "document_store_bytes": usage["document_store_bytes"] * factor,
+            "p50_ms": None,
+            "p95_ms": None,
+        }
+        rows = (benchmark or {}).get("results", {}).get(usage["backend"])
+        if not rows or not vectors:
+            return projection
+
+        # Shards are searched concurrently, so a query costs about one shard's search;
+        # search time grows with the dimension, which the benchmark fixes
+        per_shard = vectors / max(1, usage["shards"])
+        dimension_ratio = (usage["dimension"] or benchmark["dimension"]) / benchmark["dimension"]
+        for key in ("p50_ms", "p95_ms"):
+            value, extrapolated = fit_power_law([(r["vectors"], r[key]) for r in rows], per_shard)
+            if value is not None:
+                projection[key] = round(value * dimension_ratio, 3)
+                projection["extrapolated"] = extrapolated
+        return projection
+
+    def get_report(self) -> dict:
+        """
+        Memory and disk accounting for every agent and cache, with
+        projections at each of PROJECTION_FACTORS times today's tickets.
+        """
+        auto_indexer = AutoIndexerService.get_instance()
+        vector_store = VectorStoreService.get_instance()
+        agents = {agent.id: self._agent_usage(agent, vector_store) for agent in auto_indexer.agents_config}
+
+        caches = {
+            "collections": vector_store.get_cache_usage(),
+            "query_embeddings": EmbeddingService.get_instance().get_cache_stats(),
+            "sessions": SessionStore.get_instance().get_stats(),
+        }
+        rss_bytes = process_rss_bytes()
+        collection_bytes = sum(usage["memory_bytes"] for usage in agents.values())
+
+        benchmark = self.load_benchmark()
+        projections = []
+        for factor in PROJECTION_FACTORS:
+            projections.append({
+                "factor": factor,
+                # Growth is in the collections; the rest of the process stays as it is
+                "rss_bytes": rss_bytes + collection_bytes * (factor - 1) if rss_bytes is not None else None,
+                "agents": {
+                    agent_id: self._project_agent(usage, factor, benchmark)
+                    for agent_id, usage in agents.items()
+                },
+            })
+
+        return {
+            "process": {"pid": os.getpid(), "rss_bytes": rss_bytes},
+            "agents": agents,
+            "caches": caches,
+            "disk": {name: directory_bytes(path) for name, path in self.disk_paths.items()},
+            "projections": projections,
+            "benchmark": {
+                "path": str(self.benchmark_path),
+                "generated_at": benchmark.get("generated_at") if benchmark else None,
+            },
+        }
+
+    def log_summary(self):
+        """Log per-agent memory, process RSS and disk use"""
+        report = self.get_report()
+        for agent_id, usage in report["agents"].items():
+            logger.info(
+                f"Capacity: agent '{agent_id}' {usage['vectors']} vectors x {usage['dimension']} dims, "
+                f"~{_mb(usage['memory_bytes'])} MB in memory, {_mb(usage['document_store_bytes'])} MB ticket text"
+            )
+        rss_bytes = report["process"]["rss_bytes"]
+        logger.info(
+            f"Capacity: RSS {_mb(rss_bytes) if rss_bytes is not None else 'unknown'} MB, "
+            f"chroma_db_path {_mb(report['disk']['chroma_db_path'])} MB on disk, "
+            f"{len(report['caches']['collections']['open_collections'])} collections open"
+        )
+        for projection in report["projections"]:
+            if projection["rss_bytes"] is not None:
+                logger.info(f"Capacity: ~{_mb(projection['rss_bytes'])} MB RSS projected at {projection['factor']}x tickets")
+
+
+def _mb(value: int) -> float:
+    return round(value / (1024 * 1024), 1)
+
+
+def get_capacity() -> CapacityService:
+    """FastAPI dependency for the capacity service"""
+    return CapacityService.get_instance()
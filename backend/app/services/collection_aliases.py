@@ -0,0 +1,155 @@
+"""Collection Aliases - Stable collection names pointing at versioned builds"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+VERSION_SUFFIX = "__v"
+
+_VERSIONED = re.compile(re.escape(VERSION_SUFFIX) + r"\d+$")
+
+
+def logical_name(physical_name: str) -> str:
+    """Alias a versioned collection is built for (`kb__v3` -> `kb`)"""
+    return _VERSIONED.sub("", physical_name)
+
+
+class CollectionAliases:
+    """
+    Maps the collection names used by agents and the API to the
+    versioned collection currently serving them.
+
+    A rebuild fills `{name}__v{n}` while `{name}` keeps resolving to the
+    previous build, then `swap` repoints the alias. Replaced builds stay
+    listed under `previous` (newest first) until they are garbage
+    collected, so the last one can be rolled back to. Names without an
+    alias resolve to themselves, which keeps collections indexed before
+    aliases existed working until their first rebuild.
+
+    The registry is one JSON file next to the other coordination files,
+    replaced atomically. Writes happen under the cross-worker write lock
+    and re-read the file first; other workers re-read it on reload.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._aliases: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """(Re)read the registry from disk"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                aliases = json.load(f).get("aliases", {})
+        except FileNotFoundError:
+            aliases = {}
+        except (ValueError, json.JSONDecodeError) as e:
+            logger.error(f"Ignoring unreadable collection alias file {self.path}: {e}")
+            aliases = {}
+        with self._lock:
+            self._aliases = aliases
+
+    def _update(self, fn: Callable[[dict], object]):
+        """Apply a change to the latest registry on disk and write it back"""
+        self.load()
+        with self._lock:
+            aliases = json.loads(json.dumps(self._aliases))
+            result = fn(aliases)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"aliases": aliases, "updated_at": time.time()}, f, indent=2)
+            os.replace(tmp_path, self.path)
+            self._aliases = aliases
+        return result
+
+    def resolve(self, name: str) -> str:
+        """Collection currently serving a name (the name itself if it has no alias)"""
+        with self._lock:
+            alias = self._aliases.get(name)
+        return alias["current"] if alias else name
+
+    def get(self, name: str) -> Optional[dict]:
+        """Alias record of a name, or None"""
+        with self._lock:
+            alias = self._aliases.get(name)
+            return json.loads(json.dumps(alias)) if alias else None
+
+    def names(self) -> list[str]:
+        with self._lock:
+            return list(self._aliases)
+
+    def versions(self, name: str) -> list[str]:
+        """Every collection built for a name: the serving one first, then older builds"""
+        with self._lock:
+            alias = self._aliases.get(name)
+        if not alias:
+            return [name]
+        return [alias["current"]] + [entry["name"] for entry in alias["previous"]]
+
+    def next_version(self, name: str) -> str:
+        """Reserve the collection name of the next build"""
+        def reserve(aliases: dict) -> str:
+            alias = aliases.setdefault(name, {"current": name, "version": 0, "previous": []})
+            alias["version"] += 1
+            return f"{name}{VERSION_SUFFIX}{alias['version']}"
+        return self._update(reserve)
+
+    def swap(self, name: str, physical_name: str) -> str:
+        """Point a name at a new build; returns the collection it replaced"""
+        def swap(aliases: dict) -> str:
+            alias = aliases.setdefault(name, {"current": name, "version": 0, "previous": []})
+            replaced = alias["current"]
+            alias["previous"] = [e for e in alias["previous"] if e["name"] != physical_name]
+            if replaced != physical_name:
+                alias["previous"].insert(0, {"name": replaced, "retired_at": time.time()})
+            alias["current"] = physical_name
+            alias["swapped_at"] = time.time()
+            return replaced
+        return self._update(swap)
+
+    def rollback(self, name: str) -> str:
+        """
+        Point a name back at its previous build; the build it replaces
+        becomes the previous one, so a rollback can itself be undone.
+
+        Raises:
+            ValueError: If there is no previous build to roll back to
+        """
+        self.load()
+        with self._lock:
+            alias = self._aliases.get(name)
+        if not alias or not alias["previous"]:
+            raise ValueError(f"Collection '{name}' has no previous build to roll back to")
+        return self.swap(name, alias["previous"][0]["name"])
+
+    def expired(self, grace_seconds: float) -> list[tuple[str, str]]:
+        """(name, collection) of replaced builds older than the grace period"""
+        cutoff = time.time() - grace_seconds
+        with self._lock:
+            return [
+                (name, entry["name"])
+                for name, alias in self._aliases.items()
+                for entry in alias["previous"]
+                if entry["retired_at"] <= cutoff
+            ]
+
+    def forget(self, name: str, physical_name: str):
+        """Drop a deleted build from a name's previous builds"""
+        def forget(aliases: dict):
+            alias = aliases.get(name)
+            if alias:
+                alias["previous"] = [e for e in alias["previous"] if e["name"] != physical_name]
+        self._update(forget)
+
+    def remove(self, name: str):
+        """Forget a name entirely (its collections have been deleted)"""
+        self._update(lambda aliases: aliases.pop(name, None))
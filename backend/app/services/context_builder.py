@@ -0,0 +1,160 @@
+"""Context Builder - Token-budgeted formatting of retrieved tickets for the prompt"""
+
+import math
+import re
+from dataclasses import dataclass
+
+from app.models.schemas import RetrievedContext
+
+
+# Markers that must survive trimming untouched
+ACTION_LINK_MARKER = re.compile(r'\[ACTION_LINK:[^\]]+\]')
+
+# Words, numbers and single punctuation characters
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Appended to resolutions that were shortened
+TRUNCATION_SUFFIX = " [...]"
+
+TICKET_TEMPLATE = """
+--- Ticket #{index} (Relevance: {score:.0%}) ---
+Category: {category}
+Original Question: {query}
+Resolution: {resolution}
+"""
+
+NO_CONTEXT_TEXT = "No relevant tickets found."
+
+
+def _piece_tokens(piece: str) -> int:
+    if piece[0].isalnum() or piece[0] == "_":
+        return math.ceil(len(piece) / 4)
+    return 1
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate the number of BPE tokens in a text without a tokenizer.
+
+    Counts punctuation as one token and splits words into ~4 character
+    pieces, which tracks cl100k/o200k counts closely for English prose.
+    """
+    if not text:
+        return 0
+    return sum(_piece_tokens(piece) for piece in _TOKEN_PATTERN.findall(text))
+
+
+@dataclass
+class BuiltContext:
+    """Formatted context plus accounting for the prompt"""
+    text: str
+    token_count: int
+    tickets_included: int
+    tickets_trimmed: int
+
+
+def _split_markers(resolution: str) -> tuple[str, list[str]]:
+    """Separate ACTION_LINK markers from the resolution body"""
+    markers = ACTION_LINK_MARKER.findall(resolution)
+    body = ACTION_LINK_MARKER.sub("", resolution)
+    body = re.sub(r'\n{3,}', '\n\n', body).strip()
+    return body, markers
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens, preferring sentence or line boundaries"""
+    if max_tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    used = 0
+    end = 0
+    for match in _TOKEN_PATTERN.finditer(text):
+        cost = _piece_tokens(match.group())
+        if used + cost > max_tokens:
+            break
+        used += cost
+        end = match.end()
+
+    cut = text[:end]
+    # Extractive summary: keep whole sentences/lines when most of the text survives
+    boundary = max(cut.rfind(". "), cut.rfind("\n"), cut.rfind(".\n"))
+    if boundary > len(cut) * 0.5:
+        cut = cut[:boundary + 1]
+    return cut.rstrip()
+
+
+def trim_resolution(resolution: str, max_tokens: int) -> str:
+    """
+    Shorten a resolution to fit max_tokens while keeping every
+    [ACTION_LINK:...] marker intact.
+    """
+    if estimate_tokens(resolution) <= max_tokens:
+        return resolution
+
+    body, markers = _split_markers(resolution)
+    marker_text = "\n".join(markers)
+    body_budget = max_tokens - estimate_tokens(marker_text) - estimate_tokens(TRUNCATION_SUFFIX)
+    trimmed = _truncate_to_tokens(body, body_budget)
+    if trimmed and trimmed != body:
+        trimmed += TRUNCATION_SUFFIX
+
+    return "\n\n".join(part for part in (trimmed, marker_text) if part)
+
+
+def _format_ticket(index: int, ctx: RetrievedContext, resolution: str) -> str:
+    return TICKET_TEMPLATE.format(
+        index=index,
+        score=ctx.similarity_score,
+        category=ctx.category or 'General',
+        query=ctx.original_query,
+        resolution=resolution
+    )
+
+
+def build_context(retrieved: list[RetrievedContext], token_budget: int) -> BuiltContext:
+    """
+    Format retrieved tickets for the prompt within a token budget.
+
+    Tickets are kept in relevance order. When the full text does not fit,
+    the budget left after the fixed ticket headers is shared across
+    resolutions (short ones keep their full text, long ones split the
+    rest) and each resolution is trimmed to its share. Tickets whose header alone no
+    longer fits are dropped, but the top ticket is always kept.
+    """
+    if not retrieved:
+        return BuiltContext(NO_CONTEXT_TEXT, estimate_tokens(NO_CONTEXT_TEXT), 0, 0)
+
+    full_parts = [_format_ticket(i, ctx, ctx.resolution) for i, ctx in enumerate(retrieved, 1)]
+    full_text = "\n".join(full_parts)
+    full_tokens = estimate_tokens(full_text)
+    if full_tokens <= token_budget:
+        return BuiltContext(full_text, full_tokens, len(retrieved), 0)
+
+    # Fixed cost of each ticket without its resolution
+    header_costs = [estimate_tokens(_format_ticket(i, ctx, "")) for i, ctx in enumerate(retrieved, 1)]
+    included = len(retrieved)
+    while included > 1 and sum(header_costs[:included]) >= token_budget:
+        included -= 1
+
+    # Water-fill: short resolutions take what they need, long ones share the rest
+    kept = retrieved[:included]
+    costs = [estimate_tokens(ctx.resolution) for ctx in kept]
+    allowance = [0] * included
+    remaining = token_budget - sum(header_costs[:included])
+    for position, index in enumerate(sorted(range(included), key=lambda i: costs[i])):
+        share = max(0, remaining // (included - position))
+        allowance[index] = min(costs[index], share)
+        remaining -= allowance[index]
+
+    parts = []
+    trimmed_count = 0
+    for index, ctx in enumerate(kept):
+        resolution = trim_resolution(ctx.resolution, allowance[index])
+        if resolution != ctx.resolution:
+            trimmed_count += 1
+        parts.append(_format_ticket(index + 1, ctx, resolution))
+
+    text = "\n".join(parts)
+    return BuiltContext(text, estimate_tokens(text), included, trimmed_count)
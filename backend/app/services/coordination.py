@@ -0,0 +1,236 @@
+"""Worker Coordination - Indexing leader election and index generations across workers"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, Optional
+
+from app.config import get_settings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+class ReadOnlyWorkerError(Exception):
+    """Raised when a follower worker is asked to modify the index"""
+
+
+def _lock_file(handle: IO, blocking: bool) -> bool:
+    """Take an exclusive OS-level lock on an open file"""
+    try:
+        if fcntl is not None:
+            flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            fcntl.flock(handle.fileno(), flags)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock_file(handle: IO):
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    else:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class IndexWrite:
+    """Handle for an in-progress index write; set `changed` once data was modified"""
+
+    def __init__(self):
+        self.changed = False
+
+
+class WorkerCoordinator:
+    """
+    Coordinates uvicorn worker processes that share one index.
+
+    - The first worker to take the leader lock becomes the indexing leader
+      and keeps the lock for its lifetime. Only the leader runs the startup
+      auto-indexer. With an embedded (on-disk) Chroma, only the leader may
+      write; followers are read-only. If the leader exits, the next worker
+      that needs to write takes over.
+    - Every index write is serialized by a write lock and followed by a
+      bump of the index generation file. Workers compare the generation
+      with what they last loaded and reload their caches when it changes.
+    - The leader records the outcome of its startup indexing, and
+      followers wait for it before they report ready.
+    """
+
+    _instance: Optional["WorkerCoordinator"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        settings = get_settings()
+        self.directory = Path(settings.coordination_path)
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.leader_lock_path = self.directory / "indexer.lock"
+        self.write_lock_path = self.directory / "write.lock"
+        self.generation_path = self.directory / "index_generation.json"
+        self.startup_path = self.directory / "startup_indexing.json"
+
+        # An external Chroma server can take writes from any worker
+        self.shared_server = bool(settings.chroma_server_host)
+        self.check_interval = settings.generation_check_interval_seconds
+
+        self._leader_handle: Optional[IO] = None
+        self._seen_generation = self.read_generation()
+        self._last_check = 0.0
+        self._thread_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "WorkerCoordinator":
+        """Get singleton instance of WorkerCoordinator"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader_handle is not None
+
+    @property
+    def can_write(self) -> bool:
+        """Whether this worker may modify the index"""
+        return self.is_leader or self.shared_server
+
+    def try_become_leader(self) -> bool:
+        """Try to take the leader lock without blocking"""
+        if self.is_leader:
+            return True
+        handle = open(self.leader_lock_path, "a+")
+        if not _lock_file(handle, blocking=False):
+            handle.close()
+            logger.debug(f"Worker {os.getpid()} is a follower")
+            return False
+        handle.seek(0)
+        handle.truncate()
+        handle.write(str(os.getpid()))
+        handle.flush()
+        self._leader_handle = handle
+        logger.info(f"Worker {os.getpid()} is the indexing leader")
+        return True
+
+    def release_leadership(self):
+        """Give up the leader lock (on shutdown)"""
+        if self._leader_handle is not None:
+            _unlock_file(self._leader_handle)
+            self._leader_handle.close()
+            self._leader_handle = None
+
+    def acquire_write_access(self) -> bool:
+        """
+        Whether this worker may write, taking over leadership if no other
+        worker holds it (first start, or the previous leader exited).
+        """
+        return self.can_write or self.try_become_leader()
+
+    def ensure_writable(self):
+        """Raise ReadOnlyWorkerError if this worker must not write"""
+        if not self.acquire_write_access():
+            raise ReadOnlyWorkerError(
+                "This worker is a read-only follower; index changes are handled by the indexing leader"
+            )
+
+    @contextmanager
+    def write_lock(self) -> Iterator[IndexWrite]:
+        """
+        Serialize index writes across workers. If the write marks itself
+        as changed, a new index generation is published when it completes.
+        """
+        self.ensure_writable()
+        write = IndexWrite()
+        with self._thread_lock:
+            with open(self.write_lock_path, "a+") as handle:
+                _lock_file(handle, blocking=True)
+                try:
+                    yield write
+                finally:
+                    if write.changed:
+                        self._seen_generation = self._bump_generation()
+                    _unlock_file(handle)
+
+    def publish_startup_state(self, state: str):
+        """Record how this (leader) worker's startup indexing ended, for the followers"""
+        tmp_path = self.startup_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"state": state, "leader_pid": os.getpid(), "updated_at": time.time()}, f)
+        os.replace(tmp_path, self.startup_path)
+
+    def leader_startup_state(self) -> Optional[str]:
+        """
+        How the current leader's startup indexing ended ("done" or
+        "failed"), or None while it is still running. Records left by an
+        earlier leader do not count.
+        """
+        try:
+            with open(self.startup_path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+            with open(self.leader_lock_path, "r", encoding="utf-8") as f:
+                leader_pid = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return None
+        return record.get("state") if record.get("leader_pid") == leader_pid else None
+
+    def read_generation(self) -> int:
+        """Current index generation on disk"""
+        try:
+            with open(self.generation_path, "r", encoding="utf-8") as f:
+                return int(json.load(f).get("generation", 0))
+        except (FileNotFoundError, ValueError, json.JSONDecodeError):
+            return 0
+
+    def _bump_generation(self) -> int:
+        generation = self.read_generation() + 1
+        tmp_path = self.generation_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"generation": generation, "writer_pid": os.getpid(), "updated_at": time.time()}, f)
+        os.replace(tmp_path, self.generation_path)
+        return generation
+
+    def poll_new_generation(self) -> bool:
+        """
+        Check (at most once per interval) whether another worker published
+        a new index generation since this worker last loaded.
+        """
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+
+        generation = self.read_generation()
+        if generation == self._seen_generation:
+            return False
+        logger.info(f"Index generation {self._seen_generation} -> {generation}; reloading")
+        self._seen_generation = generation
+        return True
+
+    def get_status(self) -> dict:
+        """Role and generation of this worker"""
+        return {
+            "pid": os.getpid(),
+            "role": "leader" if self.is_leader else "follower",
+            "can_write": self.can_write,
+            "chroma_mode": "server" if self.shared_server else "embedded",
+            "index_generation": self._seen_generation,
+        }
+
+
+def get_coordinator() -> WorkerCoordinator:
+    """FastAPI dependency for worker coordination"""
+    return WorkerCoordinator.get_instance()
@@ -0,0 +1,52 @@
+"""Deadline - End-to-end latency budget shared by the stages of a request"""
+
+import time
+from typing import Optional
+
+
+class DeadlineExceededError(Exception):
+    """Raised when a stage starts (or would retry) after the request's budget ran out"""
+
+    def __init__(self, stage: str, budget_seconds: float):
+        self.stage = stage
+        self.budget_seconds = budget_seconds
+        super().__init__(f"Latency budget of {budget_seconds:.1f}s exhausted before {stage}")
+
+
+class Deadline:
+    """
+    A latency budget started when the request arrives.
+
+    Each stage asks for the time left and caps its own waits and timeouts
+    with it, so the whole request finishes within `budget_seconds`
+    however the time is split between queueing, embedding, retrieval and
+    the completion.
+    """
+
+    def __init__(self, budget_seconds: float):
+        self.budget_seconds = budget_seconds
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + budget_seconds
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the request started"""
+        return time.monotonic() - self.started_at
+
+    def remaining(self) -> float:
+        """Seconds left in the budget (never negative)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def cap(self, timeout: Optional[float]) -> float:
+        """A stage timeout shortened to the time left"""
+        remaining = self.remaining()
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def check(self, stage: str):
+        """Raise DeadlineExceededError if the budget is already spent"""
+        if self.expired:
+            raise DeadlineExceededError(stage, self.budget_seconds)
@@ -0,0 +1,155 @@
+"""Deduplication - Merge exact and near-duplicate tickets before indexing"""
+
+import re
+from dataclasses import dataclass
+from typing import Union
+
+import numpy as np
+
+from app.models.schemas import SupportTicket
+
+
+@dataclass
+class DedupResult:
+    """
+    Canonical tickets and their embeddings, row for row.
+
+    `input_count` counts source tickets, including ones merged into an
+    input ticket earlier; the duplicate counts cover this pass only.
+    """
+    tickets: list[SupportTicket]
+    embeddings: list[list[float]]
+    input_count: int
+    exact_duplicates: int
+    near_duplicates: int
+
+    @property
+    def merged(self) -> int:
+        """Source tickets not indexed on their own, including earlier merges"""
+        return self.input_count - len(self.tickets)
+
+    def summary(self) -> dict:
+        return {
+            "tickets_in": self.input_count,
+            "tickets_out": len(self.tickets),
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "reduction": round(self.merged / self.input_count, 4) if self.input_count else 0.0,
+        }
+
+
+def _normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def _find(parent: list[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def _union(parent: list[int], a: int, b: int):
+    ra, rb = _find(parent, a), _find(parent, b)
+    if ra != rb:
+        parent[max(ra, rb)] = min(ra, rb)
+
+
+def deduplicate(
+    tickets: list[SupportTicket],
+    embeddings: Union[list[list[float]], np.ndarray],
+    threshold: float,
+    block_size: int = 1024
+) -> DedupResult:
+    """
+    Merge tickets that ask the same thing and share a resolution.
+
+    Exact duplicates (same query and resolution, ignoring case and spacing)
+    are merged first. The remaining tickets are compared all-pairs in
+    `block_size` x `block_size` tiles, one matrix product per tile, and pairs
+    with cosine similarity >= `threshold` and the same resolution are
+    merged. Requiring the same resolution means a merge never drops an
+    answer, only a rephrasing of the question.
+
+    Each group keeps the ticket closest to the group's mean embedding; the
+    others are listed in its `aliases`, together with any aliases they
+    already had, so deduplicating an already deduplicated set is a no-op.
+
+    Args:
+        tickets: Tickets to index
+        embeddings: Their query embeddings, row for row
+        threshold: Minimum cosine similarity for a near duplicate (> 1 merges exact duplicates only)
+        block_size: Rows and columns per similarity tile
+
+    Returns:
+        Canonical tickets in input order, with their embeddings
+    """
+    n = len(tickets)
+    input_count = sum(1 + len(t.aliases) for t in tickets)
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    if n < 2:
+        return DedupResult(list(tickets), vectors.tolist(), input_count, 0, 0)
+
+    parent = list(range(n))
+    resolutions: dict[str, int] = {}
+    resolution_ids = np.empty(n, dtype=np.int64)
+    first_seen: dict[tuple[str, int], int] = {}
+    representatives = []
+    for i, ticket in enumerate(tickets):
+        resolution_ids[i] = resolutions.setdefault(_normalize_text(ticket.resolution), len(resolutions))
+        key = (_normalize_text(ticket.query), int(resolution_ids[i]))
+        if key in first_seen:
+            _union(parent, i, first_seen[key])
+        else:
+            first_seen[key] = i
+            representatives.append(i)
+    exact_duplicates = n - len(representatives)
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    unit = vectors / norms
+
+    near_duplicates = 0
+    m = len(representatives)
+    if threshold <= 1.0 and m > 1:
+        rows = np.asarray(representatives)
+        rep_unit = unit[rows]
+        rep_resolutions = resolution_ids[rows]
+        for start in range(0, m, block_size):
+            stop = min(start + block_size, m)
+            # Each row block is compared with itself and every later column
+            # block, one block_size x block_size tile at a time, so every
+            # pair is scored exactly once
+            for col_start in range(start, m, block_size):
+                col_stop = min(col_start + block_size, m)
+                sims = rep_unit[start:stop] @ rep_unit[col_start:col_stop].T
+                mask = sims >= threshold
+                mask &= rep_resolutions[start:stop, None] == rep_resolutions[None, col_start:col_stop]
+                if col_start == start:
+                    mask &= np.triu(np.ones(mask.shape, dtype=bool), k=1)
+                for a, b in zip(*np.nonzero(mask)):
+                    if _find(parent, rows[start + a]) != _find(parent, rows[col_start + b]):
+                        _union(parent, rows[start + a], rows[col_start + b])
+                        near_duplicates += 1
+
+    groups: dict[int, list[int]] = {}
+    for i in range(n):
+        groups.setdefault(_find(parent, i), []).append(i)
+
+    canonical_tickets, canonical_embeddings = [], []
+    for members in sorted(groups.values(), key=lambda g: g[0]):
+        if len(members) == 1:
+            keep = members[0]
+            canonical_tickets.append(tickets[keep])
+        else:
+            centroid = unit[members].mean(axis=0)
+            keep = members[int(np.argmax(unit[members] @ centroid))]
+            aliases = list(tickets[keep].aliases)
+            for i in members:
+                if i != keep:
+                    aliases.append(tickets[i].id)
+                    aliases.extend(tickets[i].aliases)
+            canonical_tickets.append(tickets[keep].model_copy(update={"aliases": aliases}))
+        canonical_embeddings.append(vectors[keep].tolist())
+
+    return DedupResult(canonical_tickets, canonical_embeddings, input_count, exact_duplicates, near_duplicates)
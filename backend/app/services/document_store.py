@@ -0,0 +1,195 @@
+"""Document Store - Compact append-only storage for ticket text outside the vector index"""
+
+import json
+import mmap
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Optional
+
+from app.config import get_settings
+
+
+class DocumentStore:
+    """
+    Append-only, memory-mapped store of ticket text for one collection.
+
+    Records live in `<name>.dat` as UTF-8 JSON blobs written back to back.
+    `<name>.idx` holds one `offset<TAB>length<TAB>ticket_id` line per
+    record. Nothing is read until the first lookup; then the index is
+    loaded into a dict and the data file is memory-mapped, so a lookup is
+    a dict hit plus a slice of the map. A later record for the same
+    ticket id replaces the earlier one.
+    """
+
+    def __init__(self, path_prefix: Path):
+        self.data_path = path_prefix.parent / f"{path_prefix.name}.dat"
+        self.index_path = path_prefix.parent / f"{path_prefix.name}.idx"
+        self.categories_path = path_prefix.parent / f"{path_prefix.name}.categories.json"
+        self._offsets: Optional[dict[str, tuple[int, int]]] = None
+        self._map: Optional[mmap.mmap] = None
+        self._mapped_size = 0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """Load the offset index on first use"""
+        offsets: dict[str, tuple[int, int]] = {}
+        if self.index_path.exists():
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t", 2)
+                    if len(parts) == 3:
+                        offsets[parts[2]] = (int(parts[0]), int(parts[1]))
+        self._offsets = offsets
+
+    def _remap(self):
+        """(Re)map the data file after it has grown"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._mapped_size = 0
+        if self.data_path.exists() and self.data_path.stat().st_size > 0:
+            with open(self.data_path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_size = len(self._map)
+
+    def append(self, records: list[dict]) -> int:
+        """
+        Append ticket records ({"id", "query", "resolution", ...}).
+
+        Returns:
+            Number of records written
+        """
+        if not records:
+            return 0
+
+        self.data_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            if self._offsets is None:
+                self._load()
+
+            index_lines = []
+            with open(self.data_path, "ab") as data_file:
+                offset = data_file.tell()
+                for record in records:
+                    blob = json.dumps(record, ensure_ascii=False).encode("utf-8")
+                    data_file.write(blob)
+                    self._offsets[str(record["id"])] = (offset, len(blob))
+                    index_lines.append(f"{offset}\t{len(blob)}\t{record['id']}\n")
+                    offset += len(blob)
+
+            # Index is written after the data so readers never see dangling offsets
+            with open(self.index_path, "a", encoding="utf-8") as index_file:
+                index_file.writelines(index_lines)
+
+        return len(records)
+
+    def get_many(self, ticket_ids: list[str]) -> dict[str, dict]:
+        """Fetch records by ticket id; unknown ids are omitted"""
+        with self._lock:
+            if self._offsets is None:
+                self._load()
+
+            found = {}
+            for ticket_id in ticket_ids:
+                location = self._offsets.get(ticket_id)
+                if location is None:
+                    continue
+                offset, length = location
+                if offset + length > self._mapped_size:
+                    self._remap()
+                    if offset + length > self._mapped_size:
+                        continue
+                found[ticket_id] = json.loads(self._map[offset:offset + length])
+            return found
+
+    def get(self, ticket_id: str) -> Optional[dict]:
+        """Fetch one record by ticket id"""
+        return self.get_many([ticket_id]).get(ticket_id)
+
+    def count(self) -> int:
+        """Number of distinct ticket ids stored"""
+        with self._lock:
+            if self._offsets is None:
+                self._load()
+            return len(self._offsets)
+
+    def read_category_counts(self) -> Optional[dict[str, int]]:
+        """Ticket counts per category recorded at index time, if any"""
+        try:
+            with open(self.categories_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def write_category_counts(self, counts: dict[str, int]):
+        """Record ticket counts per category"""
+        self.categories_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.categories_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(counts, f, sort_keys=True)
+        os.replace(tmp_path, self.categories_path)
+
+    def size_bytes(self) -> int:
+        """On-disk size of the data and index files"""
+        return sum(p.stat().st_size for p in (self.data_path, self.index_path) if p.exists())
+
+    def close(self):
+        """Release the memory map and forget the loaded index"""
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+            self._map = None
+            self._mapped_size = 0
+            self._offsets = None
+
+    def clear(self):
+        """Delete all records"""
+        self.close()
+        with self._lock:
+            for path in (self.data_path, self.index_path, self.categories_path):
+                if path.exists():
+                    path.unlink()
+
+
+class DocumentStoreService:
+    """Registry of per-collection document stores"""
+
+    _instance: Optional["DocumentStoreService"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        settings = get_settings()
+        self.root = Path(settings.document_store_path)
+        os.makedirs(self.root, exist_ok=True)
+        self._stores: dict[str, DocumentStore] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "DocumentStoreService":
+        """Get singleton instance of DocumentStoreService"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def get_store(self, collection_name: str) -> DocumentStore:
+        """Get the document store for a collection"""
+        with self._lock:
+            if collection_name not in self._stores:
+                safe_name = re.sub(r"[^A-Za-z0-9._-]", "_", collection_name)
+                self._stores[collection_name] = DocumentStore(self.root / safe_name)
+            return self._stores[collection_name]
+
+    def reset(self):
+        """Close all stores so their indexes are re-read on next access"""
+        with self._lock:
+            stores = list(self._stores.values())
+        for store in stores:
+            store.close()
+
+    def clear_store(self, collection_name: str):
+        """Delete all records of a collection"""
+        self.get_store(collection_name).clear()
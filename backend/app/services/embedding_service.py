@@ -1,66 +1,186 @@
 """OpenAI Embedding Service"""
 
-from openai import OpenAI
+import threading
+from collections import OrderedDict
 from typing import Optional
 
 from app.config import get_settings
+from app.services.deadline import Deadline
+from app.services.openai_client import OpenAIClientService
+from app.services.rate_limiter import BACKGROUND, INTERACTIVE
+
+# Output width of the embedding models when no `dimensions` is requested
+NATIVE_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
 
 
 class EmbeddingService:
-    """Service for generating embeddings using OpenAI"""
+    """
+    Service for generating embeddings using OpenAI.
+    
+    Single-text (query) embeddings are kept in an LRU cache, so repeated
+    and pre-warmed questions skip the API call.
+    """
     
     _instance: Optional["EmbeddingService"] = None
+    _instance_lock = threading.Lock()
     
     def __init__(self):
         settings = get_settings()
-        self.client = OpenAI(api_key=settings.openai_api_key)
+        self.client = OpenAIClientService.get_instance()
         self.model = settings.embedding_model
+        self.batch_size = settings.embedding_batch_size
+        
+        self.cache_size = settings.query_embedding_cache_size
+        self._cache: OrderedDict[tuple[str, Optional[int]], list[float]] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
     
     @classmethod
     def get_instance(cls) -> "EmbeddingService":
         """Get singleton instance of EmbeddingService"""
         if cls._instance is None:
-            cls._instance = cls()
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
         return cls._instance
     
-    def embed_text(self, text: str) -> list[float]:
+    def output_dimensions(self, dimensions: Optional[int] = None) -> Optional[int]:
+        """Width of the vectors embed_text returns (None for an unknown model at full width)"""
+        return dimensions or NATIVE_DIMENSIONS.get(self.model)
+    
+    def _dimension_kwargs(self, dimensions: Optional[int]) -> dict:
+        """Request shortened embeddings only when a dimension is set"""
+        return {"dimensions": dimensions} if dimensions else {}
+    
+    def embed_text(
+        self,
+        text: str,
+        dimensions: Optional[int] = None,
+        priority: str = INTERACTIVE,
+        deadline: Optional[Deadline] = None
+    ) -> list[float]:
         """
         Generate embedding for a single text.
         
         Args:
             text: Text to embed
+            dimensions: Optional reduced output dimension
+            priority: Rate-limit priority ("interactive" or "background")
+            deadline: Latency budget of the request the embedding is for
             
         Returns:
             Embedding vector
         """
-        response = self.client.embeddings.create(
+        cached = self._cache_get((text, dimensions))
+        if cached is not None:
+            return cached
+        
+        response = self.client.create_embeddings(
             model=self.model,
-            input=text
+            input=text,
+            priority=priority,
+            deadline=deadline,
+            **self._dimension_kwargs(dimensions)
         )
-        return response.data[0].embedding
+        embedding = response.data[0].embedding
+        self._cache_put((text, dimensions), embedding)
+        return embedding
     
-    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+    def prime(
+        self,
+        texts: list[str],
+        dimensions: Optional[int] = None,
+        priority: str = BACKGROUND
+    ) -> list[list[float]]:
+        """
+        Load texts into the query cache ahead of time.
+        
+        Uncached texts are embedded in bulk; cache hit counters are left
+        untouched.
+        
+        Returns:
+            Embeddings for texts, row for row
+        """
+        with self._cache_lock:
+            found = {t: self._cache[(t, dimensions)] for t in texts if (t, dimensions) in self._cache}
+        missing = [t for t in dict.fromkeys(texts) if t not in found]
+        for text, embedding in zip(missing, self.embed_texts(missing, dimensions, priority)):
+            self._cache_put((text, dimensions), embedding)
+            found[text] = embedding
+        return [found[t] for t in texts]
+    
+    def _cache_get(self, key: tuple[str, Optional[int]]) -> Optional[list[float]]:
+        if self.cache_size <= 0:
+            return None
+        with self._cache_lock:
+            embedding = self._cache.get(key)
+            if embedding is None:
+                self._cache_misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self._cache_hits += 1
+            return embedding
+    
+    def _cache_put(self, key: tuple[str, Optional[int]], embedding: list[float]):
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[key] = embedding
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+    
+    def get_cache_stats(self) -> dict:
+        """Query embedding cache size, hit counts and approximate memory"""
+        with self._cache_lock:
+            floats = sum(len(embedding) for embedding in self._cache.values())
+            return {
+                "size": len(self._cache),
+                "max_size": self.cache_size,
+                "hits": self._cache_hits,
+                "misses": self._cache_misses,
+                # A list slot plus a boxed float per component
+                "estimated_bytes": floats * 32,
+            }
+    
+    def embed_texts(
+        self,
+        texts: list[str],
+        dimensions: Optional[int] = None,
+        priority: str = INTERACTIVE
+    ) -> list[list[float]]:
         """
         Generate embeddings for multiple texts.
         
+        Texts are sent in batches of `embedding_batch_size`, so bulk work
+        takes rate-limit budget in small steps instead of one large request.
+        
         Args:
             texts: List of texts to embed
+            dimensions: Optional reduced output dimension
+            priority: Rate-limit priority ("interactive" or "background")
             
         Returns:
             List of embedding vectors
         """
-        if not texts:
-            return []
-        
-        # OpenAI API supports batch embedding
-        response = self.client.embeddings.create(
-            model=self.model,
-            input=texts
-        )
-        
-        # Sort by index to maintain order
-        embeddings = sorted(response.data, key=lambda x: x.index)
-        return [e.embedding for e in embeddings]
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            response = self.client.create_embeddings(
+                model=self.model,
+                input=texts[start:start + self.batch_size],
+                priority=priority,
+                **self._dimension_kwargs(dimensions)
+            )
+            
+            # Sort by index to maintain order
+            embeddings = sorted(response.data, key=lambda x: x.index)
+            vectors.extend(e.embedding for e in embeddings)
+        return vectors
 
 
 # Dependency injection helper
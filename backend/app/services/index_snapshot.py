@@ -0,0 +1,170 @@
+"""Index Snapshots - Portable, versioned exports of an indexed collection"""
+
+import hashlib
+import io
+import json
+import os
+import time
+import zipfile
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from app.models.schemas import SupportTicket
+
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_SUFFIX = ".snapshot.zip"
+
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+RECORDS_FILE = "records.jsonl"
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is unreadable or fails its checksums"""
+
+
+@dataclass
+class IndexSnapshot:
+    """A collection's tickets and their embeddings, row for row"""
+    manifest: dict
+    tickets: list[SupportTicket]
+    embeddings: np.ndarray
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_sha256(path: Path) -> str:
+    """Checksum of a data source file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def snapshot_path(root: Path, agent_id: str) -> Path:
+    """Where an agent's snapshot is stored"""
+    return root / f"{agent_id}{SNAPSHOT_SUFFIX}"
+
+
+def write_snapshot(
+    path: Path,
+    tickets: list[SupportTicket],
+    embeddings: list[list[float]],
+    collection_name: str,
+    embedding_model: str,
+    requested_dimensions: Optional[int],
+    source_file: str,
+    source_sha256: str
+) -> dict:
+    """
+    Write a snapshot archive.
+
+    The archive holds `vectors.npy` (float32, one row per ticket),
+    `records.jsonl` (one ticket per line, same order) and `manifest.json`
+    describing both, including the embedding model, the source file's
+    checksum and a checksum of each member.
+
+    Returns:
+        The manifest
+    """
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    if vectors.ndim != 2 or len(vectors) != len(tickets):
+        raise ValueError("Expected one embedding per ticket")
+
+    buffer = io.BytesIO()
+    np.save(buffer, vectors)
+    vectors_bytes = buffer.getvalue()
+    records_bytes = "".join(
+        json.dumps(t.model_dump(), ensure_ascii=False) + "\n" for t in tickets
+    ).encode("utf-8")
+
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "collection_name": collection_name,
+        "embedding_model": embedding_model,
+        "requested_dimensions": requested_dimensions,
+        "dimension": int(vectors.shape[1]),
+        "count": len(tickets),
+        "source_file": source_file,
+        "source_sha256": source_sha256,
+        "vectors_sha256": sha256_bytes(vectors_bytes),
+        "records_sha256": sha256_bytes(records_bytes),
+        "created_at": time.time(),
+    }
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(MANIFEST_FILE, json.dumps(manifest, indent=2))
+        archive.writestr(VECTORS_FILE, vectors_bytes)
+        archive.writestr(RECORDS_FILE, records_bytes)
+    os.replace(tmp_path, path)
+    return manifest
+
+
+def read_manifest(path: Path) -> dict:
+    """Read only the manifest of a snapshot"""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            return json.loads(archive.read(MANIFEST_FILE))
+    except (OSError, KeyError, zipfile.BadZipFile, zlib.error, json.JSONDecodeError) as e:
+        raise SnapshotError(f"Unreadable snapshot {path}: {e}")
+
+
+def read_snapshot(path: Path) -> IndexSnapshot:
+    """
+    Read and verify a snapshot.
+
+    Raises:
+        SnapshotError: If the archive is unreadable, of an unknown format
+            version, or a member does not match its checksum
+    """
+    try:
+        with zipfile.ZipFile(path) as archive:
+            manifest = json.loads(archive.read(MANIFEST_FILE))
+            vectors_bytes = archive.read(VECTORS_FILE)
+            records_bytes = archive.read(RECORDS_FILE)
+    except (OSError, KeyError, zipfile.BadZipFile, zlib.error, json.JSONDecodeError) as e:
+        raise SnapshotError(f"Unreadable snapshot {path}: {e}")
+
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot format {manifest.get('format_version')} in {path}")
+    if sha256_bytes(vectors_bytes) != manifest.get("vectors_sha256"):
+        raise SnapshotError(f"Vector checksum mismatch in {path}")
+    if sha256_bytes(records_bytes) != manifest.get("records_sha256"):
+        raise SnapshotError(f"Record checksum mismatch in {path}")
+
+    vectors = np.load(io.BytesIO(vectors_bytes), allow_pickle=False)
+    tickets = [
+        SupportTicket(**json.loads(line))
+        for line in records_bytes.decode("utf-8").splitlines() if line
+    ]
+    if len(tickets) != len(vectors) or len(tickets) != manifest.get("count"):
+        raise SnapshotError(f"Row count mismatch in {path}")
+
+    return IndexSnapshot(manifest=manifest, tickets=tickets, embeddings=vectors)
+
+
+def stale_reason(
+    manifest: dict,
+    embedding_model: str,
+    requested_dimensions: Optional[int],
+    source_sha256: str
+) -> Optional[str]:
+    """Why a snapshot cannot stand in for re-embedding the source, or None if it can"""
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        return f"format version {manifest.get('format_version')}"
+    if manifest.get("embedding_model") != embedding_model:
+        return f"embedding model {manifest.get('embedding_model')} != {embedding_model}"
+    if manifest.get("requested_dimensions") != requested_dimensions:
+        return f"dimensions {manifest.get('requested_dimensions')} != {requested_dimensions}"
+    if manifest.get("source_sha256") != source_sha256:
+        return "data source changed"
+    return None
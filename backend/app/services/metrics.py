@@ -0,0 +1,146 @@
+"""Metrics Registry - In-process counters and gauges with Prometheus text export"""
+
+import threading
+from typing import Callable, Optional
+
+
+# A collector returns (metric_name, labels, value) samples computed on scrape
+Collector = Callable[[], list[tuple[str, dict, float]]]
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: tuple) -> str:
+    if not key:
+        return ""
+    inner = ",".join(f'{k}="{v}"' for k, v in key)
+    return "{" + inner + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe registry of counters, gauges and summaries"""
+
+    _instance: Optional["MetricsRegistry"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[tuple, float]] = {}
+        self._gauges: dict[str, dict[tuple, float]] = {}
+        self._summaries: dict[str, dict[tuple, list[float]]] = {}
+        self._help: dict[str, str] = {}
+        self._collectors: list[Collector] = []
+
+    @classmethod
+    def get_instance(cls) -> "MetricsRegistry":
+        """Get singleton instance of MetricsRegistry"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def describe(self, name: str, help_text: str):
+        """Attach a help string to a metric"""
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        """Increment a counter"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        """Set a gauge to a value"""
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record an observation in a summary (count and sum)"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._summaries.setdefault(name, {})
+            count_sum = series.setdefault(key, [0.0, 0.0])
+            count_sum[0] += 1
+            count_sum[1] += value
+
+    def register_collector(self, collector: Collector):
+        """Register a callback producing gauge samples at scrape time"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def _collected(self) -> dict[str, dict[tuple, float]]:
+        with self._lock:
+            collectors = list(self._collectors)
+        collected: dict[str, dict[tuple, float]] = {}
+        for collector in collectors:
+            for name, labels, value in collector():
+                collected.setdefault(name, {})[_label_key(labels)] = value
+        return collected
+
+    def _gather(self) -> tuple[dict, dict, dict]:
+        """Copy counters, gauges (including collected ones) and summaries"""
+        collected = self._collected()
+        with self._lock:
+            counters = {n: dict(s) for n, s in self._counters.items()}
+            gauges = {n: dict(s) for n, s in self._gauges.items()}
+            summaries = {n: {k: list(v) for k, v in s.items()} for n, s in self._summaries.items()}
+        for name, series in collected.items():
+            gauges.setdefault(name, {}).update(series)
+        return counters, gauges, summaries
+
+    def get_counter(self, name: str, **labels) -> float:
+        """Read the current value of a counter"""
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0.0)
+
+    def snapshot(self) -> dict:
+        """All metrics as a JSON-friendly dict"""
+        counters, gauges, summaries = self._gather()
+
+        def as_list(series: dict) -> list[dict]:
+            return [{"labels": dict(k), "value": v} for k, v in series.items()]
+
+        return {
+            "counters": {n: as_list(s) for n, s in counters.items()},
+            "gauges": {n: as_list(s) for n, s in gauges.items()},
+            "summaries": {
+                n: [{"labels": dict(k), "count": c, "sum": round(total, 6)} for k, (c, total) in s.items()]
+                for n, s in summaries.items()
+            },
+        }
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        counters, gauges, summaries = self._gather()
+        lines: list[str] = []
+
+        def header(name: str, kind: str):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for name in sorted(counters):
+            header(name, "counter")
+            for key, value in counters[name].items():
+                lines.append(f"{name}{_format_labels(key)} {value}")
+        for name in sorted(gauges):
+            header(name, "gauge")
+            for key, value in gauges[name].items():
+                lines.append(f"{name}{_format_labels(key)} {value}")
+        for name in sorted(summaries):
+            header(name, "summary")
+            for key, (count, total) in summaries[name].items():
+                lines.append(f"{name}_count{_format_labels(key)} {count}")
+                lines.append(f"{name}_sum{_format_labels(key)} {total}")
+
+        return "\n".join(lines) + "\n"
+
+
+def get_metrics() -> MetricsRegistry:
+    """FastAPI dependency for the metrics registry"""
+    return MetricsRegistry.get_instance()
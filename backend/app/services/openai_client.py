@@ -0,0 +1,399 @@
+"""Shared OpenAI Client - Pooled connections, retries and circuit breaking"""
+
+import logging
+import random
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from app.config import get_settings
+from app.services.context_builder import estimate_tokens
+from app.services.deadline import Deadline, DeadlineExceededError
+from app.services.rate_limiter import INTERACTIVE, RateLimiter
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import OpenAI
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker is open and calls fail fast"""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"OpenAI circuit is open. Retry after {retry_after:.1f}s")
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker.
+
+    Opens after `failure_threshold` consecutive failures, rejects calls for
+    `recovery_timeout` seconds, then lets a single probe call through
+    (half-open). A successful probe closes the circuit again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, recovery_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._times_opened = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current breaker state"""
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def before_call(self):
+        """Check whether a call may proceed. Raises CircuitOpenError if not."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            retry_after = max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+            raise CircuitOpenError(retry_after)
+
+    def record_success(self):
+        """Record a successful call"""
+        with self._lock:
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            self._state = self.CLOSED
+
+    def record_failure(self):
+        """Record a failed call, opening the circuit if the threshold is hit"""
+        with self._lock:
+            self._consecutive_failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._times_opened += 1
+                    logger.warning(
+                        f"OpenAI circuit opened after {self._consecutive_failures} consecutive failures"
+                    )
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def get_stats(self) -> dict:
+        """Breaker state for monitoring"""
+        with self._lock:
+            state = self._current_state()
+            return {
+                "state": state,
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout_seconds": self.recovery_timeout,
+                "times_opened": self._times_opened,
+                "seconds_until_half_open": (
+                    round(max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at)), 2)
+                    if state == self.OPEN else 0.0
+                ),
+            }
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Whether an OpenAI error is worth retrying (429, 5xx, network, timeout)"""
+    import openai
+
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read a Retry-After hint from an OpenAI error response, if present"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class OpenAIClientService:
+    """
+    Shared OpenAI client used by all services.
+
+    Holds one keep-alive HTTP connection pool, applies per-call timeouts,
+    retries 429/5xx/network errors with jittered exponential backoff and
+    isolates failures with a circuit breaker. Every attempt first takes
+    budget from the shared rate limiter at the caller's priority. Calls
+    made under a request Deadline shorten their timeout to the time left
+    and give up instead of retrying once it is spent.
+    """
+
+    _instance: Optional["OpenAIClientService"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        settings = get_settings()
+        self.settings = settings
+
+        # The SDK and its connection pool are created on first use (see `client`)
+        self._http_client: Optional["httpx.Client"] = None
+        self._client: Optional["OpenAI"] = None
+        self._client_lock = threading.Lock()
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.circuit_breaker_failure_threshold,
+            recovery_timeout=settings.circuit_breaker_recovery_seconds,
+        )
+        self.rate_limiter = RateLimiter.get_instance()
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {
+            "calls": 0,
+            "retries": 0,
+            "failures": 0,
+            "rejected_by_breaker": 0,
+        }
+
+    @classmethod
+    def get_instance(cls) -> "OpenAIClientService":
+        """Get singleton instance of OpenAIClientService"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @property
+    def client(self) -> "OpenAI":
+        """The OpenAI SDK client, imported and connected on first use"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    import httpx
+                    from openai import OpenAI
+
+                    settings = self.settings
+                    self._http_client = httpx.Client(
+                        limits=httpx.Limits(
+                            max_connections=settings.openai_max_connections,
+                            max_keepalive_connections=settings.openai_max_keepalive_connections,
+                            keepalive_expiry=settings.openai_keepalive_expiry,
+                        ),
+                        timeout=httpx.Timeout(
+                            settings.openai_chat_timeout,
+                            connect=settings.openai_connect_timeout,
+                        ),
+                    )
+                    # Retries are handled here so that the breaker sees every attempt
+                    self._client = OpenAI(
+                        api_key=settings.openai_api_key,
+                        http_client=self._http_client,
+                        max_retries=0,
+                    )
+        return self._client
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After when given"""
+        hinted = _retry_after_seconds(error)
+        if hinted is not None:
+            return min(hinted, self.settings.openai_backoff_max)
+        ceiling = min(self.settings.openai_backoff_max, self.settings.openai_backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def _call(
+        self,
+        operation: Callable[..., Any],
+        timeout: float,
+        budget: str,
+        tokens: int,
+        priority: str,
+        deadline: Optional[Deadline] = None,
+        **kwargs
+    ) -> Any:
+        """Run an OpenAI operation through the breaker and rate limiter with retries"""
+        max_retries = self.settings.openai_max_retries
+        attempt = 0
+
+        while True:
+            # Budget is taken before the breaker check so that a half-open
+            # probe is never left waiting on the rate limiter
+            reservation = self.rate_limiter.acquire(budget, tokens, priority, deadline)
+            if deadline is not None and deadline.expired:
+                self.rate_limiter.refund(reservation)
+                raise DeadlineExceededError(budget, deadline.budget_seconds)
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError:
+                self.rate_limiter.refund(reservation)
+                with self._lock:
+                    self._stats["rejected_by_breaker"] += 1
+                raise
+
+            with self._lock:
+                self._stats["calls"] += 1
+                self._in_flight += 1
+            try:
+                result = operation(
+                    timeout=deadline.cap(timeout) if deadline is not None else timeout,
+                    **kwargs
+                )
+            except Exception as e:
+                retryable = _is_retryable(e)
+                if retryable:
+                    self.breaker.record_failure()
+                else:
+                    # Client errors (4xx) say nothing about upstream health
+                    self.breaker.record_success()
+
+                if not retryable or attempt >= max_retries:
+                    with self._lock:
+                        self._stats["failures"] += 1
+                    raise
+
+                delay = self._backoff(attempt, e)
+                if deadline is not None and delay >= deadline.remaining():
+                    with self._lock:
+                        self._stats["failures"] += 1
+                    raise DeadlineExceededError(f"{budget} retry", deadline.budget_seconds) from e
+                attempt += 1
+                with self._lock:
+                    self._stats["retries"] += 1
+                logger.warning(
+                    f"OpenAI call failed ({type(e).__name__}), retry {attempt}/{max_retries} in {delay:.2f}s"
+                )
+                time.sleep(delay)
+                continue
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+
+            self.breaker.record_success()
+            usage = getattr(result, "usage", None)
+            self.rate_limiter.settle(reservation, getattr(usage, "total_tokens", None))
+            return result
+
+    def create_embeddings(
+        self,
+        timeout: Optional[float] = None,
+        priority: str = INTERACTIVE,
+        deadline: Optional[Deadline] = None,
+        **kwargs
+    ):
+        """Create embeddings with the shared client"""
+        texts = kwargs.get("input") or []
+        texts = [texts] if isinstance(texts, str) else texts
+        return self._call(
+            self.client.embeddings.create,
+            timeout=timeout or self.settings.openai_embedding_timeout,
+            budget="embeddings",
+            tokens=sum(estimate_tokens(t) for t in texts),
+            priority=priority,
+            deadline=deadline,
+            **kwargs
+        )
+
+    def create_chat_completion(
+        self,
+        timeout: Optional[float] = None,
+        priority: str = INTERACTIVE,
+        deadline: Optional[Deadline] = None,
+        **kwargs
+    ):
+        """Create a chat completion with the shared client"""
+        prompt = sum(estimate_tokens(m.get("content") or "") for m in kwargs.get("messages", []))
+        return self._call(
+            self.client.chat.completions.create,
+            timeout=timeout or self.settings.openai_chat_timeout,
+            budget="chat",
+            tokens=prompt + (kwargs.get("max_tokens") or 0),
+            priority=priority,
+            deadline=deadline,
+            **kwargs
+        )
+
+    def warm_up(self, models: list[str], connections: int = 1) -> dict[str, float]:
+        """
+        Open pooled connections ahead of the first real call.
+
+        Sends `connections` concurrent model lookups (cheap GETs that use no
+        rate-limit budget) for each model, so TLS handshakes and the
+        keep-alive pool are set up before traffic arrives.
+
+        Returns:
+            Seconds taken per model
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        timings = {}
+        timeout = self.settings.openai_connect_timeout + self.settings.openai_embedding_timeout
+        with ThreadPoolExecutor(max_workers=max(1, connections)) as pool:
+            for model in dict.fromkeys(models):
+                started = time.perf_counter()
+                futures = [
+                    pool.submit(self.client.models.retrieve, model, timeout=timeout)
+                    for _ in range(max(1, connections))
+                ]
+                for future in futures:
+                    future.result()
+                timings[model] = round(time.perf_counter() - started, 3)
+        return timings
+
+    def _pool_stats(self) -> dict:
+        """Inspect the underlying connection pool (best effort)"""
+        pool = getattr(getattr(self._http_client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is None:
+            return {}
+        idle = sum(1 for c in connections if c.is_idle())
+        return {
+            "open_connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle,
+        }
+
+    def get_stats(self) -> dict:
+        """Pool, breaker and call statistics for monitoring"""
+        with self._lock:
+            stats = dict(self._stats)
+            in_flight = self._in_flight
+
+        return {
+            "pool": {
+                "max_connections": self.settings.openai_max_connections,
+                "max_keepalive_connections": self.settings.openai_max_keepalive_connections,
+                "keepalive_expiry_seconds": self.settings.openai_keepalive_expiry,
+                "in_flight_requests": in_flight,
+                **self._pool_stats(),
+            },
+            "breaker": self.breaker.get_stats(),
+            "calls": stats,
+        }
+
+    def close(self):
+        """Close the pooled HTTP connections"""
+        if self._http_client is not None:
+            self._http_client.close()
+
+
+# Dependency injection helper
+def get_openai_client() -> OpenAIClientService:
+    """FastAPI dependency for the shared OpenAI client"""
+    return OpenAIClientService.get_instance()
@@ -0,0 +1,242 @@
+"""Quantized Index - Compact in-memory vectors with full-precision re-scoring"""
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+PRECISIONS = ("float16", "int8")
+
+# Rows widened to float32 at a time while scoring
+SCORE_BLOCK_ROWS = 4096
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so dot products are cosine similarities"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def quantize(vectors: np.ndarray, precision: str) -> tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Quantize normalized vectors.
+
+    float16 is a plain cast. int8 uses symmetric per-vector scalar
+    quantization: each row is scaled so its largest component maps to 127,
+    and the scale is kept to undo it when scoring.
+
+    Returns:
+        (codes, scales) where scales is None for float16
+    """
+    if precision == "float16":
+        return vectors.astype(np.float16), None
+    if precision == "int8":
+        max_abs = np.abs(vectors).max(axis=1)
+        max_abs[max_abs == 0] = 1.0
+        scales = (max_abs / 127.0).astype(np.float32)
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales
+    raise ValueError(f"Unsupported precision '{precision}'. Expected one of {PRECISIONS}")
+
+
+def approximate_scores(
+    codes: np.ndarray,
+    scales: Optional[np.ndarray],
+    query: np.ndarray
+) -> np.ndarray:
+    """
+    Cosine scores of a normalized query against quantized rows.
+
+    Rows are widened to float32 in fixed-size blocks so BLAS does the
+    products while peak extra memory stays bounded.
+    """
+    scores = np.empty(codes.shape[0], dtype=np.float32)
+    for start in range(0, codes.shape[0], SCORE_BLOCK_ROWS):
+        block = codes[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+        scores[start:start + SCORE_BLOCK_ROWS] = block @ query
+    if scales is not None:
+        scores *= scales
+    return scores
+
+
+def category_order(categories: list[Optional[str]]) -> list[int]:
+    """Row order that groups rows of the same category together (stable)"""
+    return sorted(range(len(categories)), key=lambda i: categories[i] or "")
+
+
+def category_segments(categories: list[Optional[str]]) -> dict[Optional[str], list[slice]]:
+    """Contiguous runs of rows per category"""
+    segments: dict[Optional[str], list[slice]] = {}
+    start = 0
+    for i in range(1, len(categories) + 1):
+        if i == len(categories) or categories[i] != categories[start]:
+            segments.setdefault(categories[start], []).append(slice(start, i))
+            start = i
+    return segments
+
+
+class QuantizedIndex:
+    """
+    Brute-force index over quantized vectors for one collection.
+
+    The quantized codes are held in memory and scanned for every query.
+    The best `rescore_k` rows are then re-scored against full-precision
+    vectors that stay on disk in a memory-mapped .npy file, so only the
+    rows that are actually re-scored are paged in.
+
+    Rows are stored grouped by category, so each category is a contiguous
+    sub-index and a category-filtered search scans only its own rows.
+    """
+
+    def __init__(
+        self,
+        ids: list[str],
+        categories: list[Optional[str]],
+        codes: np.ndarray,
+        scales: Optional[np.ndarray],
+        full: np.ndarray,
+        precision: str
+    ):
+        self.ids = ids
+        self.categories = categories
+        self.codes = codes
+        self.scales = scales
+        self.full = full
+        self.precision = precision
+        self.segments = category_segments(categories)
+
+    @property
+    def dimension(self) -> int:
+        return int(self.codes.shape[1]) if self.codes.ndim == 2 else 0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_embeddings(
+        cls,
+        ids: list[str],
+        categories: list[Optional[str]],
+        embeddings: list[list[float]],
+        precision: str
+    ) -> "QuantizedIndex":
+        """Quantize embeddings into an in-memory index without persisting it"""
+        order = category_order(categories)
+        full = normalize(np.asarray(embeddings, dtype=np.float32))[order]
+        codes, scales = quantize(full, precision)
+        return cls([ids[i] for i in order], [categories[i] for i in order], codes, scales, full, precision)
+
+    @classmethod
+    def build(
+        cls,
+        directory: Path,
+        ids: list[str],
+        categories: list[Optional[str]],
+        embeddings: list[list[float]],
+        precision: str
+    ) -> "QuantizedIndex":
+        """Quantize embeddings, persist them under `directory` and open the result"""
+        order = category_order(categories)
+        ids = [ids[i] for i in order]
+        categories = [categories[i] for i in order]
+        full = normalize(np.asarray(embeddings, dtype=np.float32))[order]
+        codes, scales = quantize(full, precision)
+
+        os.makedirs(directory, exist_ok=True)
+        np.save(directory / "full.npy", full)
+        np.save(directory / "codes.npy", codes)
+        if scales is not None:
+            np.save(directory / "scales.npy", scales)
+        elif (directory / "scales.npy").exists():
+            (directory / "scales.npy").unlink()
+        with open(directory / "meta.json", "w", encoding="utf-8") as f:
+            json.dump({"precision": precision, "ids": ids, "categories": categories}, f)
+
+        return cls.load(directory)
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional["QuantizedIndex"]:
+        """Open a persisted index, or return None if it does not exist"""
+        meta_path = directory / "meta.json"
+        if not meta_path.exists():
+            return None
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        scales_path = directory / "scales.npy"
+        return cls(
+            ids=meta["ids"],
+            categories=meta["categories"],
+            codes=np.load(directory / "codes.npy"),
+            scales=np.load(scales_path) if scales_path.exists() else None,
+            full=np.load(directory / "full.npy", mmap_mode="r"),
+            precision=meta["precision"]
+        )
+
+    def search(
+        self,
+        query_embedding: list[float],
+        k: int,
+        rescore_k: int,
+        categories: Optional[list[str]] = None
+    ) -> list[tuple[int, float]]:
+        """
+        Find the k nearest rows.
+
+        Args:
+            query_embedding: Query vector (any scale)
+            k: Number of results
+            rescore_k: Number of approximate hits re-scored at full precision
+            categories: Only search rows in these categories
+
+        Returns:
+            (row, cosine similarity) pairs, best first
+        """
+        if len(self.ids) == 0 or k <= 0:
+            return []
+
+        query = normalize(np.asarray(query_embedding, dtype=np.float32)[None, :])[0]
+
+        if categories is None:
+            candidates = None
+            approx = approximate_scores(self.codes, self.scales, query)
+        else:
+            segments = [s for c in categories for s in self.segments.get(c, [])]
+            if not segments:
+                return []
+            # Each segment is a view, so only the category's own rows are scanned
+            candidates = np.concatenate([np.arange(s.start, s.stop) for s in segments])
+            approx = np.concatenate([
+                approximate_scores(
+                    self.codes[s],
+                    self.scales[s] if self.scales is not None else None,
+                    query
+                )
+                for s in segments
+            ])
+
+        n = len(approx)
+        shortlist_size = min(n, max(k, rescore_k))
+        if shortlist_size < n:
+            shortlist = np.argpartition(-approx, shortlist_size - 1)[:shortlist_size]
+        else:
+            shortlist = np.arange(n)
+        rows = np.sort(candidates[shortlist] if candidates is not None else shortlist)
+
+        # Sorted row order keeps reads from the memory map sequential
+        exact = np.asarray(self.full[rows], dtype=np.float32) @ query
+        order = np.argsort(-exact)[:k]
+        return [(int(rows[i]), float(exact[i])) for i in order]
+
+    def vectors(self, rows: list[int]) -> list[list[float]]:
+        """Full-precision vectors for the given rows"""
+        return np.asarray(self.full[rows], dtype=np.float32).tolist()
+
+
+def index_directory(root: Path, collection_name: str) -> Path:
+    """Directory holding a collection's quantized index"""
+    return root / re.sub(r"[^A-Za-z0-9._-]", "_", collection_name)
@@ -1,13 +1,29 @@
 """RAG Chain Service - Agent-Aware Retrieval Augmented Generation with Tool Calling Support"""
 
+import asyncio
+import logging
 import re
-from openai import OpenAI
+import threading
+import time
+from dataclasses import dataclass
 from typing import Optional
 
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
 from app.config import get_settings
 from app.models.schemas import ChatResponse, RetrievedContext, AgentConfig, ActionLink
 from app.services.vector_store import VectorStoreService
 from app.services.embedding_service import EmbeddingService
+from app.services.retriever import RetrieverService
+from app.services.openai_client import OpenAIClientService, CircuitOpenError
+from app.services.context_builder import build_context, estimate_tokens
+from app.services.deadline import Deadline, DeadlineExceededError
+from app.services.metrics import MetricsRegistry
+from app.services.rate_limiter import INTERACTIVE
+from app.services.session_store import ChatSession, ChatTurn, SessionStore
+
+logger = logging.getLogger(__name__)
 
 
 # Default system prompt fallback
@@ -36,47 +52,124 @@ USER'S QUESTION: {question}
 Provide a helpful response based on the above tickets. Preserve any [ACTION_LINK:...] patterns exactly as they appear in the resolution. If none of the tickets are relevant to answering this question, respond with exactly "HUMAN_REDIRECT"."""
 
 
+@dataclass
+class Completion:
+    """The LLM answer used for a question, with the model that gave it"""
+    text: str
+    model: str
+    prompt_tokens: int
+    escalated: bool = False
+
+
 # ServiceNow ticket creation link
 SERVICENOW_CREATE_TICKET_URL = "https://bain.service-now.com/sp?id=sc_cat_item&sys_id=create_ticket"
 
+# Lead-in of a degraded answer quoting the top retrieved resolution
+DEGRADED_ANSWER_PREFIX = "Here is how a similar issue was resolved before:"
+
 
 class RAGChainService:
-    """Service for agent-aware RAG-based question answering with tool calling support"""
+    """
+    Service for agent-aware RAG-based question answering with tool calling support.
+    
+    Chat requests run under a latency budget (see Deadline). Every stage
+    is bounded by the time left; if the completion cannot finish in time
+    it is cancelled and the top retrieved resolution (or the ServiceNow
+    fallback) is returned instead, marked as degraded.
+    
+    Agents with a `cascade_model` answer with that faster model first and
+    escalate to their full model only when it is needed (see
+    `_complete_with_cascade`). Latency and tokens per tier, and escalation
+    rates, are kept for `get_llm_stats` and exported as metrics.
+    
+    Questions asked in a session (see SessionStore) are follow-ups: they
+    are retrieved together with the previous question, reuse or extend the
+    session's tickets (see `_retrieve_in_session`) and get the recent
+    turns as history within `session_history_token_budget`.
+    """
     
     _instance: Optional["RAGChainService"] = None
+    _instance_lock = threading.Lock()
     
     def __init__(self):
         settings = get_settings()
-        self.client = OpenAI(api_key=settings.openai_api_key)
+        self.client = OpenAIClientService.get_instance()
         self.model = settings.llm_model
+        self.temperature = settings.llm_temperature
+        self.max_tokens = settings.llm_max_tokens
+        self.cascade_band = (settings.llm_cascade_band_low, settings.llm_cascade_band_high)
         self.similarity_threshold = settings.similarity_threshold
+        self.context_token_budget = settings.context_token_budget
+        self.latency_budget_seconds = settings.chat_latency_budget_seconds
+        self.min_completion_seconds = settings.chat_min_completion_seconds
+        self.history_token_budget = settings.session_history_token_budget
+        self.session_reuse_similarity = settings.session_reuse_similarity
+        self.session_carryover_decay = settings.session_carryover_decay
+        self.session_max_tickets = settings.session_max_tickets
         
         self.vector_store = VectorStoreService.get_instance()
         self.embedding_service = EmbeddingService.get_instance()
+        self.retriever = RetrieverService.get_instance()
+        self.sessions = SessionStore.get_instance()
+        
+        # agent id -> [answers, degraded answers]
+        self._answer_counts: dict[str, list[int]] = {}
+        # (agent id, tier) -> completion stats; agent id -> cascade outcomes
+        self._tier_stats: dict[tuple[str, str], dict] = {}
+        self._cascade_stats: dict[str, dict[str, int]] = {}
+        self._stats_lock = threading.Lock()
+        self.metrics = MetricsRegistry.get_instance()
+        self.metrics.describe("chat_answers_total", "Chat answers by answer path")
+        self.metrics.describe("chat_degraded_total", "Chat answers degraded by the latency budget, by the stage that ran out")
+        self.metrics.describe("chat_degraded_ratio", "Share of chat answers degraded by the latency budget")
+        self.metrics.describe("llm_completion_seconds", "Chat completion latency by agent and cascade tier")
+        self.metrics.describe("llm_tokens_total", "Chat completion tokens by agent, cascade tier and kind")
+        self.metrics.describe("llm_cascade_total", "Cascade outcomes: answered by the fast model, or escalated and why")
+        self.metrics.describe("llm_escalation_ratio", "Share of cascaded questions escalated to the full model")
+        self.metrics.describe("chat_session_retrieval_total", "Retrievals of session questions: new, reused from the session or extended")
+        self.metrics.register_collector(self._collect)
     
     @classmethod
     def get_instance(cls) -> "RAGChainService":
         """Get singleton instance of RAGChainService"""
         if cls._instance is None:
-            cls._instance = cls()
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
         return cls._instance
     
-    def _format_context(self, retrieved: list[RetrievedContext]) -> str:
-        """Format retrieved contexts for the prompt"""
-        if not retrieved:
-            return "No relevant tickets found."
-        
-        context_parts = []
-        for i, ctx in enumerate(retrieved, 1):
-            part = f"""
---- Ticket #{i} (Relevance: {ctx.similarity_score:.0%}) ---
-Category: {ctx.category or 'General'}
-Original Question: {ctx.original_query}
-Resolution: {ctx.resolution}
-"""
-            context_parts.append(part)
-        
-        return "\n".join(context_parts)
+    def start_deadline(
+        self,
+        agent_config: AgentConfig,
+        budget_seconds: Optional[float] = None
+    ) -> Deadline:
+        """Start a request's latency budget: the request override, else the agent's, else the global one"""
+        return Deadline(
+            budget_seconds
+            or agent_config.latency_budget_seconds
+            or self.latency_budget_seconds
+        )
+    
+    def _model_settings(self, agent_config: AgentConfig) -> tuple[str, float, int]:
+        """(model, temperature, max_tokens) of an agent's completions"""
+        return (
+            agent_config.llm_model or self.model,
+            agent_config.temperature if agent_config.temperature is not None else self.temperature,
+            agent_config.max_tokens or self.max_tokens,
+        )
+    
+    def _threshold(self, agent_config: AgentConfig) -> float:
+        """Similarity below which an agent redirects to a human"""
+        if agent_config.similarity_threshold is not None:
+            return agent_config.similarity_threshold
+        return self.similarity_threshold
+    
+    @staticmethod
+    async def _within(deadline: Optional[Deadline], awaitable):
+        """Await a stage, cancelling it with asyncio.TimeoutError when the budget runs out"""
+        if deadline is None:
+            return await awaitable
+        return await asyncio.wait_for(awaitable, timeout=deadline.remaining())
     
     def _parse_action_links(self, text: str) -> dict:
         """
@@ -119,7 +212,8 @@ Resolution: {ctx.resolution}
     def _should_redirect_to_human(
         self, 
         retrieved: list[RetrievedContext],
-        llm_response: str
+        llm_response: str,
+        threshold: float
     ) -> bool:
         """Determine if the query should be redirected to a human agent"""
         
@@ -130,7 +224,7 @@ Resolution: {ctx.resolution}
             return True
         
         best_score = max(ctx.similarity_score for ctx in retrieved)
-        if best_score < self.similarity_threshold:
+        if best_score < threshold:
             return True
         
         return False
@@ -149,10 +243,135 @@ Resolution: {ctx.resolution}
             ]
         }
     
+    def _create_fallback_response(
+        self,
+        question: str,
+        retrieved: Optional[list[RetrievedContext]] = None,
+        prompt_tokens: int = 0,
+        degraded: bool = False
+    ) -> ChatResponse:
+        """Build a human-redirect ChatResponse pointing to ServiceNow"""
+        retrieved = retrieved or []
+        servicenow_response = self._create_servicenow_response(question)
+        return ChatResponse(
+            answer=servicenow_response["processed_text"],
+            requires_human=True,
+            sources=retrieved,
+            confidence=max(ctx.similarity_score for ctx in retrieved) if retrieved else 0.0,
+            action_links=servicenow_response["action_links"],
+            prompt_tokens=prompt_tokens,
+            answer_path="servicenow",
+            degraded=degraded
+        )
+    
+    def _create_degraded_response(
+        self,
+        question: str,
+        agent_config: AgentConfig,
+        retrieved: list[RetrievedContext],
+        stage: str,
+        prompt_tokens: int = 0
+    ) -> ChatResponse:
+        """
+        Answer without the LLM after the latency budget ran out: the most
+        similar resolution as written, with its action links, if it clears
+        the agent's threshold, else the ServiceNow fallback.
+        """
+        logger.warning(f"Agent '{agent_config.id}' latency budget ran out during {stage}, answering degraded")
+        self.metrics.inc("chat_degraded_total", agent=agent_config.id, stage=stage)
+        
+        best = max(retrieved, key=lambda ctx: ctx.similarity_score) if retrieved else None
+        if best is None or best.similarity_score < self._threshold(agent_config):
+            return self._create_fallback_response(question, retrieved, prompt_tokens, degraded=True)
+        
+        parsed_response = self._parse_action_links(best.resolution)
+        return ChatResponse(
+            answer=f"{DEGRADED_ANSWER_PREFIX}\n\n{parsed_response['processed_text']}",
+            requires_human=False,
+            sources=retrieved,
+            confidence=best.similarity_score,
+            action_links=parsed_response["action_links"],
+            prompt_tokens=prompt_tokens,
+            answer_path="top_resolution",
+            degraded=True
+        )
+    
+    def _record_answer(self, agent_id: str, response: ChatResponse):
+        self.metrics.inc("chat_answers_total", agent=agent_id, path=response.answer_path)
+        with self._stats_lock:
+            counts = self._answer_counts.setdefault(agent_id, [0, 0])
+            counts[0] += 1
+            counts[1] += int(response.degraded)
+    
+    def _record_completion(self, agent_id: str, tier: str, model: str, seconds: float, usage):
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        self.metrics.observe("llm_completion_seconds", seconds, agent=agent_id, tier=tier)
+        self.metrics.inc("llm_tokens_total", prompt_tokens, agent=agent_id, tier=tier, kind="prompt")
+        self.metrics.inc("llm_tokens_total", completion_tokens, agent=agent_id, tier=tier, kind="completion")
+        with self._stats_lock:
+            stats = self._tier_stats.setdefault((agent_id, tier), {
+                "calls": 0, "seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0
+            })
+            stats["model"] = model
+            stats["calls"] += 1
+            stats["seconds"] += seconds
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+    
+    def _record_cascade(self, agent_id: str, outcome: str):
+        """Count a cascade outcome: "fast", or the escalation reason"""
+        self.metrics.inc("llm_cascade_total", agent=agent_id, outcome=outcome)
+        with self._stats_lock:
+            outcomes = self._cascade_stats.setdefault(agent_id, {})
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    
+    def _collect(self) -> list[tuple[str, dict, float]]:
+        with self._stats_lock:
+            samples = [
+                ("chat_degraded_ratio", {"agent": agent_id}, round(degraded / answers, 4))
+                for agent_id, (answers, degraded) in self._answer_counts.items()
+                if answers
+            ]
+            for agent_id, outcomes in self._cascade_stats.items():
+                total = sum(outcomes.values())
+                escalated = total - outcomes.get("fast", 0)
+                samples.append(("llm_escalation_ratio", {"agent": agent_id}, round(escalated / total, 4)))
+            return samples
+    
+    def get_llm_stats(self) -> dict:
+        """Per agent: latency and token use per cascade tier, and escalation rates"""
+        with self._stats_lock:
+            tier_stats = {key: dict(stats) for key, stats in self._tier_stats.items()}
+            cascade_stats = {agent_id: dict(outcomes) for agent_id, outcomes in self._cascade_stats.items()}
+        
+        agents: dict[str, dict] = {}
+        for (agent_id, tier), stats in tier_stats.items():
+            agents.setdefault(agent_id, {"tiers": {}})["tiers"][tier] = {
+                "model": stats["model"],
+                "calls": stats["calls"],
+                "avg_seconds": round(stats["seconds"] / stats["calls"], 3),
+                "prompt_tokens": stats["prompt_tokens"],
+                "completion_tokens": stats["completion_tokens"],
+            }
+        for agent_id, outcomes in cascade_stats.items():
+            total = sum(outcomes.values())
+            escalations = {reason: n for reason, n in outcomes.items() if reason != "fast"}
+            agents.setdefault(agent_id, {"tiers": {}})["cascade"] = {
+                "questions": total,
+                "answered_by_fast_model": outcomes.get("fast", 0),
+                "escalations": escalations,
+                "escalation_rate": round(sum(escalations.values()) / total, 4) if total else 0.0,
+            }
+        return {"agents": agents}
+    
     async def generate_response(
         self, 
         question: str, 
-        agent_config: AgentConfig
+        agent_config: AgentConfig,
+        categories: Optional[list[str]] = None,
+        deadline: Optional[Deadline] = None,
+        session: Optional[ChatSession] = None
     ) -> ChatResponse:
         """
         Generate a response for the user's question using agent-specific RAG.
@@ -160,82 +379,327 @@ Resolution: {ctx.resolution}
         Args:
             question: User's question
             agent_config: Configuration for the selected agent
+            categories: Only retrieve tickets in these categories
+            deadline: Latency budget of the request (see start_deadline)
+            session: Conversation the question belongs to; updated with the turn
             
         Returns:
             ChatResponse with answer, sources, action links, and human redirect flag
         """
+        response = await self._generate_response(question, agent_config, categories, deadline, session)
+        self._record_answer(agent_config.id, response)
+        if session is not None:
+            session.turns.append(ChatTurn(
+                question=question,
+                answer=response.answer,
+                answer_path=response.answer_path,
+                tokens=estimate_tokens(question) + estimate_tokens(response.answer),
+                at=time.time()
+            ))
+            await run_in_threadpool(self.sessions.save, session)
+            response.session_id = session.id
+        return response
+    
+    async def _generate_response(
+        self,
+        question: str,
+        agent_config: AgentConfig,
+        categories: Optional[list[str]],
+        deadline: Optional[Deadline],
+        session: Optional[ChatSession] = None
+    ) -> ChatResponse:
+        # A follow-up is searched together with the question before it
+        query = question
+        if session is not None and session.turns:
+            query = f"{session.turns[-1].question}\n{question}"
+        
         # Step 1: Embed the question
-        query_embedding = self.embedding_service.embed_text(question)
+        try:
+            query_embedding = await self._within(deadline, run_in_threadpool(
+                self.embedding_service.embed_text,
+                query,
+                dimensions=agent_config.embedding_dimensions,
+                deadline=deadline
+            ))
+        except CircuitOpenError as e:
+            logger.warning(f"Embedding skipped, failing fast to ServiceNow: {e}")
+            return self._create_fallback_response(question)
+        except (asyncio.TimeoutError, DeadlineExceededError):
+            return self._create_degraded_response(question, agent_config, [], "embedding")
+        
+        # Step 2: Retrieve similar tickets from agent's collection, re-ranked for diversity
+        try:
+            if session is not None:
+                retrieved = await self._retrieve_in_session(
+                    session, agent_config, query, query_embedding, categories, deadline
+                )
+            else:
+                retrieved = await self._within(
+                    deadline,
+                    self.retriever.aretrieve(agent_config, query_embedding, categories)
+                )
+        except asyncio.TimeoutError:
+            carried = self._carried_tickets(session, categories) if session is not None else []
+            return self._create_degraded_response(question, agent_config, carried, "retrieval")
         
-        # Step 2: Retrieve similar tickets from agent's collection
-        retrieved = self.vector_store.search_similar_in_collection(
-            collection_name=agent_config.collection_name,
-            query_embedding=query_embedding,
-            top_k=3
+        return await self.answer_with_context(
+            question,
+            agent_config,
+            retrieved,
+            deadline=deadline,
+            history=session.turns if session is not None else None
         )
+    
+    def _carried_tickets(
+        self,
+        session: ChatSession,
+        categories: Optional[list[str]]
+    ) -> list[RetrievedContext]:
+        """The session's tickets that pass the category filter"""
+        return [
+            ctx for ctx in session.retrieved
+            if not categories or ctx.category in categories
+        ]
+    
+    async def _retrieve_in_session(
+        self,
+        session: ChatSession,
+        agent_config: AgentConfig,
+        query: str,
+        query_embedding: list[float],
+        categories: Optional[list[str]],
+        deadline: Optional[Deadline]
+    ) -> list[RetrievedContext]:
+        """
+        Retrieve for a question asked in a session, and remember the result.
+        
+        A query close to the one the session's tickets were found with
+        (cosine similarity of at least `session_reuse_similarity`) reuses
+        them without searching. Otherwise the new results are merged with
+        the session's tickets: a ticket found again keeps its better score,
+        carried-over ones lose `session_carryover_decay` of theirs each time,
+        and the best `session_max_tickets` are kept for the next turn.
+        """
+        carried = self._carried_tickets(session, categories)
+        if carried and session.embedding is not None:
+            similarity = float(np.dot(query_embedding, session.embedding) / (
+                np.linalg.norm(query_embedding) * np.linalg.norm(session.embedding)
+            ))
+            if similarity >= self.session_reuse_similarity:
+                self.metrics.inc("chat_session_retrieval_total", agent=agent_config.id, outcome="reused")
+                return carried
+        
+        fresh = await self._within(
+            deadline,
+            self.retriever.aretrieve(agent_config, query_embedding, categories)
+        )
+        merged = {ctx.ticket_id: ctx for ctx in fresh}
+        for ctx in carried:
+            score = ctx.similarity_score * self.session_carryover_decay
+            if ctx.ticket_id not in merged or merged[ctx.ticket_id].similarity_score < score:
+                merged[ctx.ticket_id] = ctx.model_copy(update={"similarity_score": score})
+        retrieved = sorted(merged.values(), key=lambda ctx: ctx.similarity_score, reverse=True)
+        retrieved = retrieved[:self.session_max_tickets]
+        
+        outcome = "extended" if carried else "new"
+        self.metrics.inc("chat_session_retrieval_total", agent=agent_config.id, outcome=outcome)
+        session.query = query
+        session.embedding = query_embedding
+        session.retrieved = retrieved
+        return retrieved
+    
+    def _history_messages(self, turns: list[ChatTurn]) -> tuple[list[dict], int]:
+        """
+        Recent answered turns as chat messages, newest kept first, within
+        `session_history_token_budget`; returns (messages, tokens).
+        """
+        messages: list[dict] = []
+        tokens = 0
+        for turn in reversed(turns):
+            # Redirects and fallbacks carry nothing the model can build on
+            if turn.answer_path != "llm":
+                continue
+            if tokens + turn.tokens > self.history_token_budget:
+                break
+            messages[:0] = [
+                {"role": "user", "content": turn.question},
+                {"role": "assistant", "content": turn.answer},
+            ]
+            tokens += turn.tokens
+        return messages, tokens
+    
+    async def answer_with_context(
+        self,
+        question: str,
+        agent_config: AgentConfig,
+        retrieved: list[RetrievedContext],
+        priority: str = INTERACTIVE,
+        deadline: Optional[Deadline] = None,
+        history: Optional[list[ChatTurn]] = None
+    ) -> ChatResponse:
+        """
+        Generate a response from already retrieved context.
         
+        Args:
+            question: User's question
+            agent_config: Configuration for the selected agent
+            retrieved: Tickets retrieved for the question
+            priority: Rate-limit priority of the completion call
+            deadline: Latency budget; the completion is cancelled when it runs out
+            history: Earlier turns of the session, passed to the LLM within the history budget
+            
+        Returns:
+            ChatResponse with answer, sources, action links, and human redirect flag
+        """
         # Step 3: Check if we have any relevant context
         if not retrieved:
             # No results - provide ServiceNow ticket option
-            servicenow_response = self._create_servicenow_response(question)
-            return ChatResponse(
-                answer=servicenow_response["processed_text"],
-                requires_human=True,
-                sources=[],
-                confidence=0.0,
-                action_links=servicenow_response["action_links"]
-            )
+            return self._create_fallback_response(question)
         
-        # Step 4: Format context for LLM
-        context = self._format_context(retrieved)
+        # Step 4: Format context for LLM within the agent's token budget
+        token_budget = agent_config.context_token_budget or self.context_token_budget
+        context = build_context(retrieved, token_budget)
         
         # Step 5: Generate response using agent-specific system prompt
         system_prompt = agent_config.system_prompt or DEFAULT_SYSTEM_PROMPT
+        user_prompt = USER_PROMPT_TEMPLATE.format(
+            context=context.text,
+            question=question
+        )
         
+        history_messages, history_tokens = self._history_messages(history or [])
         messages = [
             {"role": "system", "content": system_prompt},
-            {"role": "user", "content": USER_PROMPT_TEMPLATE.format(
-                context=context,
-                question=question
-            )}
+            *history_messages,
+            {"role": "user", "content": user_prompt}
         ]
-        
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=0.7,
-            max_tokens=500
+        prompt_tokens = estimate_tokens(system_prompt) + history_tokens + estimate_tokens(user_prompt)
+        logger.info(
+            f"Agent '{agent_config.id}' prompt: ~{prompt_tokens} tokens "
+            f"(context {context.token_count}/{token_budget}, "
+            f"{context.tickets_included} tickets, {context.tickets_trimmed} trimmed, "
+            f"history {history_tokens}/{self.history_token_budget})"
         )
         
-        llm_response = response.choices[0].message.content.strip()
+        # Not enough time left for a useful completion: skip straight to the degraded answer
+        if deadline is not None and deadline.remaining() < self.min_completion_seconds:
+            return self._create_degraded_response(question, agent_config, retrieved, "completion")
+        
+        best_score = max(ctx.similarity_score for ctx in retrieved)
+        threshold = self._threshold(agent_config)
+        
+        try:
+            completion = await self._complete_with_cascade(
+                agent_config, messages, best_score, threshold, priority, deadline
+            )
+        except CircuitOpenError as e:
+            logger.warning(f"Completion skipped, failing fast to ServiceNow: {e}")
+            return self._create_fallback_response(question, retrieved)
+        except (asyncio.TimeoutError, DeadlineExceededError):
+            # The HTTP call in the worker thread times out on its own at the
+            # deadline and is not retried
+            return self._create_degraded_response(
+                question, agent_config, retrieved, "completion", prompt_tokens
+            )
+        
+        llm_response = completion.text
+        prompt_tokens = completion.prompt_tokens or prompt_tokens
         
         # Step 6: Check if we should redirect to human
-        requires_human = self._should_redirect_to_human(retrieved, llm_response)
+        requires_human = self._should_redirect_to_human(retrieved, llm_response, threshold)
         
         if requires_human:
             # Low confidence - provide ServiceNow ticket option
-            servicenow_response = self._create_servicenow_response(question)
-            return ChatResponse(
-                answer=servicenow_response["processed_text"],
-                requires_human=True,
-                sources=retrieved,
-                confidence=max(ctx.similarity_score for ctx in retrieved) if retrieved else 0.0,
-                action_links=servicenow_response["action_links"]
-            )
+            response = self._create_fallback_response(question, retrieved, prompt_tokens)
+            response.model = completion.model
+            response.escalated = completion.escalated
+            return response
         
         # Step 7: Parse action links from response
         parsed_response = self._parse_action_links(llm_response)
         
         # Step 8: Return successful response
-        best_score = max(ctx.similarity_score for ctx in retrieved)
-        
         return ChatResponse(
             answer=parsed_response["processed_text"],
             requires_human=False,
             sources=retrieved,
             confidence=best_score,
-            action_links=parsed_response["action_links"]
+            action_links=parsed_response["action_links"],
+            prompt_tokens=prompt_tokens,
+            model=completion.model,
+            escalated=completion.escalated
         )
+    
+    async def _complete(
+        self,
+        agent_config: AgentConfig,
+        tier: str,
+        model: str,
+        messages: list[dict],
+        priority: str,
+        deadline: Optional[Deadline]
+    ) -> tuple[str, int]:
+        """One timed chat completion; returns (answer text, prompt tokens)"""
+        _, temperature, max_tokens = self._model_settings(agent_config)
+        started = time.perf_counter()
+        response = await self._within(deadline, run_in_threadpool(
+            self.client.create_chat_completion,
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            priority=priority,
+            deadline=deadline
+        ))
+        usage = getattr(response, "usage", None)
+        self._record_completion(agent_config.id, tier, model, time.perf_counter() - started, usage)
+        return response.choices[0].message.content.strip(), getattr(usage, "prompt_tokens", 0) or 0
+    
+    async def _complete_with_cascade(
+        self,
+        agent_config: AgentConfig,
+        messages: list[dict],
+        best_score: float,
+        threshold: float,
+        priority: str,
+        deadline: Optional[Deadline]
+    ) -> Completion:
+        """
+        Answer with the agent's model, or through its cascade.
+        
+        A cascading agent asks its fast `cascade_model` first and escalates
+        to its full model when the fast model answers HUMAN_REDIRECT even
+        though retrieval cleared the threshold (below it the answer is a
+        redirect either way). A best similarity inside the ambiguous band
+        goes to the full model directly, skipping a fast answer that would
+        not be trusted.
+        
+        Raises:
+            DeadlineExceededError: If no time is left for an escalation
+        """
+        model = self._model_settings(agent_config)[0]
+        if not agent_config.cascade_model:
+            text, prompt_tokens = await self._complete(agent_config, "primary", model, messages, priority, deadline)
+            return Completion(text, model, prompt_tokens)
+        
+        low, high = agent_config.cascade_band or self.cascade_band
+        spent_tokens = 0
+        if low <= best_score < high:
+            reason = "ambiguous"
+        else:
+            text, spent_tokens = await self._complete(
+                agent_config, "fast", agent_config.cascade_model, messages, priority, deadline
+            )
+            if "HUMAN_REDIRECT" not in text.upper() or best_score < threshold:
+                self._record_cascade(agent_config.id, "fast")
+                return Completion(text, agent_config.cascade_model, spent_tokens)
+            reason = "human_redirect"
+        
+        self._record_cascade(agent_config.id, reason)
+        if deadline is not None and deadline.remaining() < self.min_completion_seconds:
+            raise DeadlineExceededError("escalation", deadline.budget_seconds)
+        text, prompt_tokens = await self._complete(agent_config, "primary", model, messages, priority, deadline)
+        return Completion(text, model, spent_tokens + prompt_tokens, escalated=True)
 
 
 # Dependency injection helper
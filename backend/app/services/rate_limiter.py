@@ -0,0 +1,288 @@
+"""Rate Limiter - Shared OpenAI request and token budgets with priorities"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+from app.config import get_settings
+from app.services.deadline import Deadline, DeadlineExceededError
+from app.services.metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+PRIORITIES = (INTERACTIVE, BACKGROUND)
+
+USAGE_WINDOW_SECONDS = 60.0
+
+
+class RateLimitedError(Exception):
+    """Raised when an interactive call cannot get budget within its wait limit"""
+
+    def __init__(self, budget: str, retry_after: float):
+        self.budget = budget
+        self.retry_after = retry_after
+        super().__init__(f"OpenAI {budget} budget exhausted. Retry after {retry_after:.1f}s")
+
+
+class TokenBucket:
+    """
+    Bucket holding up to `capacity` units, refilled continuously at
+    `capacity` per minute. Not thread-safe; callers hold the budget lock.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self._updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def refill(self, now: float):
+        if self.enabled:
+            rate = self.capacity / 60.0
+            self.level = min(self.capacity, self.level + (now - self._updated) * rate)
+        self._updated = now
+
+    def seconds_until(self, level: float) -> float:
+        """Time until the bucket holds `level` units"""
+        if not self.enabled or self.level >= level:
+            return 0.0
+        return (level - self.level) / (self.capacity / 60.0)
+
+
+@dataclass
+class Reservation:
+    """Budget taken for one API request, settled once actual usage is known"""
+    budget: str
+    priority: str
+    tokens: int
+    usage_entry: list
+
+
+class Budget:
+    """Requests-per-minute and tokens-per-minute buckets for one API"""
+
+    def __init__(self, name: str, rpm: int, tpm: int, interactive_reserve: float):
+        self.name = name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.interactive_reserve = interactive_reserve
+        self.condition = threading.Condition()
+        self.waiting = {priority: 0 for priority in PRIORITIES}
+        # [time, priority, tokens] per request in the last minute
+        self.usage: deque[list] = deque()
+
+    def _need(self, bucket: TokenBucket, cost: float, priority: str) -> float:
+        """Level the bucket must hold before `cost` may be taken"""
+        if not bucket.enabled:
+            return 0.0
+        # Oversized requests wait for a full bucket and then go into debt
+        need = min(cost, bucket.capacity)
+        if priority == BACKGROUND:
+            need = min(bucket.capacity, need + bucket.capacity * self.interactive_reserve)
+        return need
+
+    def wait_seconds(self, tokens: int, priority: str) -> float:
+        """Time until a request of `tokens` could be taken, ignoring other waiters"""
+        return max(
+            self.requests.seconds_until(self._need(self.requests, 1, priority)),
+            self.tokens.seconds_until(self._need(self.tokens, tokens, priority)),
+        )
+
+    def can_take(self, tokens: int, priority: str) -> bool:
+        if priority == BACKGROUND and self.waiting[INTERACTIVE]:
+            return False
+        return self.wait_seconds(tokens, priority) == 0.0
+
+    def take(self, now: float, tokens: int, priority: str) -> list:
+        if self.requests.enabled:
+            self.requests.level -= 1
+        if self.tokens.enabled:
+            self.tokens.level -= tokens
+        self.trim_usage(now)
+        entry = [now, priority, tokens]
+        self.usage.append(entry)
+        return entry
+
+    def trim_usage(self, now: float):
+        while self.usage and now - self.usage[0][0] > USAGE_WINDOW_SECONDS:
+            self.usage.popleft()
+
+
+class RateLimiter:
+    """
+    Process-wide token buckets for OpenAI requests and tokens per minute.
+
+    Every OpenAI call takes one request and its estimated tokens from the
+    budget of its API (embeddings or chat) before it is sent, and the
+    estimate is corrected from the response's usage afterwards. Limits are
+    the account's limits divided among the configured workers.
+
+    Interactive calls may drain a budget completely and wait at most
+    `max_wait` seconds before failing with RateLimitedError, or until
+    their request's deadline if that comes first. Background calls
+    (indexing, uploads, batch chat) wait as long as needed, never go ahead
+    of a waiting interactive call and leave `interactive_reserve` of each
+    bucket untouched, so bulk work throttles itself before interactive
+    traffic sees upstream 429s.
+    """
+
+    _instance: Optional["RateLimiter"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        settings = get_settings()
+        workers = max(1, settings.workers)
+        self.max_wait = settings.rate_limit_max_wait_seconds
+        reserve = settings.rate_limit_interactive_reserve
+        self.budgets = {
+            "embeddings": Budget(
+                "embeddings",
+                settings.embedding_rpm_limit // workers,
+                settings.embedding_tpm_limit // workers,
+                reserve
+            ),
+            "chat": Budget(
+                "chat",
+                settings.chat_rpm_limit // workers,
+                settings.chat_tpm_limit // workers,
+                reserve
+            ),
+        }
+
+        self.metrics = MetricsRegistry.get_instance()
+        self.metrics.describe("openai_budget_wait_seconds", "Time spent waiting for OpenAI rate-limit budget")
+        self.metrics.describe("openai_budget_rejected_total", "Interactive calls rejected for lack of budget")
+        self.metrics.register_collector(self._collect)
+
+    @classmethod
+    def get_instance(cls) -> "RateLimiter":
+        """Get singleton instance of RateLimiter"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def acquire(
+        self,
+        budget_name: str,
+        tokens: int,
+        priority: str = INTERACTIVE,
+        deadline: Optional[Deadline] = None
+    ) -> Reservation:
+        """
+        Take budget for one request, waiting until it is available.
+
+        Raises:
+            RateLimitedError: If an interactive call would wait longer than `max_wait`
+            DeadlineExceededError: If the request's deadline would pass first
+        """
+        budget = self.budgets[budget_name]
+        start = time.monotonic()
+        give_up_at = start + self.max_wait if priority == INTERACTIVE else None
+        until_deadline = deadline is not None and (give_up_at is None or deadline.expires_at < give_up_at)
+        if until_deadline:
+            give_up_at = deadline.expires_at
+
+        with budget.condition:
+            budget.waiting[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    budget.requests.refill(now)
+                    budget.tokens.refill(now)
+                    if budget.can_take(tokens, priority):
+                        entry = budget.take(now, tokens, priority)
+                        break
+
+                    wait = budget.wait_seconds(tokens, priority) or 0.05
+                    if give_up_at is not None:
+                        if now + wait > give_up_at:
+                            self.metrics.inc("openai_budget_rejected_total", budget=budget_name)
+                            if until_deadline:
+                                raise DeadlineExceededError(f"{budget_name} budget", deadline.budget_seconds)
+                            raise RateLimitedError(budget_name, wait)
+                        wait = min(wait, give_up_at - now)
+                    budget.condition.wait(timeout=wait)
+            finally:
+                budget.waiting[priority] -= 1
+                budget.condition.notify_all()
+
+        waited = time.monotonic() - start
+        self.metrics.observe("openai_budget_wait_seconds", waited, budget=budget_name, priority=priority)
+        if waited > 1.0:
+            logger.info(f"Waited {waited:.1f}s for OpenAI {budget_name} budget ({priority})")
+        return Reservation(budget_name, priority, tokens, entry)
+
+    def settle(self, reservation: Reservation, actual_tokens: Optional[int]):
+        """Correct a reservation's token estimate once the response reports usage"""
+        if actual_tokens is None or actual_tokens == reservation.tokens:
+            return
+        budget = self.budgets[reservation.budget]
+        with budget.condition:
+            if budget.tokens.enabled:
+                budget.tokens.level -= actual_tokens - reservation.tokens
+            reservation.usage_entry[2] = actual_tokens
+            budget.condition.notify_all()
+
+    def refund(self, reservation: Reservation):
+        """Return the budget of a request that was never sent"""
+        budget = self.budgets[reservation.budget]
+        with budget.condition:
+            if budget.requests.enabled:
+                budget.requests.level += 1
+            if budget.tokens.enabled:
+                budget.tokens.level += reservation.tokens
+            if reservation.usage_entry in budget.usage:
+                budget.usage.remove(reservation.usage_entry)
+            budget.condition.notify_all()
+
+    def get_stats(self) -> dict:
+        """Limits, bucket levels and the last minute's usage per budget"""
+        now = time.monotonic()
+        stats = {}
+        for name, budget in self.budgets.items():
+            with budget.condition:
+                budget.requests.refill(now)
+                budget.tokens.refill(now)
+                budget.trim_usage(now)
+                usage = {
+                    priority: {
+                        "requests": sum(1 for _, p, _ in budget.usage if p == priority),
+                        "tokens": sum(t for _, p, t in budget.usage if p == priority),
+                    }
+                    for priority in PRIORITIES
+                }
+                stats[name] = {
+                    "rpm_limit": int(budget.requests.capacity),
+                    "tpm_limit": int(budget.tokens.capacity),
+                    "requests_available": math.floor(budget.requests.level) if budget.requests.enabled else None,
+                    "tokens_available": math.floor(budget.tokens.level) if budget.tokens.enabled else None,
+                    "interactive_reserve": budget.interactive_reserve,
+                    "waiting": dict(budget.waiting),
+                    "last_minute": usage,
+                }
+        return {"max_wait_seconds": self.max_wait, "budgets": stats}
+
+    def _collect(self) -> list[tuple[str, dict, float]]:
+        samples = []
+        for name, budget in self.budgets.items():
+            for priority, count in budget.waiting.items():
+                samples.append(("openai_budget_waiting", {"budget": name, "priority": priority}, count))
+            if budget.tokens.enabled:
+                samples.append(("openai_budget_tokens_available", {"budget": name}, budget.tokens.level))
+        return samples
+
+
+def get_rate_limiter() -> RateLimiter:
+    """FastAPI dependency for the OpenAI rate limiter"""
+    return RateLimiter.get_instance()
@@ -0,0 +1,59 @@
+"""Re-ranking - Vectorized maximal marginal relevance over retrieval candidates"""
+
+import numpy as np
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def mmr_select(
+    query_embedding: list[float],
+    candidate_embeddings: list[list[float]],
+    k: int,
+    lambda_mult: float = 0.5
+) -> list[int]:
+    """
+    Select k candidates by maximal marginal relevance.
+
+    Each step picks the candidate maximising
+    `lambda * sim(query, c) - (1 - lambda) * max(sim(c, selected))`.
+    All similarities are computed up front with two matrix products, so
+    the selection loop only does O(n) vector updates per pick.
+
+    Args:
+        query_embedding: Embedding of the user's query
+        candidate_embeddings: Embeddings of the over-fetched candidates
+        k: Number of candidates to select
+        lambda_mult: 1.0 ranks purely by relevance, 0.0 purely by diversity
+
+    Returns:
+        Indices into candidate_embeddings, in selection order
+    """
+    n = len(candidate_embeddings)
+    if n == 0 or k <= 0:
+        return []
+
+    candidates = _normalize_rows(np.asarray(candidate_embeddings, dtype=np.float32))
+    query = _normalize_rows(np.asarray(query_embedding, dtype=np.float32)[None, :])[0]
+
+    relevance = candidates @ query
+    pairwise = candidates @ candidates.T
+
+    first = int(np.argmax(relevance))
+    selected = [first]
+    max_similarity = pairwise[:, first].copy()
+    available = np.ones(n, dtype=bool)
+    available[first] = False
+
+    while len(selected) < min(k, n):
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, pairwise[:, best], out=max_similarity)
+
+    return selected
@@ -0,0 +1,189 @@
+"""Retriever Service - Agent-aware candidate retrieval and re-ranking"""
+
+import threading
+from typing import Optional
+
+from app.config import get_settings
+from app.models.schemas import AgentConfig, RetrievedContext
+from app.services.vector_store import VectorStoreService
+from app.services.reranker import mmr_select
+from app.services.quantized_index import PRECISIONS
+from app.services.sharding import shard_collections
+
+
+class RetrieverService:
+    """
+    Retrieves context for an agent.
+
+    Over-fetches `fetch_k` candidates with their embeddings and selects
+    `top_k` of them with maximal marginal relevance, so near-duplicate
+    tickets do not crowd out other relevant answers. Sharded agents are
+    searched on all shards at once and their candidates merged before
+    re-ranking.
+    """
+
+    _instance: Optional["RetrieverService"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        settings = get_settings()
+        self.default_top_k = settings.retrieval_top_k
+        self.default_fetch_k = settings.retrieval_fetch_k
+        self.default_mmr_lambda = settings.mmr_lambda
+        self.rescore_factor = settings.quantized_rescore_factor
+
+        self.vector_store = VectorStoreService.get_instance()
+
+    @classmethod
+    def get_instance(cls) -> "RetrieverService":
+        """Get singleton instance of RetrieverService"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def get_params(self, agent_config: AgentConfig) -> tuple[int, int, float]:
+        """Resolve (top_k, fetch_k, mmr_lambda) for an agent"""
+        top_k = agent_config.top_k or self.default_top_k
+        fetch_k = max(top_k, agent_config.fetch_k or self.default_fetch_k)
+        mmr_lambda = (
+            agent_config.mmr_lambda
+            if agent_config.mmr_lambda is not None
+            else self.default_mmr_lambda
+        )
+        return top_k, fetch_k, mmr_lambda
+
+    def retrieve(
+        self,
+        agent_config: AgentConfig,
+        query_embedding: list[float],
+        categories: Optional[list[str]] = None
+    ) -> list[RetrievedContext]:
+        """
+        Retrieve diverse, relevant tickets for a query.
+
+        Args:
+            agent_config: Configuration for the selected agent
+            query_embedding: Embedding of the user's query
+            categories: Only search tickets in these categories
+
+        Returns:
+            Up to top_k retrieved contexts in MMR selection order
+        """
+        return self.retrieve_batch(agent_config, [query_embedding], categories)[0]
+
+    def retrieve_batch(
+        self,
+        agent_config: AgentConfig,
+        query_embeddings: list[list[float]],
+        categories: Optional[list[str]] = None
+    ) -> list[list[RetrievedContext]]:
+        """
+        Retrieve context for several queries to the same agent.
+
+        Chroma-backed agents are searched with a single multi-embedding
+        query; quantized agents scan their in-memory index per query.
+        A category filter is pushed down into the search itself. For a
+        sharded agent this happens on every shard concurrently.
+
+        Args:
+            agent_config: Configuration for the selected agent
+            query_embeddings: Embeddings of the queries
+            categories: Only search tickets in these categories
+
+        Returns:
+            One list of retrieved contexts per query, in input order
+        """
+        if not query_embeddings:
+            return []
+
+        # Search and hydration see the same version of the collection(s)
+        with self.vector_store.reading_all(shard_collections(agent_config)):
+            return self._retrieve_batch(agent_config, query_embeddings, categories)
+
+    def _retrieve_batch(
+        self,
+        agent_config: AgentConfig,
+        query_embeddings: list[list[float]],
+        categories: Optional[list[str]]
+    ) -> list[list[RetrievedContext]]:
+        top_k, fetch_k, mmr_lambda = self.get_params(agent_config)
+        shards = shard_collections(agent_config)
+        collection_name = shards[0]
+
+        if len(shards) > 1:
+            batches = self.vector_store.search_shards(
+                collection_names=shards,
+                query_embeddings=query_embeddings,
+                fetch_k=fetch_k,
+                with_embeddings=fetch_k > top_k,
+                categories=categories,
+                precision=agent_config.vector_precision,
+                rescore_k=fetch_k * self.rescore_factor
+            )
+        elif agent_config.vector_precision in PRECISIONS:
+            # Compact index: approximate scan, full-precision re-score
+            batches = [
+                self.vector_store.search_quantized_in_collection(
+                    collection_name=collection_name,
+                    query_embedding=query_embedding,
+                    fetch_k=fetch_k,
+                    precision=agent_config.vector_precision,
+                    rescore_k=fetch_k * self.rescore_factor,
+                    categories=categories
+                )
+                for query_embedding in query_embeddings
+            ]
+        else:
+            batches = self.vector_store.search_candidates_batch_in_collection(
+                collection_name=collection_name,
+                query_embeddings=query_embeddings,
+                fetch_k=fetch_k,
+                with_embeddings=fetch_k > top_k,
+                categories=categories
+            )
+
+        results = []
+        for query_embedding, candidates in zip(query_embeddings, batches):
+            if len(candidates) > top_k:
+                selected = mmr_select(
+                    query_embedding,
+                    [c.embedding for c in candidates],
+                    k=top_k,
+                    lambda_mult=mmr_lambda
+                )
+                candidates = [candidates[i] for i in selected]
+
+            # Only the final selection pays for fetching ticket text
+            if len(shards) > 1:
+                results.append(self.vector_store.hydrate_shard_candidates(candidates))
+            else:
+                results.append(self.vector_store.hydrate_candidates(collection_name, candidates))
+
+        return results
+
+    async def aretrieve(
+        self,
+        agent_config: AgentConfig,
+        query_embedding: list[float],
+        categories: Optional[list[str]] = None
+    ) -> list[RetrievedContext]:
+        """`retrieve` on the vector store's thread pool"""
+        return await self.vector_store.run(self.retrieve, agent_config, query_embedding, categories)
+
+    async def aretrieve_batch(
+        self,
+        agent_config: AgentConfig,
+        query_embeddings: list[list[float]],
+        categories: Optional[list[str]] = None
+    ) -> list[list[RetrievedContext]]:
+        """`retrieve_batch` on the vector store's thread pool"""
+        return await self.vector_store.run(
+            self.retrieve_batch, agent_config, query_embeddings, categories
+        )
+
+
+def get_retriever() -> RetrieverService:
+    """FastAPI dependency for retriever service"""
+    return RetrieverService.get_instance()
@@ -0,0 +1,71 @@
+"""Reader/Writer Lock - Shared reads, exclusive writes"""
+
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+class ReadWriteLock:
+    """
+    Writer-preferring reader/writer lock for threads.
+
+    Any number of threads may read at once; a writer waits for current
+    readers to finish and blocks new ones, so a steady stream of reads
+    cannot starve a write. Both sides are reentrant per thread, and the
+    writing thread may also read. A reader must not try to upgrade to a
+    writer.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers: dict[int, int] = {}
+        self._writer: Optional[int] = None
+        self._write_depth = 0
+        self._writers_waiting = 0
+
+    def held_by_current_thread(self) -> bool:
+        """Whether the calling thread holds this lock for reading or writing"""
+        me = threading.get_ident()
+        with self._cond:
+            return self._writer == me or me in self._readers
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me and me not in self._readers:
+                while self._writer is not None or self._writers_waiting:
+                    self._cond.wait()
+            self._readers[me] = self._readers.get(me, 0) + 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers[me] -= 1
+                if not self._readers[me]:
+                    del self._readers[me]
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me:
+                if me in self._readers:
+                    raise RuntimeError("Cannot upgrade a read lock to a write lock")
+                self._writers_waiting += 1
+                try:
+                    while self._writer is not None or self._readers:
+                        self._cond.wait()
+                finally:
+                    self._writers_waiting -= 1
+                self._writer = me
+            self._write_depth += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._write_depth -= 1
+                if not self._write_depth:
+                    self._writer = None
+                    self._cond.notify_all()
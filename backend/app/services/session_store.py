@@ -0,0 +1,312 @@
+"""Session Store - Conversation sessions shared by follow-up chat turns"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from app.config import get_settings
+from app.models.schemas import RetrievedContext
+from app.services.metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class SessionAgentMismatchError(Exception):
+    """Raised when a session is continued with a different agent than it started with"""
+
+    def __init__(self, session_id: str, agent_id: str):
+        self.session_id = session_id
+        self.agent_id = agent_id
+        super().__init__(f"Session '{session_id}' belongs to agent '{agent_id}'")
+
+
+class SessionBusyError(Exception):
+    """Raised when a session's previous turn does not finish in time for the next one"""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        super().__init__(f"Session '{session_id}' is still answering an earlier question")
+
+
+@dataclass
+class ChatTurn:
+    """One question and the answer given to it"""
+    question: str
+    answer: str
+    answer_path: str
+    tokens: int
+    at: float
+
+
+@dataclass
+class ChatSession:
+    """
+    A conversation with one agent.
+
+    Besides the recent turns it keeps what the last retrieval was made
+    with (`query` and its `embedding`) and the tickets it found, so a
+    follow-up can reuse or extend them.
+    """
+    id: str
+    agent_id: str
+    turns: list[ChatTurn] = field(default_factory=list)
+    retrieved: list[RetrievedContext] = field(default_factory=list)
+    query: Optional[str] = None
+    embedding: Optional[list[float]] = None
+    updated_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "agent_id": self.agent_id,
+            "turns": [asdict(turn) for turn in self.turns],
+            "retrieved": [ctx.model_dump() for ctx in self.retrieved],
+            "query": self.query,
+            "embedding": self.embedding,
+            "updated_at": self.updated_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ChatSession":
+        return cls(
+            id=data["id"],
+            agent_id=data["agent_id"],
+            turns=[ChatTurn(**turn) for turn in data.get("turns", [])],
+            retrieved=[RetrievedContext.model_validate(ctx) for ctx in data.get("retrieved", [])],
+            query=data.get("query"),
+            embedding=data.get("embedding"),
+            updated_at=data.get("updated_at", time.time()),
+        )
+
+
+class SessionStore:
+    """
+    Bounded in-memory store of chat sessions.
+
+    Holds at most `session_max_sessions` sessions, evicting the least
+    recently used; sessions idle for longer than `session_ttl_seconds`
+    expire. With `session_store_path` set every session is also written
+    there as one JSON file, so evicted sessions and sessions from another
+    worker or an earlier process can be picked up again.
+
+    Turns of one session are serialized within a worker (see `turn`), so
+    concurrent questions do not interleave their updates of its turns
+    and tickets.
+    """
+
+    _instance: Optional["SessionStore"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        settings = get_settings()
+        self.max_sessions = settings.session_max_sessions
+        self.ttl_seconds = settings.session_ttl_seconds
+        self.max_turns = settings.session_max_turns
+        self.path = Path(settings.session_store_path) if settings.session_store_path else None
+
+        self._sessions: OrderedDict[str, ChatSession] = OrderedDict()
+        self._lock = threading.Lock()
+        # Held by the turn in progress; dropped once no turn holds or waits for it
+        self._turn_locks: weakref.WeakValueDictionary[str, asyncio.Lock] = weakref.WeakValueDictionary()
+        self.metrics = MetricsRegistry.get_instance()
+        self.metrics.describe("chat_sessions_evicted_total", "Chat sessions evicted from memory by the LRU bound")
+        self.metrics.describe("chat_sessions_expired_total", "Chat sessions dropped after the idle TTL")
+        self.metrics.describe("chat_sessions_active", "Chat sessions held in memory")
+        self.metrics.register_collector(
+            lambda: [("chat_sessions_active", {}, float(len(self._sessions)))]
+        )
+
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self.purge_expired()
+
+    @classmethod
+    def get_instance(cls) -> "SessionStore":
+        """Get singleton instance of SessionStore"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_sessions > 0
+
+    def _expired(self, session: ChatSession) -> bool:
+        return time.time() - session.updated_at > self.ttl_seconds
+
+    def _file(self, session_id: str) -> Path:
+        return self.path / f"{session_id}.json"
+
+    def _load(self, session_id: str) -> Optional[ChatSession]:
+        """Read a persisted session, or None"""
+        if self.path is None:
+            return None
+        try:
+            with open(self._file(session_id), "r", encoding="utf-8") as f:
+                return ChatSession.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Ignoring unreadable session file for '{session_id}': {e}")
+            return None
+
+    def _write(self, session: ChatSession):
+        if self.path is None:
+            return
+        tmp_path = self._file(session.id).with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(session.to_dict(), f)
+        os.replace(tmp_path, self._file(session.id))
+
+    def _remove_file(self, session_id: str):
+        if self.path is not None:
+            self._file(session_id).unlink(missing_ok=True)
+
+    def _put(self, session: ChatSession):
+        """Cache a session as the most recently used; called with the lock held"""
+        self._sessions[session.id] = session
+        self._sessions.move_to_end(session.id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.metrics.inc("chat_sessions_evicted_total")
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        """A live session from memory or disk, or None if unknown or expired"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+        if session is None:
+            session = self._load(session_id)
+        if session is not None and self._expired(session):
+            self.delete(session_id)
+            self.metrics.inc("chat_sessions_expired_total")
+            return None
+        return session
+
+    def open(self, session_id: Optional[str], agent_id: str) -> ChatSession:
+        """
+        Continue a session, or start one (under `session_id` if given).
+
+        Raises:
+            SessionAgentMismatchError: If the session was started with another agent
+        """
+        session = self.get(session_id) if session_id else None
+        if session is None:
+            session = ChatSession(id=session_id or uuid.uuid4().hex, agent_id=agent_id)
+        elif session.agent_id != agent_id:
+            raise SessionAgentMismatchError(session.id, session.agent_id)
+        with self._lock:
+            self._put(session)
+        return session
+
+    @asynccontextmanager
+    async def turn(
+        self,
+        session_id: Optional[str],
+        agent_id: str,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[ChatSession]:
+        """
+        Open a session (see `open`) for one turn, waiting up to `timeout`
+        for a turn already in progress in the same session to finish.
+
+        Raises:
+            SessionBusyError: If the turn in progress does not finish in time
+            SessionAgentMismatchError: If the session was started with another agent
+        """
+        if not session_id:
+            yield self.open(None, agent_id)
+            return
+
+        with self._lock:
+            lock = self._turn_locks.get(session_id)
+            if lock is None:
+                lock = self._turn_locks[session_id] = asyncio.Lock()
+        try:
+            if lock.locked():
+                await asyncio.wait_for(lock.acquire(), timeout)
+            else:
+                await lock.acquire()
+        except asyncio.TimeoutError:
+            raise SessionBusyError(session_id) from None
+        try:
+            # Opened under the lock, so the turn sees the previous one's updates
+            yield self.open(session_id, agent_id)
+        finally:
+            lock.release()
+
+    def save(self, session: ChatSession):
+        """Store a session after a turn, keeping only its last `session_max_turns` turns"""
+        session.turns = session.turns[-self.max_turns:] if self.max_turns > 0 else []
+        session.updated_at = time.time()
+        with self._lock:
+            self._put(session)
+        try:
+            self._write(session)
+        except OSError as e:
+            logger.warning(f"Could not persist session '{session.id}': {e}")
+
+    def delete(self, session_id: str) -> bool:
+        """Forget a session; returns whether it existed"""
+        with self._lock:
+            existed = self._sessions.pop(session_id, None) is not None
+        if self.path is not None and self._file(session_id).exists():
+            existed = True
+            self._remove_file(session_id)
+        return existed
+
+    def purge_expired(self) -> int:
+        """Delete expired sessions from memory and disk; returns how many were dropped"""
+        with self._lock:
+            expired = [sid for sid, session in self._sessions.items() if self._expired(session)]
+            for session_id in expired:
+                del self._sessions[session_id]
+        dropped = set(expired)
+        if self.path is not None:
+            cutoff = time.time() - self.ttl_seconds
+            for file in self.path.glob("*.json"):
+                try:
+                    if file.stat().st_mtime < cutoff:
+                        file.unlink()
+                        dropped.add(file.stem)
+                except FileNotFoundError:
+                    pass
+        if dropped:
+            self.metrics.inc("chat_sessions_expired_total", len(dropped))
+        return len(dropped)
+
+    def get_stats(self) -> dict:
+        """Sessions held, limits and approximate memory"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+        estimated_bytes = 0
+        for session in sessions:
+            # Embeddings as lists of boxed floats; text roughly a byte per character
+            estimated_bytes += len(session.embedding or []) * 32
+            estimated_bytes += sum(len(turn.question) + len(turn.answer) for turn in session.turns)
+            estimated_bytes += sum(len(ctx.original_query) + len(ctx.resolution) for ctx in session.retrieved)
+        return {
+            "sessions": len(sessions),
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl_seconds,
+            "persisted": self.path is not None,
+            "estimated_bytes": estimated_bytes,
+        }
+
+
+def get_session_store() -> SessionStore:
+    """FastAPI dependency for the session store"""
+    return SessionStore.get_instance()
@@ -0,0 +1,57 @@
+"""Sharding - Split an agent's collection into independently indexed shards"""
+
+import re
+import zlib
+
+from app.models.schemas import AgentConfig, SupportTicket
+
+SHARD_SUFFIX = "__s"
+
+
+def shard_collections(agent: AgentConfig) -> list[str]:
+    """
+    Collections holding an agent's tickets.
+
+    An unsharded agent keeps its single `collection_name`; a sharded one
+    uses `{collection_name}__s0` ... `__s{N-1}`.
+    """
+    if agent.shards <= 1:
+        return [agent.collection_name]
+    return [f"{agent.collection_name}{SHARD_SUFFIX}{i}" for i in range(agent.shards)]
+
+
+def belongs_to_agent(agent: AgentConfig, collection_name: str) -> bool:
+    """Whether a collection is one of the agent's, under any shard count"""
+    if collection_name == agent.collection_name:
+        return True
+    pattern = re.escape(agent.collection_name + SHARD_SUFFIX) + r"\d+"
+    return re.fullmatch(pattern, collection_name) is not None
+
+
+def shard_of(agent: AgentConfig, ticket: SupportTicket) -> int:
+    """
+    Shard a ticket is stored in.
+
+    `hash` spreads tickets evenly by id; `category` keeps each category
+    whole in one shard, so category-filtered searches skip the other
+    shards (at the cost of uneven shard sizes). Both use a stable hash, so
+    a ticket stays in its shard across reindexes and processes.
+    """
+    if agent.shards <= 1:
+        return 0
+    key = (ticket.category or "general") if agent.shard_by == "category" else ticket.id
+    return zlib.crc32(key.encode("utf-8")) % agent.shards
+
+
+def partition(
+    agent: AgentConfig,
+    tickets: list[SupportTicket],
+    embeddings: list[list[float]]
+) -> list[tuple[list[SupportTicket], list[list[float]]]]:
+    """Split tickets and their embeddings into one (tickets, embeddings) pair per shard"""
+    parts: list[tuple[list, list]] = [([], []) for _ in range(max(1, agent.shards))]
+    for ticket, embedding in zip(tickets, embeddings):
+        shard_tickets, shard_embeddings = parts[shard_of(agent, ticket)]
+        shard_tickets.append(ticket)
+        shard_embeddings.append(embedding)
+    return parts
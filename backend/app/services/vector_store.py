@@ -1,53 +1,330 @@
 """ChromaDB Vector Store Service - Multi-Collection Support"""
 
-import chromadb
-from chromadb.config import Settings as ChromaSettings
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from functools import partial, wraps
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
+import asyncio
+import heapq
+import json
+import logging
 import os
+import shutil
+import threading
+
+import numpy as np
 
 from app.config import get_settings
 from app.models.schemas import SupportTicket, RetrievedContext
+from app.services.collection_aliases import CollectionAliases, logical_name
+from app.services.document_store import DocumentStoreService
+from app.services.quantized_index import PRECISIONS, QuantizedIndex, index_directory
+from app.services.coordination import ReadOnlyWorkerError, WorkerCoordinator
+from app.services.metrics import MetricsRegistry
+from app.services.rwlock import ReadWriteLock
+
+logger = logging.getLogger(__name__)
+
+# Chroma's default HNSW graph degree; each vector keeps up to 2 * M neighbour
+# ids (4 bytes each) on the base layer
+HNSW_M = 16
+
+# Rows whose ids and metadata are measured to estimate a collection's metadata size
+METADATA_SAMPLE_SIZE = 200
+
+
+@dataclass
+class SearchCandidate:
+    """A retrieval hit before its text is fetched from the document store"""
+    ticket_id: str
+    category: Optional[str]
+    similarity_score: float
+    embedding: Optional[list[float]] = None
+    # Collection the hit came from, set when several shards are searched
+    shard: Optional[str] = None
+
+
+def _collection_name_arg(args: tuple, kwargs: dict) -> str:
+    return kwargs["collection_name"] if "collection_name" in kwargs else args[0]
+
+
+def _with_collection_name(args: tuple, kwargs: dict, collection_name: str) -> tuple[tuple, dict]:
+    if "collection_name" in kwargs:
+        return args, {**kwargs, "collection_name": collection_name}
+    return (collection_name, *args[1:]), kwargs
+
+
+def _quantized_bytes(index: QuantizedIndex) -> int:
+    """Memory of a loaded quantized index (a memory-mapped rescoring copy is left out)"""
+    scale_bytes = index.scales.nbytes if index.scales is not None else 0
+    full_bytes = 0 if isinstance(index.full, np.memmap) else index.full.nbytes
+    return index.codes.nbytes + scale_bytes + full_bytes
+
+
+def _category_where(categories: Optional[list[str]]) -> Optional[dict]:
+    """Chroma metadata filter restricting a query to some categories"""
+    if not categories:
+        return None
+    if len(categories) == 1:
+        return {"category": categories[0]}
+    return {"category": {"$in": list(categories)}}
+
+
+def _reads_collection(method: Callable) -> Callable:
+    """Run a method under the shared lock of its collection, on the build it currently points to"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        collection_name = _collection_name_arg(args, kwargs)
+        with self.reading(collection_name):
+            args, kwargs = _with_collection_name(args, kwargs, self.aliases.resolve(collection_name))
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _writes_collection(method: Callable) -> Callable:
+    """Run a method under the exclusive lock of its collection, on the build it currently points to"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        collection_name = _collection_name_arg(args, kwargs)
+        with self.writing(collection_name):
+            args, kwargs = _with_collection_name(args, kwargs, self.aliases.resolve(collection_name))
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class VectorStoreService:
-    """Service for managing ChromaDB vector store operations with multiple collections"""
+    """
+    Service for managing ChromaDB vector store operations with multiple collections.
+    
+    Chroma calls block, so async code goes through `run`, which uses a
+    dedicated, size-limited thread pool. Each collection has a
+    reader/writer lock: queries share it, while clearing or replacing a
+    collection holds it exclusively, so a reader never sees a collection
+    halfway through a delete and re-add.
+    
+    A sharded agent's collections are searched concurrently by
+    `search_shards` on a separate pool, with the read locks of all shards
+    held by the calling thread; the pool threads only run the queries.
+    
+    Collection names are aliases (see CollectionAliases). A replacement is
+    built into a new versioned collection while the current one keeps
+    serving, and the alias is switched under the exclusive lock once the
+    build is complete. Replaced builds are kept for rollback and deleted
+    after `collection_gc_grace_seconds`.
+    """
     
     _instance: Optional["VectorStoreService"] = None
+    _instance_lock = threading.Lock()
     
     def __init__(self):
         settings = get_settings()
+        self.settings = settings
         
-        # Ensure the directory exists
-        os.makedirs(settings.chroma_db_path, exist_ok=True)
+        # Workers sharing the index: followers only read, and reload on new generations
+        self.coordinator = WorkerCoordinator.get_instance()
         
-        # Initialize persistent ChromaDB client
-        self.client = chromadb.PersistentClient(
-            path=settings.chroma_db_path,
-            settings=ChromaSettings(
-                anonymized_telemetry=False,
-                allow_reset=True
-            )
-        )
+        # Chroma is imported and opened on first use (see `client`)
+        self._client = None
+        self._client_lock = threading.Lock()
         
-        # Cache for collections
+        # Cache for collections and their locks
         self._collections: dict = {}
+        self._collection_locks: dict[str, ReadWriteLock] = {}
+        self._lock = threading.Lock()
+        
+        # Held shared by every operation and exclusively while the client is reopened
+        self._index_lock = ReadWriteLock()
+        
+        # Blocking Chroma work from async code runs here
+        self.max_workers = settings.vector_store_max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="vector-store"
+        )
+        self._pending = 0
+        MetricsRegistry.get_instance().register_collector(self._collect)
+        
+        # Per-shard queries of one sharded search run here
+        self._shard_executor = ThreadPoolExecutor(
+            max_workers=settings.shard_search_workers,
+            thread_name_prefix="shard-search"
+        )
+        
+        # Ticket text lives outside the vector index
+        self.document_store = DocumentStoreService.get_instance()
+        
+        # Optional compact in-memory indexes, keyed by build. `_quantized_lock`
+        # only guards the dicts; loading or building one index holds that
+        # build's own lock, so searches of other collections go on meanwhile
+        self.quantized_index_path = Path(settings.quantized_index_path)
+        self._quantized: dict[str, QuantizedIndex] = {}
+        self._quantized_build_locks: dict[str, threading.Lock] = {}
+        self._quantized_lock = threading.Lock()
+        
+        # Ticket counts per category, recorded at index time
+        self._category_counts: dict[str, dict[str, int]] = {}
+        
+        # Collection names -> versioned builds serving them, shared by all workers
+        self.aliases = CollectionAliases(Path(settings.coordination_path) / "collection_aliases.json")
+        self.gc_grace_seconds = settings.collection_gc_grace_seconds
     
     @classmethod
     def get_instance(cls) -> "VectorStoreService":
         """Get singleton instance of VectorStoreService"""
         if cls._instance is None:
-            cls._instance = cls()
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
         return cls._instance
     
-    def get_collection(self, collection_name: str):
-        """Get or create a collection by name"""
-        if collection_name not in self._collections:
-            self._collections[collection_name] = self.client.get_or_create_collection(
-                name=collection_name,
-                metadata={"hnsw:space": "cosine"}
+    @property
+    def client(self):
+        """The Chroma client, created on first use"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._create_client()
+        return self._client
+    
+    def _create_client(self):
+        """Connect to the Chroma server if configured, else open the local store"""
+        import chromadb
+        from chromadb.config import Settings as ChromaSettings
+        
+        settings = self.settings
+        chroma_settings = ChromaSettings(
+            anonymized_telemetry=False,
+            allow_reset=True
+        )
+        
+        if settings.chroma_server_host:
+            # One HTTP client per process; its keep-alive connection pool is shared by all requests
+            return chromadb.HttpClient(
+                host=settings.chroma_server_host,
+                port=settings.chroma_server_port,
+                settings=chroma_settings
             )
-        return self._collections[collection_name]
+        
+        # Ensure the directory exists
+        os.makedirs(settings.chroma_db_path, exist_ok=True)
+        
+        # Initialize persistent ChromaDB client
+        return chromadb.PersistentClient(
+            path=settings.chroma_db_path,
+            settings=chroma_settings
+        )
+    
+    def reload(self):
+        """
+        Drop every cached view of the index so the next access sees the
+        latest generation written by another worker.
+        """
+        with self._index_lock.write():
+            with self._lock:
+                self._collections.clear()
+            with self._quantized_lock:
+                self._quantized.clear()
+            self._category_counts.clear()
+            self.document_store.reset()
+            self.aliases.load()
+            
+            if not self.settings.chroma_server_host:
+                # The embedded client keeps segments in memory; reopen it from disk
+                from chromadb.api.client import SharedSystemClient
+                
+                with self._client_lock:
+                    SharedSystemClient.clear_system_cache()
+                    self._client = None
+    
+    def _poll_generation(self):
+        """Reload if another worker published a new index, unless mid-operation"""
+        if self._index_lock.held_by_current_thread():
+            return
+        if self.coordinator.poll_new_generation():
+            self.reload()
+    
+    def _collection_lock(self, collection_name: str) -> ReadWriteLock:
+        with self._lock:
+            if collection_name not in self._collection_locks:
+                self._collection_locks[collection_name] = ReadWriteLock()
+            return self._collection_locks[collection_name]
+    
+    @contextmanager
+    def reading(self, collection_name: str) -> Iterator[None]:
+        """Hold a collection for reading; several readers may hold it at once"""
+        self._poll_generation()
+        with self._index_lock.read(), self._collection_lock(collection_name).read():
+            yield
+    
+    @contextmanager
+    def reading_all(self, collection_names: Iterable[str]) -> Iterator[None]:
+        """Hold several collections for reading, e.g. all shards of an agent"""
+        with ExitStack() as stack:
+            for collection_name in sorted(set(collection_names)):
+                stack.enter_context(self.reading(collection_name))
+            yield
+    
+    @contextmanager
+    def writing(self, collection_name: str) -> Iterator[None]:
+        """Hold a collection exclusively, waiting for in-flight readers"""
+        self._poll_generation()
+        with self._index_lock.read(), self._collection_lock(collection_name).write():
+            yield
+    
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run blocking vector-store work on the dedicated thread pool"""
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+        finally:
+            self._pending -= 1
+    
+    def close(self):
+        """Stop the thread pools"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._shard_executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _collect(self) -> list[tuple[str, dict, float]]:
+        return [
+            ("vector_store_pending_calls", {}, self._pending),
+            ("vector_store_max_workers", {}, self.max_workers),
+        ]
     
+    def get_collection(self, collection_name: str):
+        """
+        Get the collection a name currently points to, creating it on a
+        worker that may write.
+        
+        Leadership is taken by the write paths (`write_lock`,
+        `ensure_writable`); lookups only check the role this worker has.
+        
+        Raises:
+            ValueError: On a follower, if the collection does not exist yet
+                (count and readiness checks report that as empty)
+        """
+        self._poll_generation()
+        collection_name = self.aliases.resolve(collection_name)
+        
+        with self._lock:
+            if collection_name not in self._collections:
+                if self.coordinator.can_write:
+                    self._collections[collection_name] = self.client.get_or_create_collection(
+                        name=collection_name,
+                        metadata={"hnsw:space": "cosine"}
+                    )
+                else:
+                    # Followers never create collections. A missing one is not
+                    # cached, so it is found once the leader has built it
+                    try:
+                        self._collections[collection_name] = self.client.get_collection(name=collection_name)
+                    except Exception as e:
+                        raise ValueError(f"Collection '{collection_name}' does not exist") from e
+            return self._collections[collection_name]
+    
+    @_writes_collection
     def add_tickets_to_collection(
         self,
         collection_name: str,
@@ -68,14 +345,21 @@ class VectorStoreService:
         if not tickets:
             return 0
         
+        self.coordinator.ensure_writable()
         collection = self.get_collection(collection_name)
         
+        # Text goes to the document store first so every indexed id can be hydrated
+        self.document_store.get_store(collection_name).append([
+            {"id": t.id, "query": t.query, "resolution": t.resolution}
+            | ({"aliases": t.aliases} if t.aliases else {})
+            for t in tickets
+        ])
+        
+        # The vector index only holds ids, vectors and small filterable fields
         ids = [f"ticket_{t.id}" for t in tickets]
-        documents = [t.query for t in tickets]
         metadatas = [
             {
                 "ticket_id": t.id,
-                "resolution": t.resolution,
                 "category": t.category or "general"
             }
             for t in tickets
@@ -83,18 +367,261 @@ class VectorStoreService:
         
         collection.add(
             ids=ids,
-            documents=documents,
             embeddings=embeddings,
             metadatas=metadatas
         )
         
+        self._refresh_category_counts(collection_name)
         return len(tickets)
     
+    def replace_collection(
+        self,
+        collection_name: str,
+        tickets: list[SupportTicket],
+        embeddings: list[list[float]],
+        precision: Optional[str] = None
+    ) -> int:
+        """
+        Replace a collection's contents with a blue/green rebuild.
+        
+        The tickets are written to a new versioned collection (with its
+        document store and quantized index) while the current build keeps
+        answering queries. The alias is then switched under the exclusive
+        lock, so readers see the old or the new build, never a partial one.
+        The replaced build is kept for `rollback_collection` until its
+        grace period ends. The caller holds the cross-worker write lock.
+        
+        Args:
+            collection_name: Name of the ChromaDB collection
+            tickets: New support tickets
+            embeddings: Pre-computed embeddings for ticket queries
+            precision: Also rebuild the quantized index at this precision
+            
+        Returns:
+            Number of tickets added
+        """
+        self.coordinator.ensure_writable()
+        target = self.aliases.next_version(collection_name)
+        with self.writing(target):
+            # A build that failed before its swap may have left data behind
+            self._drop_collection(target)
+        
+        count = self.add_tickets_to_collection(target, tickets, embeddings)
+        if count and precision in PRECISIONS:
+            self.build_quantized_index(target, precision)
+        
+        with self.writing(collection_name):
+            replaced = self.aliases.swap(collection_name, target)
+        logger.info(f"Collection '{collection_name}' switched from '{replaced}' to '{target}'")
+        
+        if not self._build_count(replaced):
+            # Nothing to roll back to, e.g. the empty collection of a first build
+            with self.writing(replaced):
+                self._drop_collection(replaced)
+            self.aliases.forget(collection_name, replaced)
+        
+        self.collect_garbage()
+        self.schedule_garbage_collection(self.gc_grace_seconds + 1)
+        return count
+    
+    def rollback_collection(self, collection_name: str) -> str:
+        """
+        Switch a collection back to the build it replaced last.
+        
+        The caller holds the cross-worker write lock.
+        
+        Returns:
+            Name of the build now serving the collection
+            
+        Raises:
+            ValueError: If no previous build is kept
+        """
+        self.coordinator.ensure_writable()
+        with self.writing(collection_name):
+            replaced = self.aliases.rollback(collection_name)
+            current = self.aliases.resolve(collection_name)
+        logger.info(f"Collection '{collection_name}' rolled back from '{replaced}' to '{current}'")
+        return current
+    
+    def collect_garbage(self) -> list[str]:
+        """
+        Delete replaced builds whose grace period has passed.
+        
+        Until then they stay available for rollback, and other workers may
+        still be serving them until they reload. The caller holds the
+        cross-worker write lock.
+        
+        Returns:
+            Names of the deleted builds
+        """
+        if not self.coordinator.acquire_write_access():
+            return []
+        self.aliases.load()
+        deleted = []
+        for collection_name, build in self.aliases.expired(self.gc_grace_seconds):
+            with self.writing(build):
+                self._drop_collection(build)
+            self.aliases.forget(collection_name, build)
+            deleted.append(build)
+        if deleted:
+            logger.info(f"Deleted {len(deleted)} replaced collection build(s): {', '.join(deleted)}")
+        return deleted
+    
+    def schedule_garbage_collection(self, delay: float):
+        """Run collect_garbage under the write lock after `delay` seconds"""
+        def run():
+            try:
+                with self.coordinator.write_lock():
+                    self.collect_garbage()
+            except ReadOnlyWorkerError:
+                pass
+            except Exception as e:
+                logger.warning(f"Collection garbage collection failed: {e}")
+        
+        timer = threading.Timer(delay, run)
+        timer.daemon = True
+        timer.start()
+    
+    def get_versions(self, collection_name: str) -> dict:
+        """The build serving a collection and the replaced builds kept for rollback"""
+        alias = self.aliases.get(collection_name) or {}
+        return {
+            "current": self.aliases.resolve(collection_name),
+            "version": alias.get("version", 0),
+            "swapped_at": alias.get("swapped_at"),
+            "previous": alias.get("previous", []),
+            "gc_grace_seconds": self.gc_grace_seconds,
+        }
+    
+    def _query_candidates(
+        self,
+        collection_name: str,
+        query_embedding: list[float],
+        n_results: int,
+        with_embeddings: bool = False,
+        categories: Optional[list[str]] = None
+    ) -> list[SearchCandidate]:
+        """Run a vector query that returns ids, scores and small metadata only"""
+        return self._query_candidates_batch(
+            collection_name, [query_embedding], n_results, with_embeddings, categories
+        )[0]
+    
+    @_reads_collection
+    def _query_candidates_batch(
+        self,
+        collection_name: str,
+        query_embeddings: list[list[float]],
+        n_results: int,
+        with_embeddings: bool = False,
+        categories: Optional[list[str]] = None
+    ) -> list[list[SearchCandidate]]:
+        """Run one vector query for several embeddings; one result list per embedding"""
+        collection = self.get_collection(collection_name)
+        
+        if categories:
+            # The filter is applied inside the search; skip it if nothing can match
+            counts = self.get_category_counts(collection_name)
+            if not any(counts.get(c) for c in categories):
+                return [[] for _ in query_embeddings]
+        
+        return self._run_query(collection, query_embeddings, n_results, with_embeddings, categories)
+    
+    @staticmethod
+    def _run_query(
+        collection,
+        query_embeddings: list[list[float]],
+        n_results: int,
+        with_embeddings: bool,
+        categories: Optional[list[str]]
+    ) -> list[list[SearchCandidate]]:
+        """Query an already opened collection; takes no locks"""
+        include = ["metadatas", "distances"]
+        if with_embeddings:
+            include.append("embeddings")
+        
+        results = collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=_category_where(categories),
+            include=include
+        )
+        
+        batches = []
+        
+        for q in range(len(query_embeddings)):
+            candidates = []
+            metadatas = results["metadatas"][q] if results and results["metadatas"] else []
+            for i, metadata in enumerate(metadatas):
+                distance = results["distances"][q][i]
+                
+                candidates.append(SearchCandidate(
+                    ticket_id=metadata["ticket_id"],
+                    category=metadata.get("category"),
+                    similarity_score=round(1 - distance, 4),
+                    embedding=list(results["embeddings"][q][i]) if with_embeddings else None
+                ))
+            batches.append(candidates)
+        
+        return batches
+    
+    @_reads_collection
+    def hydrate_candidates(
+        self,
+        collection_name: str,
+        candidates: list[SearchCandidate]
+    ) -> list[RetrievedContext]:
+        """
+        Fetch query and resolution text for selected candidates.
+        
+        Text comes from the document store. Collections indexed before the
+        document store existed kept text in Chroma, so any misses are read
+        from there instead.
+        
+        Args:
+            collection_name: Name of the ChromaDB collection
+            candidates: Candidates to hydrate, in the desired order
+            
+        Returns:
+            Retrieved contexts in the same order as the candidates
+        """
+        if not candidates:
+            return []
+        
+        ticket_ids = [c.ticket_id for c in candidates]
+        records = self.document_store.get_store(collection_name).get_many(ticket_ids)
+        
+        missing = [tid for tid in ticket_ids if tid not in records]
+        if missing:
+            legacy = self.get_collection(collection_name).get(
+                ids=[f"ticket_{tid}" for tid in missing],
+                include=["documents", "metadatas"]
+            )
+            for doc, metadata in zip(legacy["documents"] or [], legacy["metadatas"] or []):
+                if doc is not None and metadata and "resolution" in metadata:
+                    records[metadata["ticket_id"]] = {
+                        "query": doc,
+                        "resolution": metadata["resolution"]
+                    }
+        
+        return [
+            RetrievedContext(
+                ticket_id=c.ticket_id,
+                original_query=records[c.ticket_id]["query"],
+                resolution=records[c.ticket_id]["resolution"],
+                similarity_score=c.similarity_score,
+                category=c.category,
+                alias_count=len(records[c.ticket_id].get("aliases", ()))
+            )
+            for c in candidates
+            if c.ticket_id in records
+        ]
+    
     def search_similar_in_collection(
         self,
         collection_name: str,
         query_embedding: list[float], 
-        top_k: int = 3
+        top_k: int = 3,
+        categories: Optional[list[str]] = None
     ) -> list[RetrievedContext]:
         """
         Search for similar queries in a specific collection.
@@ -103,51 +630,375 @@ class VectorStoreService:
             collection_name: Name of the ChromaDB collection
             query_embedding: Embedding of the user's query
             top_k: Number of results to return
+            categories: Only search tickets in these categories
             
         Returns:
             List of retrieved contexts with similarity scores
         """
-        collection = self.get_collection(collection_name)
+        candidates = self._query_candidates(
+            collection_name, query_embedding, top_k, categories=categories
+        )
+        return self.hydrate_candidates(collection_name, candidates)
+    
+    def search_candidates_in_collection(
+        self,
+        collection_name: str,
+        query_embedding: list[float],
+        fetch_k: int = 20,
+        categories: Optional[list[str]] = None
+    ) -> list[SearchCandidate]:
+        """
+        Over-fetch candidates with their embeddings for re-ranking.
         
-        results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=top_k,
-            include=["documents", "metadatas", "distances"]
+        Text is not fetched; call hydrate_candidates on the final selection.
+        
+        Args:
+            collection_name: Name of the ChromaDB collection
+            query_embedding: Embedding of the user's query
+            fetch_k: Number of candidates to fetch
+            categories: Only search tickets in these categories
+            
+        Returns:
+            Candidates ordered by similarity, highest first
+        """
+        return self._query_candidates(
+            collection_name, query_embedding, fetch_k, with_embeddings=True, categories=categories
         )
+    
+    def search_candidates_batch_in_collection(
+        self,
+        collection_name: str,
+        query_embeddings: list[list[float]],
+        fetch_k: int = 20,
+        with_embeddings: bool = True,
+        categories: Optional[list[str]] = None
+    ) -> list[list[SearchCandidate]]:
+        """
+        Over-fetch candidates for many queries with a single vector query.
         
-        retrieved = []
+        Args:
+            collection_name: Name of the ChromaDB collection
+            query_embeddings: Embeddings of the queries
+            fetch_k: Number of candidates per query
+            with_embeddings: Whether to return candidate embeddings for re-ranking
+            categories: Only search tickets in these categories
+            
+        Returns:
+            One candidate list per query, each ordered by similarity
+        """
+        if not query_embeddings:
+            return []
+        return self._query_candidates_batch(
+            collection_name, query_embeddings, fetch_k, with_embeddings=with_embeddings,
+            categories=categories
+        )
+    
+    @_reads_collection
+    def get_collection_dimension(self, collection_name: str) -> Optional[int]:
+        """Dimension of the stored vectors, or None for an empty collection"""
+        result = self.get_collection(collection_name).get(limit=1, include=["embeddings"])
+        embeddings = result.get("embeddings")
+        if embeddings is None or len(embeddings) == 0:
+            return None
+        return len(embeddings[0])
+    
+    @_reads_collection
+    def export_collection(self, collection_name: str) -> tuple[list[SupportTicket], list[list[float]]]:
+        """
+        Read back every ticket of a collection with its stored embedding.
         
-        if results and results["documents"] and results["documents"][0]:
-            for i, doc in enumerate(results["documents"][0]):
-                metadata = results["metadatas"][0][i]
-                distance = results["distances"][0][i]
-                similarity = 1 - distance
-                
-                retrieved.append(RetrievedContext(
-                    ticket_id=metadata["ticket_id"],
-                    original_query=doc,
-                    resolution=metadata["resolution"],
-                    similarity_score=round(similarity, 4),
-                    category=metadata.get("category")
-                ))
+        Returns:
+            (tickets, embeddings), row for row
+        """
+        result = self.get_collection(collection_name).get(include=["embeddings", "metadatas"])
+        metadatas = result["metadatas"] or []
+        if not metadatas:
+            return [], []
+        
+        candidates = [
+            SearchCandidate(ticket_id=m["ticket_id"], category=m.get("category"), similarity_score=0.0)
+            for m in metadatas
+        ]
+        contexts = {c.ticket_id: c for c in self.hydrate_candidates(collection_name, candidates)}
+        records = self.document_store.get_store(collection_name).get_many(list(contexts))
+        
+        tickets, embeddings = [], []
+        for metadata, embedding in zip(metadatas, result["embeddings"]):
+            context = contexts.get(metadata["ticket_id"])
+            if context is None:
+                continue
+            tickets.append(SupportTicket(
+                id=context.ticket_id,
+                query=context.original_query,
+                resolution=context.resolution,
+                category=metadata.get("category"),
+                aliases=records.get(context.ticket_id, {}).get("aliases", [])
+            ))
+            embeddings.append(list(embedding))
+        return tickets, embeddings
+    
+    @_reads_collection
+    def build_quantized_index(self, collection_name: str, precision: str) -> QuantizedIndex:
+        """
+        (Re)build the quantized index of a collection from its stored vectors.
+        
+        Args:
+            collection_name: Name of the ChromaDB collection
+            precision: "float16" or "int8"
+            
+        Returns:
+            The new index
+        """
+        result = self.get_collection(collection_name).get(include=["embeddings", "metadatas"])
+        metadatas = result["metadatas"] or []
+        
+        ids = [m["ticket_id"] for m in metadatas]
+        categories = [m.get("category") for m in metadatas]
+        embeddings = result["embeddings"] if len(metadatas) else []
         
-        return retrieved
+        if self.coordinator.can_write:
+            index = QuantizedIndex.build(
+                directory=index_directory(self.quantized_index_path, collection_name),
+                ids=ids,
+                categories=categories,
+                embeddings=embeddings,
+                precision=precision
+            )
+        else:
+            # Followers keep their own copy in memory instead of racing the leader on disk
+            index = QuantizedIndex.from_embeddings(ids, categories, embeddings, precision)
+        with self._quantized_lock:
+            self._quantized[collection_name] = index
+        return index
+    
+    @_reads_collection
+    def get_quantized_index(self, collection_name: str, precision: str) -> QuantizedIndex:
+        """
+        Get a collection's quantized index, loading or rebuilding it as needed.
+        
+        A build's vectors never change once it is written, so a loaded
+        index stays valid until the build is dropped or the index reloaded
+        (see `_drop_collection` and `reload`); only one read from disk is
+        checked against the collection's size.
+        """
+        with self._quantized_lock:
+            index = self._quantized.get(collection_name)
+            build_lock = self._quantized_build_locks.setdefault(collection_name, threading.Lock())
+        if index is not None and index.precision == precision:
+            return index
+        
+        with build_lock:
+            with self._quantized_lock:
+                index = self._quantized.get(collection_name)
+            if index is not None and index.precision == precision:
+                # Loaded by the search that held the lock before us
+                return index
+            
+            index = QuantizedIndex.load(index_directory(self.quantized_index_path, collection_name))
+            if (
+                index is None
+                or index.precision != precision
+                or len(index) != self.get_collection_count(collection_name)
+            ):
+                return self.build_quantized_index(collection_name, precision)
+            
+            with self._quantized_lock:
+                self._quantized[collection_name] = index
+            return index
+    
+    @_reads_collection
+    def search_quantized_in_collection(
+        self,
+        collection_name: str,
+        query_embedding: list[float],
+        fetch_k: int,
+        precision: str,
+        rescore_k: int,
+        categories: Optional[list[str]] = None
+    ) -> list[SearchCandidate]:
+        """
+        Search a collection through its quantized index.
+        
+        Scans the quantized vectors, then re-scores the best rescore_k
+        hits at full precision.
+        
+        Args:
+            collection_name: Name of the ChromaDB collection
+            query_embedding: Embedding of the user's query
+            fetch_k: Number of candidates to return
+            precision: "float16" or "int8"
+            rescore_k: Number of approximate hits re-scored at full precision
+            categories: Only search these categories' sub-indexes
+            
+        Returns:
+            Candidates (with full-precision embeddings) ordered by similarity
+        """
+        index = self.get_quantized_index(collection_name, precision)
+        return self._search_quantized_index(index, query_embedding, fetch_k, rescore_k, categories)
+    
+    @staticmethod
+    def _search_quantized_index(
+        index: QuantizedIndex,
+        query_embedding: list[float],
+        fetch_k: int,
+        rescore_k: int,
+        categories: Optional[list[str]]
+    ) -> list[SearchCandidate]:
+        """Search an already loaded quantized index; takes no locks"""
+        hits = index.search(query_embedding, k=fetch_k, rescore_k=rescore_k, categories=categories)
+        vectors = index.vectors([row for row, _ in hits])
+        
+        return [
+            SearchCandidate(
+                ticket_id=index.ids[row],
+                category=index.categories[row],
+                similarity_score=round(score, 4),
+                embedding=vector
+            )
+            for (row, score), vector in zip(hits, vectors)
+        ]
+    
+    @classmethod
+    def _search_quantized_index_batch(
+        cls,
+        index: QuantizedIndex,
+        query_embeddings: list[list[float]],
+        fetch_k: int,
+        rescore_k: int,
+        categories: Optional[list[str]]
+    ) -> list[list[SearchCandidate]]:
+        return [
+            cls._search_quantized_index(index, query_embedding, fetch_k, rescore_k, categories)
+            for query_embedding in query_embeddings
+        ]
+    
+    def search_shards(
+        self,
+        collection_names: list[str],
+        query_embeddings: list[list[float]],
+        fetch_k: int,
+        with_embeddings: bool = True,
+        categories: Optional[list[str]] = None,
+        precision: Optional[str] = None,
+        rescore_k: Optional[int] = None
+    ) -> list[list[SearchCandidate]]:
+        """
+        Search several shard collections concurrently and merge the results.
+        
+        Each shard returns its own best fetch_k candidates, so the merged
+        top fetch_k equals that of one unsharded search. Shards that are
+        empty, or hold none of the requested categories, are skipped.
+        
+        Args:
+            collection_names: Shard collections to search
+            query_embeddings: Embeddings of the queries
+            fetch_k: Number of candidates per query
+            with_embeddings: Whether to return candidate embeddings (Chroma shards)
+            categories: Only search tickets in these categories
+            precision: Search the shards' quantized indexes at this precision
+            rescore_k: Quantized hits re-scored at full precision
+            
+        Returns:
+            One candidate list per query, ordered by similarity, each
+            candidate tagged with its shard
+        """
+        if not query_embeddings:
+            return []
+        
+        with self.reading_all(collection_names):
+            # Open shards and indexes here, under the locks; the pool only runs searches
+            searches = {}
+            for name in collection_names:
+                if not self.get_collection_count(name):
+                    continue
+                if categories and not any(self.get_category_counts(name).get(c) for c in categories):
+                    continue
+                if precision in PRECISIONS:
+                    index = self.get_quantized_index(name, precision)
+                    searches[name] = partial(
+                        self._search_quantized_index_batch, index, query_embeddings,
+                        fetch_k, rescore_k or fetch_k, categories
+                    )
+                else:
+                    searches[name] = partial(
+                        self._run_query, self.get_collection(name), query_embeddings,
+                        fetch_k, with_embeddings, categories
+                    )
+            
+            futures = {name: self._shard_executor.submit(search) for name, search in searches.items()}
+            per_shard = {name: future.result() for name, future in futures.items()}
+        
+        merged = []
+        for q in range(len(query_embeddings)):
+            candidates = []
+            for name, batches in per_shard.items():
+                for candidate in batches[q]:
+                    candidate.shard = name
+                    candidates.append(candidate)
+            merged.append(heapq.nlargest(fetch_k, candidates, key=lambda c: c.similarity_score))
+        return merged
+    
+    def hydrate_shard_candidates(self, candidates: list[SearchCandidate]) -> list[RetrievedContext]:
+        """hydrate_candidates for candidates from search_shards, grouped by shard"""
+        by_shard: dict[str, list[SearchCandidate]] = {}
+        for candidate in candidates:
+            by_shard.setdefault(candidate.shard, []).append(candidate)
+        
+        contexts = {}
+        for name, shard_candidates in by_shard.items():
+            for context in self.hydrate_candidates(name, shard_candidates):
+                contexts[context.ticket_id] = context
+        return [contexts[c.ticket_id] for c in candidates if c.ticket_id in contexts]
     
     def clear_collection(self, collection_name: str) -> bool:
         """
-        Clear all data from a specific collection.
+        Clear all data from a specific collection, including the builds
+        kept for rollback.
         
         Returns:
             True if successful
         """
+        self.coordinator.ensure_writable()
+        with self.writing(collection_name):
+            cleared = [self._drop_collection(build) for build in self.aliases.versions(collection_name)]
+            if self.aliases.get(collection_name):
+                self.aliases.remove(collection_name)
+        return cleared[0]
+    
+    def _build_count(self, build: str) -> int:
+        """Tickets in one build, bypassing alias resolution"""
         try:
-            self.client.delete_collection(collection_name)
-            if collection_name in self._collections:
-                del self._collections[collection_name]
-            return True
+            return self.client.get_collection(name=build).count()
         except Exception:
-            return False
+            return 0
     
+    def _drop_collection(self, build: str) -> bool:
+        """Delete one build with its document store and quantized index; True if it existed"""
+        try:
+            self.client.delete_collection(build)
+            deleted = True
+        except Exception:
+            deleted = False
+        with self._lock:
+            self._collections.pop(build, None)
+        self._category_counts.pop(build, None)
+        self.document_store.clear_store(build)
+        with self._quantized_lock:
+            self._quantized.pop(build, None)
+            self._quantized_build_locks.pop(build, None)
+        shutil.rmtree(
+            index_directory(self.quantized_index_path, build),
+            ignore_errors=True
+        )
+        return deleted
+    
+    def list_collection_names(self) -> list[str]:
+        """Names of all collections in the store, with versioned builds listed under their alias"""
+        # Chroma < 0.6 returns collection objects, later versions names
+        builds = [getattr(c, "name", c) for c in self.client.list_collections()]
+        return list(dict.fromkeys(logical_name(name) for name in builds + self.aliases.names()))
+    
+    @_reads_collection
     def get_collection_count(self, collection_name: str) -> int:
         """Get the number of documents in a specific collection"""
         try:
@@ -156,6 +1007,85 @@ class VectorStoreService:
         except Exception:
             return 0
     
+    @_reads_collection
+    def get_memory_usage(self, collection_name: str) -> dict:
+        """
+        Estimated memory taken by a collection once it is loaded.
+        
+        Vector bytes assume float32 storage and index bytes the HNSW base
+        layer; metadata bytes are the JSON size of the stored ids and
+        metadata, extrapolated from the first METADATA_SAMPLE_SIZE rows.
+        Ticket text lives in the document store, which is memory-mapped,
+        so it is reported by its file size. Quantized bytes count a loaded
+        quantized index (codes and scales, plus the full-precision
+        rescoring copy unless it is memory-mapped).
+        """
+        collection = self.get_collection(collection_name)
+        physical_name = self.aliases.resolve(collection_name)
+        vectors = collection.count()
+        dimension = self.get_collection_dimension(collection_name) or 0
+        
+        sample = collection.get(limit=METADATA_SAMPLE_SIZE, include=["metadatas"])
+        sample_metadatas = sample["metadatas"] or []
+        sample_bytes = sum(len(i) for i in sample["ids"]) + sum(len(json.dumps(m)) for m in sample_metadatas)
+        metadata_bytes = round(sample_bytes * vectors / len(sample["ids"])) if sample["ids"] else 0
+        
+        with self._quantized_lock:
+            quantized = self._quantized.get(physical_name)
+            quantized_bytes = _quantized_bytes(quantized) if quantized is not None else 0
+        
+        return {
+            "collection": physical_name,
+            "vectors": vectors,
+            "dimension": dimension,
+            "vector_bytes": vectors * dimension * 4,
+            "index_bytes": vectors * HNSW_M * 2 * 4,
+            "metadata_bytes": metadata_bytes,
+            "document_store_bytes": self.document_store.get_store(physical_name).size_bytes(),
+            "quantized_bytes": quantized_bytes,
+            "cached": physical_name in self._collections,
+        }
+    
+    def get_cache_usage(self) -> dict:
+        """Collections held open and quantized indexes loaded in this process"""
+        with self._lock:
+            open_collections = list(self._collections)
+        with self._quantized_lock:
+            quantized_bytes = sum(_quantized_bytes(index) for index in self._quantized.values())
+            quantized_indexes = len(self._quantized)
+        return {
+            "open_collections": open_collections,
+            "quantized_indexes": quantized_indexes,
+            "quantized_bytes": quantized_bytes,
+        }
+    
+    def _count_categories(self, collection_name: str) -> dict[str, int]:
+        metadatas = self.get_collection(collection_name).get(include=["metadatas"])["metadatas"] or []
+        counts: dict[str, int] = {}
+        for metadata in metadatas:
+            category = metadata.get("category") or "general"
+            counts[category] = counts.get(category, 0) + 1
+        return counts
+    
+    def _refresh_category_counts(self, collection_name: str):
+        """Recount categories after a write and record the result with the collection"""
+        counts = self._count_categories(collection_name)
+        self.document_store.get_store(collection_name).write_category_counts(counts)
+        self._category_counts[collection_name] = counts
+    
+    @_reads_collection
+    def get_category_counts(self, collection_name: str) -> dict[str, int]:
+        """Number of indexed tickets per category"""
+        counts = self._category_counts.get(collection_name)
+        if counts is None:
+            counts = self.document_store.get_store(collection_name).read_category_counts()
+            if counts is None:
+                # Collections indexed before counts were recorded
+                counts = self._count_categories(collection_name)
+            self._category_counts[collection_name] = counts
+        return counts
+    
+    @_reads_collection
     def is_collection_ready(self, collection_name: str) -> bool:
         """Check if a specific collection is ready"""
         try:
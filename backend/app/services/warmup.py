@@ -0,0 +1,150 @@
+"""Warmup - Prepare collections, connections and caches before the worker reports ready"""
+
+import logging
+import threading
+import time
+from typing import Optional
+
+from app.config import get_settings
+from app.services.auto_indexer import AutoIndexerService
+from app.services.capacity import CapacityService
+from app.services.embedding_service import EmbeddingService
+from app.services.openai_client import OpenAIClientService
+from app.services.retriever import RetrieverService
+from app.services.sharding import shard_collections
+from app.services.vector_store import VectorStoreService
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupService:
+    """
+    Runs once at startup, in a background thread, after startup indexing
+    has finished (on a follower, the indexing leader's).
+
+    For every agent it opens the collection, pre-embeds the agent's most
+    frequent questions into the query embedding cache and runs them
+    through the retriever, which loads the vector index, quantized index
+    and document store from disk. It also opens pooled connections to the
+    OpenAI API for the embedding and chat models. Each step is timed;
+    a failing step is reported but does not hold back readiness.
+    """
+
+    _instance: Optional["WarmupService"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        settings = get_settings()
+        self.enabled = settings.warmup_enabled
+        self.top_n = settings.warmup_top_n
+        self.connections = settings.warmup_connections
+
+        self.state = "not_started"
+        self.report: dict = {}
+        self.duration_seconds: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def get_instance(cls) -> "WarmupService":
+        """Get singleton instance of WarmupService"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @property
+    def is_complete(self) -> bool:
+        """Whether warmup has finished (or is disabled)"""
+        return self.state in ("disabled", "done")
+
+    def start_background(self):
+        """Run warmup in a background thread once startup indexing is done"""
+        if not self.enabled:
+            self.state = "disabled"
+            return
+        if self._thread is not None:
+            return
+        self.state = "running"
+        self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def run(self):
+        started = time.perf_counter()
+        auto_indexer = AutoIndexerService.get_instance()
+        auto_indexer.wait_for_startup()
+        indexed = time.perf_counter()
+
+        settings = get_settings()
+        openai_client = OpenAIClientService.get_instance()
+        report = {
+            "waited_for_indexing_seconds": round(indexed - started, 3),
+            "openai": {},
+            "agents": {},
+            "errors": [],
+        }
+
+        models = [settings.embedding_model, settings.llm_model]
+        for agent in auto_indexer.agents_config:
+            models += [m for m in (agent.llm_model, agent.cascade_model) if m and m not in models]
+        try:
+            report["openai"] = openai_client.warm_up(models, self.connections)
+        except Exception as e:
+            logger.warning(f"Warmup: OpenAI connection warmup failed: {e}")
+            report["errors"].append(f"openai: {e}")
+
+        for agent in auto_indexer.agents_config:
+            try:
+                report["agents"][agent.id] = self._warm_agent(agent, auto_indexer)
+            except Exception as e:
+                logger.warning(f"Warmup: agent '{agent.id}' failed: {e}")
+                report["errors"].append(f"{agent.id}: {e}")
+
+        self.report = report
+        self.duration_seconds = round(time.perf_counter() - started, 3)
+        self.state = "done"
+        logger.info(
+            f"Warmup finished in {self.duration_seconds}s "
+            f"({round(time.perf_counter() - indexed, 3)}s after indexing, {len(report['errors'])} errors)"
+        )
+
+        # Caches are loaded now, so the memory summary shows the steady state
+        try:
+            CapacityService.get_instance().log_summary()
+        except Exception as e:
+            logger.warning(f"Capacity summary failed: {e}")
+
+    def _warm_agent(self, agent, auto_indexer: AutoIndexerService) -> dict:
+        """Open, pre-embed and search one agent's collection (every shard)"""
+        vector_store = VectorStoreService.get_instance()
+        timings = {}
+
+        step = time.perf_counter()
+        count = sum(vector_store.get_collection_count(name) for name in shard_collections(agent))
+        timings["collection_seconds"] = round(time.perf_counter() - step, 3)
+        timings["tickets"] = count
+
+        step = time.perf_counter()
+        questions = auto_indexer.frequent_questions(agent, self.top_n)
+        embeddings = EmbeddingService.get_instance().prime(questions, dimensions=agent.embedding_dimensions)
+        timings["questions"] = len(questions)
+        timings["embed_seconds"] = round(time.perf_counter() - step, 3)
+
+        if count and embeddings:
+            step = time.perf_counter()
+            RetrieverService.get_instance().retrieve_batch(agent, embeddings)
+            timings["search_seconds"] = round(time.perf_counter() - step, 3)
+        return timings
+
+    def get_status(self) -> dict:
+        """Warmup state, total duration and per-step timings"""
+        return {
+            "state": self.state,
+            "duration_seconds": self.duration_seconds,
+            **self.report,
+        }
+
+
+def get_warmup() -> WarmupService:
+    """FastAPI dependency for the warmup service"""
+    return WarmupService.get_instance()
@@ -0,0 +1,151 @@
+"""
+Synthetic capacity benchmark: memory and query latency against collection size.
+
+Builds collections of synthetic vectors at several sizes for each search
+backend (the Chroma HNSW index, and the quantized indexes used by agents
+with `vector_precision` float16/int8) and measures the RSS growth of the
+build and the p50/p95 latency of top-k queries. Every measurement runs in
+a fresh process so earlier builds do not distort its RSS.
+
+The report is written where the app reads it (`capacity_benchmark_path`),
+and `/api/admin/capacity` fits it to project query latency at 10x and 100x
+today's ticket counts.
+
+Usage (from backend/):
+    python -m benchmarks.capacity
+    python -m benchmarks.capacity --sizes 1000 10000 100000 --queries 500
+    python -m benchmarks.capacity --backends quantized-int8 --output capacity.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from app.services.capacity import process_rss_bytes
+from app.services.quantized_index import QuantizedIndex
+from benchmarks.embedding_storage import FULL_DIMENSION, percentile_ms, synthetic_embeddings
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_OUTPUT = BACKEND_DIR / "data" / "capacity_benchmark.json"
+
+BACKENDS = ["chroma", "quantized-float16", "quantized-int8"]
+DEFAULT_SIZES = [1000, 5000, 20000]
+
+
+def measure(backend: str, size: int, queries: int, k: int, rescore_factor: int) -> dict:
+    """Build one collection and time queries against it (run in its own process)"""
+    vectors = synthetic_embeddings(size)
+    probes = synthetic_embeddings(queries, seed=1)
+    ids = [str(i) for i in range(size)]
+
+    if backend == "chroma":
+        # Imported ahead of the baseline so the library itself is not counted
+        import chromadb
+        from chromadb.config import Settings as ChromaSettings
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rss_before = process_rss_bytes() or 0
+        started = time.perf_counter()
+        if backend == "chroma":
+            client = chromadb.PersistentClient(path=tmp, settings=ChromaSettings(anonymized_telemetry=False))
+            collection = client.create_collection(
+                name=f"bench-{uuid.uuid4().hex[:8]}",
+                metadata={"hnsw:space": "cosine"}
+            )
+            for start in range(0, size, 5000):
+                collection.add(
+                    ids=ids[start:start + 5000],
+                    embeddings=vectors[start:start + 5000].tolist(),
+                    metadatas=[{"ticket_id": i, "category": "general"} for i in ids[start:start + 5000]]
+                )
+
+            def search(query: np.ndarray):
+                collection.query(query_embeddings=[query.tolist()], n_results=k, include=["metadatas", "distances"])
+        else:
+            precision = backend.split("-", 1)[1]
+            index = QuantizedIndex.build(Path(tmp), ids, [None] * size, vectors, precision)
+
+            def search(query: np.ndarray):
+                index.search(query, k=k, rescore_k=k * rescore_factor)
+        build_seconds = time.perf_counter() - started
+
+        # First queries load the index from disk; time the steady state
+        for query in probes[:10]:
+            search(query)
+        latencies = []
+        for query in probes:
+            start = time.perf_counter()
+            search(query)
+            latencies.append(time.perf_counter() - start)
+        rss_after = process_rss_bytes() or 0
+
+    return {
+        "vectors": size,
+        "build_seconds": round(build_seconds, 3),
+        "p50_ms": percentile_ms(latencies, 50),
+        "p95_ms": percentile_ms(latencies, 95),
+        "rss_bytes": max(0, rss_after - rss_before),
+    }
+
+
+def run_benchmark(backends: list[str], sizes: list[int], queries: int, k: int, rescore_factor: int) -> dict:
+    """Measure every (backend, size) pair, each in a fresh process"""
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for backend in backends:
+        rows = []
+        for size in sorted(sizes):
+            with context.Pool(1) as pool:
+                row = pool.apply(measure, (backend, size, queries, k, rescore_factor))
+            print(f"{backend:>18} {size:>8} vectors: p50 {row['p50_ms']} ms, p95 {row['p95_ms']} ms, "
+                  f"+{row['rss_bytes'] / 2**20:.1f} MB RSS, built in {row['build_seconds']}s")
+            rows.append(row)
+        results[backend] = rows
+    return {
+        "generated_at": time.time(),
+        "dimension": FULL_DIMENSION,
+        "queries": queries,
+        "k": k,
+        "results": results,
+    }
+
+
+def format_markdown(report: dict) -> str:
+    lines = ["| backend | vectors | p50 ms | p95 ms | RSS MB | bytes/vector |", "|---|---|---|---|---|---|"]
+    for backend, rows in report["results"].items():
+        for row in rows:
+            lines.append(
+                f"| {backend} | {row['vectors']} | {row['p50_ms']} | {row['p95_ms']} | "
+                f"{row['rss_bytes'] / 2**20:.1f} | {round(row['rss_bytes'] / row['vectors'])} |"
+            )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="*", default=BACKENDS, choices=BACKENDS, help="Backends to measure")
+    parser.add_argument("--sizes", nargs="*", type=int, default=DEFAULT_SIZES, help="Collection sizes to measure")
+    parser.add_argument("--queries", type=int, default=200, help="Timed queries per collection")
+    parser.add_argument("--k", type=int, default=20, help="Results per query (the retriever's fetch_k)")
+    parser.add_argument("--rescore-factor", type=int, default=4, help="Quantized shortlist size as a multiple of k")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Where to write the report")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.backends, args.sizes, args.queries, args.k, args.rescore_factor)
+    print()
+    print(format_markdown(report))
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Recall and latency report for reduced-dimension and quantized embedding storage.
+
+Compares every (dimension, precision) combination against the current
+full-width float32 Chroma index, using each ticket query of an agent as a
+leave-one-out probe. Recall@k is measured against exact full-precision
+neighbours.
+
+Usage (from backend/):
+    python -m benchmarks.embedding_storage
+    python -m benchmarks.embedding_storage --agents pricing cortex --k 3 --output report.json
+    python -m benchmarks.embedding_storage --synthetic 5000   # no API calls
+"""
+
+import argparse
+import json
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from app.services.quantized_index import QuantizedIndex, normalize
+from app.services.ticket_loader import load_tickets
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+AGENTS_CONFIG = BACKEND_DIR / "app" / "agents_config.json"
+
+FULL_DIMENSION = 1536
+DIMENSIONS = [1536, 1024, 512, 256]
+PRECISIONS = ["float32", "float16", "int8"]
+
+
+def load_agent_queries(agent_ids: list[str]) -> dict[str, list[str]]:
+    """Ticket queries per agent, read from the configured data sources"""
+    with open(AGENTS_CONFIG, "r", encoding="utf-8") as f:
+        agents = json.load(f)["agents"]
+
+    queries = {}
+    for agent in agents:
+        if agent_ids and agent["id"] not in agent_ids:
+            continue
+        tickets = load_tickets(BACKEND_DIR / agent["data_source"])
+        queries[agent["id"]] = [ticket.query for ticket in tickets]
+    return queries
+
+
+def embed_full(texts: list[str]) -> np.ndarray:
+    """Full-width embeddings from the configured embedding model"""
+    from app.services.embedding_service import EmbeddingService
+
+    service = EmbeddingService.get_instance()
+    vectors = []
+    for start in range(0, len(texts), 512):
+        vectors.extend(service.embed_texts(texts[start:start + 512]))
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def synthetic_embeddings(count: int, seed: int = 0) -> np.ndarray:
+    """Clustered random vectors that mimic near-duplicate ticket groups"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, count // 8), FULL_DIMENSION))
+    assignment = rng.integers(0, len(centers), size=count)
+    return (centers[assignment] + 0.35 * rng.normal(size=(count, FULL_DIMENSION))).astype(np.float32)
+
+
+def shorten(vectors: np.ndarray, dimension: int) -> np.ndarray:
+    """
+    Reduce dimension the way the API's `dimensions` parameter does for
+    text-embedding-3 models: keep the leading components and renormalize.
+    """
+    return normalize(vectors[:, :dimension])
+
+
+def exact_neighbours(vectors: np.ndarray, k: int) -> list[set[int]]:
+    """Leave-one-out exact top-k neighbours at full precision"""
+    unit = normalize(vectors)
+    scores = unit @ unit.T
+    np.fill_diagonal(scores, -np.inf)
+    top = np.argpartition(-scores, k, axis=1)[:, :k]
+    return [set(row.tolist()) for row in top]
+
+
+def percentile_ms(samples: list[float], q: float) -> float:
+    return round(float(np.percentile(samples, q)) * 1000, 3)
+
+
+def evaluate_local(
+    vectors: np.ndarray,
+    truth: list[set[int]],
+    dimension: int,
+    precision: str,
+    k: int,
+    rescore_factor: int
+) -> dict:
+    """Recall and latency of one (dimension, precision) setting"""
+    reduced = shorten(vectors, dimension)
+    ids = [str(i) for i in range(len(reduced))]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if precision == "float32":
+            index = QuantizedIndex(ids, [None] * len(ids), reduced, None, reduced, "float32")
+            rescore_k = k + 1
+        else:
+            index = QuantizedIndex.build(Path(tmp), ids, [None] * len(ids), reduced, precision)
+            rescore_k = (k + 1) * rescore_factor
+
+        hits, latencies = 0, []
+        for i, query in enumerate(reduced):
+            start = time.perf_counter()
+            found = index.search(query, k=k + 1, rescore_k=rescore_k)
+            latencies.append(time.perf_counter() - start)
+            neighbours = [row for row, _ in found if row != i][:k]
+            hits += len(truth[i].intersection(neighbours))
+
+        code_bytes = index.codes.nbytes + (index.scales.nbytes if index.scales is not None else 0)
+
+    return {
+        "backend": "numpy" if precision == "float32" else f"quantized-{precision}",
+        "dimension": dimension,
+        "precision": precision,
+        f"recall@{k}": round(hits / (k * len(reduced)), 4),
+        "p50_ms": percentile_ms(latencies, 50),
+        "p95_ms": percentile_ms(latencies, 95),
+        "in_memory_bytes_per_vector": round(code_bytes / len(reduced), 1),
+    }
+
+
+def evaluate_chroma(vectors: np.ndarray, truth: list[set[int]], k: int) -> dict:
+    """Recall and latency of the current full-precision Chroma index"""
+    import chromadb
+    from chromadb.config import Settings as ChromaSettings
+
+    client = chromadb.EphemeralClient(settings=ChromaSettings(anonymized_telemetry=False))
+    collection = client.create_collection(
+        name=f"bench-{uuid.uuid4().hex[:8]}",
+        metadata={"hnsw:space": "cosine"}
+    )
+    ids = [str(i) for i in range(len(vectors))]
+    for start in range(0, len(ids), 5000):
+        collection.add(ids=ids[start:start + 5000], embeddings=vectors[start:start + 5000].tolist())
+
+    hits, latencies = 0, []
+    for i, query in enumerate(vectors):
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[query.tolist()], n_results=k + 1, include=["distances"])
+        latencies.append(time.perf_counter() - start)
+        neighbours = [int(x) for x in result["ids"][0] if int(x) != i][:k]
+        hits += len(truth[i].intersection(neighbours))
+
+    return {
+        "backend": "chroma",
+        "dimension": vectors.shape[1],
+        "precision": "float32",
+        f"recall@{k}": round(hits / (k * len(vectors)), 4),
+        "p50_ms": percentile_ms(latencies, 50),
+        "p95_ms": percentile_ms(latencies, 95),
+        "in_memory_bytes_per_vector": vectors.shape[1] * 4,
+    }
+
+
+def run_report(
+    vector_sets: dict[str, np.ndarray],
+    k: int,
+    rescore_factor: int,
+    include_chroma: bool
+) -> dict:
+    """Evaluate every setting for every agent"""
+    report = {}
+    for agent_id, vectors in vector_sets.items():
+        if len(vectors) <= k + 1:
+            continue
+        truth = exact_neighbours(vectors, k)
+        rows = []
+        if include_chroma:
+            rows.append(evaluate_chroma(vectors, truth, k))
+        for dimension in DIMENSIONS:
+            if dimension > vectors.shape[1]:
+                continue
+            for precision in PRECISIONS:
+                rows.append(evaluate_local(vectors, truth, dimension, precision, k, rescore_factor))
+        report[agent_id] = {"tickets": len(vectors), "results": rows}
+    return report
+
+
+def format_markdown(report: dict, k: int) -> str:
+    lines = []
+    for agent_id, data in report.items():
+        lines.append(f"\n### {agent_id} ({data['tickets']} tickets)\n")
+        lines.append(f"| backend | dim | recall@{k} | p50 ms | p95 ms | bytes/vector |")
+        lines.append("|---|---|---|---|---|---|")
+        for row in data["results"]:
+            lines.append(
+                f"| {row['backend']} | {row['dimension']} | {row[f'recall@{k}']:.3f} | "
+                f"{row['p50_ms']} | {row['p95_ms']} | {row['in_memory_bytes_per_vector']} |"
+            )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", nargs="*", default=[], help="Agent IDs to evaluate (default: all)")
+    parser.add_argument("--k", type=int, default=3, help="Neighbours per query")
+    parser.add_argument("--rescore-factor", type=int, default=4, help="Quantized shortlist size as a multiple of k")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N synthetic vectors instead of agent data")
+    parser.add_argument("--no-chroma", action="store_true", help="Skip the Chroma baseline")
+    parser.add_argument("--output", type=Path, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        vector_sets = {"synthetic": synthetic_embeddings(args.synthetic)}
+    else:
+        vector_sets = {
+            agent_id: embed_full(queries)
+            for agent_id, queries in load_agent_queries(args.agents).items()
+        }
+
+    report = run_report(vector_sets, args.k, args.rescore_factor, not args.no_chroma)
+    print(format_markdown(report, args.k))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Payload size and serialization time of chat responses.
+
+Builds ChatResponses from an agent's real tickets and compares the previous
+encoding (response_model validation, `jsonable` dict and the standard JSON
+response class) with the current one (`model_dump_json` straight to bytes)
+for each `sources` mode, plus the gzip size at the configured level. No API
+calls are made.
+
+Usage (from backend/):
+    python -m benchmarks.response_size
+    python -m benchmarks.response_size --agent cortex --sources 5 --output sizes.json
+"""
+
+import argparse
+import gzip
+import json
+import time
+from pathlib import Path
+
+from fastapi.responses import JSONResponse
+
+from app.config import get_settings
+from app.models.schemas import AgentConfig, ChatResponse, RetrievedContext, sources_exclude
+from app.services import ticket_loader
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+AGENTS_CONFIG = BACKEND_DIR / "app" / "agents_config.json"
+
+ANSWER = (
+    "To change the capability on your opportunity, open the pricing case, go to the opportunity "
+    "details and raise a change request with the pricing support team. They will update it within "
+    "one business day."
+)
+
+
+def build_responses(agent_id: str, sources: int) -> list[ChatResponse]:
+    """One response per window of `sources` consecutive tickets of the agent"""
+    with open(AGENTS_CONFIG, "r", encoding="utf-8") as f:
+        agents = {a["id"]: AgentConfig(**a) for a in json.load(f)["agents"]}
+    tickets = ticket_loader.load_tickets(BACKEND_DIR / agents[agent_id].data_source)
+
+    responses = []
+    for start in range(0, max(1, len(tickets) - sources + 1)):
+        window = tickets[start:start + sources]
+        responses.append(ChatResponse(
+            answer=ANSWER,
+            sources=[
+                RetrievedContext(
+                    ticket_id=t.id,
+                    original_query=t.query,
+                    resolution=t.resolution,
+                    similarity_score=0.9 - 0.05 * rank,
+                    category=t.category,
+                )
+                for rank, t in enumerate(window)
+            ],
+            confidence=0.9,
+            prompt_tokens=850,
+        ))
+    return responses
+
+
+def previous_encoding(response: ChatResponse) -> bytes:
+    """What FastAPI did for a response_model return: re-validate, dump, json.dumps"""
+    validated = ChatResponse.model_validate(response.model_dump())
+    return JSONResponse(validated.model_dump(mode="json")).body
+
+
+def time_per_call(fn, responses: list[ChatResponse], runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        for response in responses:
+            fn(response)
+        best = min(best, time.perf_counter() - started)
+    return best / len(responses)
+
+
+def run_report(responses: list[ChatResponse], runs: int, level: int) -> list[dict]:
+    variants = [("previous (full sources)", previous_encoding)]
+    for mode in ("full", "ids", "none"):
+        exclude = sources_exclude(mode)
+        variants.append((
+            f"model_dump_json (sources={mode})",
+            lambda r, e=exclude: r.model_dump_json(exclude=e).encode()
+        ))
+
+    results = []
+    baseline = None
+    for name, encode in variants:
+        bodies = [encode(r) for r in responses]
+        size = sum(len(b) for b in bodies) / len(bodies)
+        gzipped = sum(len(gzip.compress(b, compresslevel=level)) for b in bodies) / len(bodies)
+        micros = time_per_call(encode, responses, runs) * 1e6
+        baseline = baseline or (size, micros)
+        results.append({
+            "encoding": name,
+            "bytes": round(size),
+            "gzip_bytes": round(gzipped),
+            "serialize_us": round(micros, 1),
+            "size_vs_previous": round(size / baseline[0], 3),
+            "speedup_vs_previous": round(baseline[1] / micros, 2),
+        })
+    return results
+
+
+def format_markdown(results: list[dict], level: int) -> str:
+    lines = [
+        f"| Encoding | Bytes | Gzip bytes (level {level}) | Serialize (us) | Size vs previous | Speedup |",
+        "|----------|-------|-----------------|----------------|------------------|---------|",
+    ]
+    for r in results:
+        lines.append(
+            f"| {r['encoding']} | {r['bytes']} | {r['gzip_bytes']} | {r['serialize_us']} | "
+            f"{r['size_vs_previous']} | {r['speedup_vs_previous']}x |"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agent", default="pricing", help="Agent whose tickets fill the sources")
+    parser.add_argument("--sources", type=int, default=get_settings().retrieval_top_k, help="Sources per response")
+    parser.add_argument("--runs", type=int, default=5, help="Timed passes (best is reported)")
+    parser.add_argument("--output", type=Path, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    level = get_settings().response_gzip_level
+    responses = build_responses(args.agent, args.sources)
+    results = run_report(responses, args.runs, level)
+    print(f"{len(responses)} responses with {args.sources} sources from agent '{args.agent}'\n")
+    print(format_markdown(results, level))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
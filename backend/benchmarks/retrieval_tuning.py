@@ -0,0 +1,436 @@
+"""
+Offline retrieval evaluation and per-agent tuning.
+
+Every agent is scored on two question sets:
+
+- the pricing query log (`data/agents/pricing_query_resolution.json`),
+  with each question's own ticket held out of the index, and
+- hand-written paraphrases (`data/eval/retrieval_paraphrases.json`) that
+  are not in any index, including out-of-scope questions that should be
+  redirected to a human.
+
+A question counts as recalled when any ticket with the same resolution as
+an expected ticket is among the top k. A question is redirected when its
+best similarity is below the threshold, the same rule the chat endpoint
+applies before the LLM gets a say (the LLM can still redirect on its own,
+which this offline run does not model).
+
+Each (backend, k) pair is searched once per question through the same
+over-fetch + MMR path the retriever uses; thresholds are then swept over
+the recorded scores. Embeddings are cached in SQLite, so only the first
+run calls the embedding API.
+
+Usage (from backend/):
+    python -m benchmarks.retrieval_tuning
+    python -m benchmarks.retrieval_tuning --agents pricing cortex --k 1 3 5 --output tuning.json
+    python -m benchmarks.retrieval_tuning --offline     # fail instead of calling the API
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sqlite3
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from app.config import get_settings
+from app.models.schemas import AgentConfig
+from app.services.quantized_index import QuantizedIndex
+from app.services.reranker import mmr_select
+from app.services import ticket_loader
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+AGENTS_CONFIG = BACKEND_DIR / "app" / "agents_config.json"
+QUERY_LOG = BACKEND_DIR / "data" / "agents" / "pricing_query_resolution.json"
+QUERY_LOG_AGENT = "pricing"
+PARAPHRASES = BACKEND_DIR / "data" / "eval" / "retrieval_paraphrases.json"
+DEFAULT_CACHE = BACKEND_DIR / "data" / "eval_cache" / "embeddings.sqlite"
+
+BACKENDS = ["float32", "float16", "int8"]
+DEFAULT_K = [1, 3, 5]
+DEFAULT_THRESHOLDS = [round(0.30 + 0.05 * i, 2) for i in range(11)]
+
+
+@dataclass
+class EvalCase:
+    """One question, the tickets that answer it and the tickets hidden from it"""
+    question: str
+    relevant: set[str]
+    held_out: set[str] = field(default_factory=set)
+    source: str = "paraphrase"
+
+    @property
+    def in_scope(self) -> bool:
+        return bool(self.relevant)
+
+
+class EmbeddingCache:
+    """
+    SQLite cache of embeddings keyed by model, dimensions and text checksum.
+
+    Missing texts are embedded through the app's EmbeddingService and stored,
+    so a repeated run over the same data makes no API calls.
+    """
+
+    def __init__(self, path: Path, model: str, offline: bool = False):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL, dimensions INTEGER NOT NULL, text_sha256 TEXT NOT NULL,"
+            " vector BLOB NOT NULL, PRIMARY KEY (model, dimensions, text_sha256))"
+        )
+        self.model = model
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+
+    def embed(self, texts: list[str], dimensions: Optional[int]) -> np.ndarray:
+        """Embeddings for `texts`, row for row"""
+        keys = [hashlib.sha256(t.encode("utf-8")).hexdigest() for t in texts]
+        found = self._lookup(set(keys), dimensions or 0)
+        missing = list({k: t for k, t in zip(keys, texts) if k not in found}.items())
+        self.hits += len(set(keys)) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            if self.offline:
+                raise SystemExit(f"{len(missing)} texts are not in the embedding cache (--offline)")
+            from app.services.embedding_service import EmbeddingService
+
+            service = EmbeddingService.get_instance()
+            for start in range(0, len(missing), 512):
+                chunk = missing[start:start + 512]
+                vectors = service.embed_texts([t for _, t in chunk], dimensions=dimensions)
+                rows = []
+                for (key, _), vector in zip(chunk, vectors):
+                    found[key] = np.asarray(vector, dtype=np.float32)
+                    rows.append((self.model, dimensions or 0, key, found[key].tobytes()))
+                self.conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+                self.conn.commit()
+
+        return np.stack([found[k] for k in keys])
+
+    def _lookup(self, keys: set[str], dimensions: int) -> dict[str, np.ndarray]:
+        rows = self.conn.execute(
+            "SELECT text_sha256, vector FROM embeddings WHERE model = ? AND dimensions = ?",
+            (self.model, dimensions)
+        )
+        return {
+            key: np.frombuffer(blob, dtype=np.float32)
+            for key, blob in rows if key in keys
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+def load_agents(agent_ids: list[str]) -> list[AgentConfig]:
+    with open(AGENTS_CONFIG, "r", encoding="utf-8") as f:
+        agents = [AgentConfig(**a) for a in json.load(f)["agents"]]
+    return [a for a in agents if not agent_ids or a.id in agent_ids]
+
+
+def load_tickets(agent: AgentConfig) -> list[dict]:
+    """An agent's tickets, read the way the auto-indexer reads them"""
+    return [
+        ticket.model_dump(exclude={"aliases"})
+        for ticket in ticket_loader.load_tickets(BACKEND_DIR / agent.data_source)
+    ]
+
+
+def _normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", re.sub(r"[^a-z0-9 ]", " ", text.lower())).strip()
+
+
+def _equivalent(tickets: list[dict], ids: set[str]) -> set[str]:
+    """Expand ticket ids to every ticket sharing one of their resolutions"""
+    resolutions = {t["resolution"] for t in tickets if t["id"] in ids}
+    return {t["id"] for t in tickets if t["resolution"] in resolutions}
+
+
+def load_cases(agent: AgentConfig, tickets: list[dict]) -> list[EvalCase]:
+    """Evaluation questions for an agent"""
+    cases = []
+    ticket_ids = {t["id"] for t in tickets}
+
+    if agent.id == QUERY_LOG_AGENT and QUERY_LOG.exists():
+        with open(QUERY_LOG, "r", encoding="utf-8") as f:
+            log = json.load(f)
+        # Logged ids that no longer exist are mapped through their logged
+        # resolution to the ids that do
+        known = {}
+        for item in log:
+            if item["id"] in ticket_ids:
+                known.setdefault(item["resolution"], set()).add(item["id"])
+        by_query = {}
+        for t in tickets:
+            by_query.setdefault(_normalize_text(t["query"]), set()).add(t["id"])
+
+        for item in log:
+            ids = {item["id"]} if item["id"] in ticket_ids else known.get(item["resolution"], set())
+            held_out = ({item["id"]} & ticket_ids) | by_query.get(_normalize_text(item["query"]), set())
+            relevant = _equivalent(tickets, ids) - held_out
+            if relevant:
+                cases.append(EvalCase(item["query"].strip(), relevant, held_out, "query_log"))
+
+    with open(PARAPHRASES, "r", encoding="utf-8") as f:
+        for item in json.load(f):
+            if item["agent_id"] == agent.id:
+                cases.append(EvalCase(item["question"], _equivalent(tickets, set(item["relevant"]))))
+    return cases
+
+
+class Backend:
+    """One of the retriever's search paths over an agent's tickets"""
+
+    def __init__(self, name: str, ids: list[str], vectors: np.ndarray, tmp_dir: Path, rescore_factor: int):
+        self.name = name
+        self.ids = ids
+        self.rescore_factor = rescore_factor
+        if name == "float32":
+            import chromadb
+            from chromadb.config import Settings as ChromaSettings
+
+            client = chromadb.EphemeralClient(settings=ChromaSettings(anonymized_telemetry=False))
+            self.collection = client.create_collection(
+                name=f"tuning-{uuid.uuid4().hex[:8]}",
+                metadata={"hnsw:space": "cosine"}
+            )
+            self.collection.add(ids=ids, embeddings=vectors.tolist())
+        else:
+            self.index = QuantizedIndex.build(
+                tmp_dir / f"{name}-{uuid.uuid4().hex[:8]}", ids, [None] * len(ids), vectors, name
+            )
+
+    def search(self, query: np.ndarray, fetch_k: int) -> list[tuple[str, float, list[float]]]:
+        """(ticket id, similarity, embedding) candidates, best first"""
+        if self.name == "float32":
+            result = self.collection.query(
+                query_embeddings=[query.tolist()],
+                n_results=min(fetch_k, len(self.ids)),
+                include=["distances", "embeddings"]
+            )
+            return [
+                (ticket_id, 1 - distance, list(embedding))
+                for ticket_id, distance, embedding in zip(
+                    result["ids"][0], result["distances"][0], result["embeddings"][0]
+                )
+            ]
+        found = self.index.search(query, k=fetch_k, rescore_k=fetch_k * self.rescore_factor)
+        vectors = self.index.vectors([row for row, _ in found])
+        return [(self.index.ids[row], score, v) for (row, score), v in zip(found, vectors)]
+
+
+def retrieve(backend: Backend, query: np.ndarray, case: EvalCase, k: int, fetch_k: int, mmr_lambda: float):
+    """Top-k ticket ids and the best similarity, as the retriever would select them"""
+    candidates = backend.search(query, fetch_k + len(case.held_out))
+    candidates = [c for c in candidates if c[0] not in case.held_out][:fetch_k]
+    if len(candidates) > k:
+        selected = mmr_select(query.tolist(), [c[2] for c in candidates], k=k, lambda_mult=mmr_lambda)
+        candidates = [candidates[i] for i in selected]
+    best = max((c[1] for c in candidates), default=0.0)
+    return [c[0] for c in candidates], best
+
+
+def score(outcomes: list[tuple[EvalCase, bool, float]], threshold: float, miss_cost: float) -> dict:
+    """
+    Quality metrics for one threshold.
+
+    Utility gives +1 for an answered question with a relevant ticket and
+    `-miss_cost` for an answer without one (including answering an
+    out-of-scope question); redirects score 0.
+    """
+    in_scope = [(hit, best) for case, hit, best in outcomes if case.in_scope]
+    out_scope = [best for case, _, best in outcomes if not case.in_scope]
+
+    answered_hit = sum(1 for hit, best in in_scope if best >= threshold and hit)
+    answered_miss = sum(1 for hit, best in in_scope if best >= threshold and not hit)
+    false_redirects = sum(1 for _, best in in_scope if best < threshold)
+    out_answered = sum(1 for best in out_scope if best >= threshold)
+    total = len(outcomes)
+
+    return {
+        "redirect_rate": round((false_redirects + len(out_scope) - out_answered) / total, 4),
+        "false_redirect_rate": round(false_redirects / len(in_scope), 4) if in_scope else None,
+        "out_of_scope_redirect_rate": (
+            round(1 - out_answered / len(out_scope), 4) if out_scope else None
+        ),
+        "answered_correct_rate": round(answered_hit / len(in_scope), 4) if in_scope else None,
+        "utility": round((answered_hit - miss_cost * (answered_miss + out_answered)) / total, 4),
+    }
+
+
+def percentile_ms(samples: list[float], q: float) -> float:
+    return round(float(np.percentile(samples, q)) * 1000, 3)
+
+
+def evaluate_agent(
+    agent: AgentConfig,
+    cache: EmbeddingCache,
+    backends: list[str],
+    k_values: list[int],
+    thresholds: list[float],
+    miss_cost: float
+) -> Optional[dict]:
+    """Every (backend, k, threshold) result for one agent, plus current and suggested settings"""
+    settings = get_settings()
+    tickets = load_tickets(agent)
+    cases = load_cases(agent, tickets)
+    if not tickets or not cases:
+        return None
+
+    dimensions = agent.embedding_dimensions
+    ticket_vectors = cache.embed([t["query"] for t in tickets], dimensions)
+    query_vectors = cache.embed([c.question for c in cases], dimensions)
+    ids = [t["id"] for t in tickets]
+
+    current = {
+        "backend": agent.vector_precision,
+        "k": agent.top_k or settings.retrieval_top_k,
+        "threshold": (
+            agent.similarity_threshold
+            if agent.similarity_threshold is not None
+            else settings.similarity_threshold
+        ),
+    }
+    k_values = sorted(set(k_values) | {current["k"]})
+    thresholds = sorted(set(thresholds) | {current["threshold"]})
+    mmr_lambda = agent.mmr_lambda if agent.mmr_lambda is not None else settings.mmr_lambda
+    in_scope = [c for c in cases if c.in_scope]
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in backends:
+            backend = Backend(name, ids, ticket_vectors, Path(tmp), settings.quantized_rescore_factor)
+            for k in k_values:
+                fetch_k = max(k, agent.fetch_k or settings.retrieval_fetch_k)
+                outcomes, latencies = [], []
+                for case, query in zip(cases, query_vectors):
+                    start = time.perf_counter()
+                    top, best = retrieve(backend, query, case, k, fetch_k, mmr_lambda)
+                    latencies.append(time.perf_counter() - start)
+                    outcomes.append((case, bool(case.relevant.intersection(top)), best))
+
+                recall = sum(1 for case, hit, _ in outcomes if case.in_scope and hit)
+                for threshold in thresholds:
+                    rows.append({
+                        "backend": name,
+                        "k": k,
+                        "threshold": threshold,
+                        "recall@k": round(recall / len(in_scope), 4) if in_scope else None,
+                        **score(outcomes, threshold, miss_cost),
+                        "p50_ms": percentile_ms(latencies, 50),
+                        "p95_ms": percentile_ms(latencies, 95),
+                    })
+
+    # Highest utility wins; ties go to more answered questions, fewer
+    # tickets in the prompt, the agent's current backend, then the more
+    # conservative threshold (latency is too noisy to break ties)
+    suggested = max(rows, key=lambda r: (
+        r["utility"],
+        r["answered_correct_rate"] or 0.0,
+        -r["k"],
+        r["backend"] == current["backend"],
+        r["threshold"]
+    ))
+    baseline = next(
+        (r for r in rows if (r["backend"], r["k"], r["threshold"]) ==
+         (current["backend"], current["k"], current["threshold"])),
+        None
+    )
+
+    return {
+        "tickets": len(tickets),
+        "cases": {
+            "query_log": sum(1 for c in cases if c.source == "query_log"),
+            "paraphrase_in_scope": sum(1 for c in cases if c.source == "paraphrase" and c.in_scope),
+            "out_of_scope": sum(1 for c in cases if not c.in_scope),
+        },
+        "current": baseline,
+        "suggested": suggested,
+        "results": rows,
+    }
+
+
+def suggested_settings(report: dict) -> dict:
+    """`agents_config.json` fields that apply each agent's suggestion"""
+    return {
+        agent_id: {
+            "similarity_threshold": data["suggested"]["threshold"],
+            "top_k": data["suggested"]["k"],
+            "vector_precision": data["suggested"]["backend"],
+        }
+        for agent_id, data in report.items()
+    }
+
+
+def format_markdown(report: dict, top: int) -> str:
+    lines = []
+    columns = ["backend", "k", "threshold", "recall@k", "redirect_rate", "false_redirect_rate",
+               "out_of_scope_redirect_rate", "utility", "p50_ms", "p95_ms"]
+    for agent_id, data in report.items():
+        cases = data["cases"]
+        lines.append(
+            f"\n### {agent_id} ({data['tickets']} tickets; {cases['query_log']} logged, "
+            f"{cases['paraphrase_in_scope']} paraphrased, {cases['out_of_scope']} out-of-scope questions)\n"
+        )
+        lines.append("| setting | " + " | ".join(columns) + " |")
+        lines.append("|---" * (len(columns) + 1) + "|")
+        labelled = [("current", data["current"]), ("suggested", data["suggested"])]
+        ranked = [r for r in data["results"] if r is not data["current"] and r is not data["suggested"]]
+        labelled += [("", row) for row in sorted(ranked, key=lambda r: -r["utility"])[:top]]
+        for label, row in labelled:
+            if row is None:
+                continue
+            cells = ["-" if row[c] is None else str(row[c]) for c in columns]
+            lines.append(f"| {label} | " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", nargs="*", default=[], help="Agent IDs to evaluate (default: all)")
+    parser.add_argument("--k", nargs="+", type=int, default=DEFAULT_K, help="top_k values to try")
+    parser.add_argument("--thresholds", nargs="+", type=float, default=DEFAULT_THRESHOLDS,
+                        help="Similarity thresholds to try")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS,
+                        help="float32 searches Chroma; float16/int8 the quantized index")
+    parser.add_argument("--miss-cost", type=float, default=2.0,
+                        help="Cost of a wrong answer relative to the value of a right one")
+    parser.add_argument("--cache", type=Path, default=DEFAULT_CACHE, help="Embedding cache file")
+    parser.add_argument("--offline", action="store_true", help="Fail instead of calling the embedding API")
+    parser.add_argument("--top", type=int, default=5, help="Best settings to list per agent")
+    parser.add_argument("--output", type=Path, help="Write the full report as JSON")
+    args = parser.parse_args()
+
+    cache = EmbeddingCache(args.cache, get_settings().embedding_model, offline=args.offline)
+    try:
+        report = {}
+        for agent in load_agents(args.agents):
+            result = evaluate_agent(agent, cache, args.backends, args.k, args.thresholds, args.miss_cost)
+            if result is not None:
+                report[agent.id] = result
+    finally:
+        cache.close()
+
+    print(format_markdown(report, args.top))
+    print(f"\nEmbeddings: {cache.hits} cached, {cache.misses} fetched from the API")
+    print("\nSuggested agents_config.json settings:")
+    print(json.dumps(suggested_settings(report), indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"agents": report, "suggested_settings": suggested_settings(report)}, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Cold start report: import time, time to liveness/readiness and time to the
+first successful chat.
+
+Import time is measured in fresh interpreters with `-X importtime`, so it
+includes every module `app.main` pulls in. Server timings start a real
+uvicorn process and poll it from the moment it is spawned.
+
+Usage (from backend/):
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 5 --agent pricing --output startup.json
+    python -m benchmarks.startup --fresh        # empty data dirs: includes indexing
+    python -m benchmarks.startup --no-server    # import time only, no API calls
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+AGENTS_CONFIG = BACKEND_DIR / "app" / "agents_config.json"
+
+# Packages whose import cost is reported separately, and which should stay
+# out of `app.main`'s import graph until first use
+TRACKED_PACKAGES = ["fastapi", "pydantic", "numpy", "httpx", "openai", "chromadb"]
+DEFERRED_PACKAGES = ["openai", "chromadb"]
+
+POLL_INTERVAL = 0.005
+
+
+def measure_import(runs: int) -> dict:
+    """Import `app.main` in fresh interpreters and break down the cost"""
+    code = (
+        "import json, sys, app.main; "
+        f"print(json.dumps([m for m in {DEFERRED_PACKAGES!r} if m in sys.modules]))"
+    )
+    totals, packages, loaded = [], {name: [] for name in TRACKED_PACKAGES}, []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=BACKEND_DIR, env=_env(), capture_output=True, text=True, check=True
+        )
+        cumulative = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cum, name = line[len("import time:"):].split("|")
+            if cum.strip().isdigit():
+                cumulative[name.strip()] = int(cum) / 1000.0
+        totals.append(cumulative.get("app.main", 0.0))
+        for name in TRACKED_PACKAGES:
+            if name in cumulative:
+                packages[name].append(cumulative[name])
+        loaded = json.loads(result.stdout.strip().splitlines()[-1])
+
+    return {
+        "runs": runs,
+        "app_main_ms": round(statistics.median(totals), 1),
+        "packages_ms": {
+            name: round(statistics.median(values), 1)
+            for name, values in packages.items() if values
+        },
+        "deferred_packages_loaded": loaded,
+    }
+
+
+def measure_server(agent_id: str, question: str, fresh: bool, chat: bool, timeout: float) -> dict:
+    """Start uvicorn and time liveness, readiness and the first successful chat"""
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = _env()
+    data_dir = None
+    if fresh:
+        data_dir = tempfile.TemporaryDirectory()
+        for name, sub in [
+            ("CHROMA_DB_PATH", "chroma_db"),
+            ("DOCUMENT_STORE_PATH", "doc_store"),
+            ("QUANTIZED_INDEX_PATH", "quantized_index"),
+            ("COORDINATION_PATH", "coordination"),
+        ]:
+            env[name] = str(Path(data_dir.name) / sub)
+
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env
+    )
+    timings = {"fresh_data": fresh}
+    try:
+        with httpx.Client(base_url=base_url, timeout=timeout) as client:
+            deadline = started + timeout
+            timings["live_s"] = _wait_for(lambda: client.get("/healthz"), started, deadline)
+            timings["ready_s"] = _wait_for(lambda: client.get("/readyz"), started, deadline)
+            if chat:
+                request_started = time.perf_counter()
+                response = client.post("/api/chat", json={"agent_id": agent_id, "question": question})
+                response.raise_for_status()
+                timings["first_chat_s"] = round(time.perf_counter() - started, 3)
+                timings["first_chat_latency_s"] = round(time.perf_counter() - request_started, 3)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+        if data_dir is not None:
+            data_dir.cleanup()
+    return timings
+
+
+def _wait_for(request, started: float, deadline: float) -> float:
+    """Poll until the request returns 200; seconds since `started`"""
+    while time.perf_counter() < deadline:
+        try:
+            if request().status_code == 200:
+                return round(time.perf_counter() - started, 3)
+        except httpx.TransportError:
+            pass
+        time.sleep(POLL_INTERVAL)
+    raise TimeoutError("Server did not become available in time")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(BACKEND_DIR), env.get("PYTHONPATH")]))
+    return env
+
+
+def default_agent() -> str:
+    with open(AGENTS_CONFIG, "r", encoding="utf-8") as f:
+        return json.load(f)["agents"][0]["id"]
+
+
+def format_markdown(report: dict) -> str:
+    imports = report["import"]
+    lines = [
+        f"\n### Import (median of {imports['runs']} runs)\n",
+        "| module | cumulative ms |",
+        "|---|---|",
+        f"| app.main | {imports['app_main_ms']} |",
+    ]
+    lines += [f"| {name} | {ms} |" for name, ms in imports["packages_ms"].items()]
+    loaded = imports["deferred_packages_loaded"]
+    lines.append(f"\nDeferred packages loaded by import: {', '.join(loaded) if loaded else 'none'}")
+
+    server = report.get("server")
+    if server:
+        lines += [
+            f"\n### Server ({'fresh data' if server['fresh_data'] else 'existing index'})\n",
+            "| milestone | seconds after spawn |",
+            "|---|---|",
+            f"| /healthz 200 | {server['live_s']} |",
+            f"| /readyz 200 | {server['ready_s']} |",
+        ]
+        if "first_chat_s" in server:
+            lines.append(f"| first successful chat | {server['first_chat_s']} |")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters for the import measurement")
+    parser.add_argument("--agent", help="Agent to chat with (default: first configured agent)")
+    parser.add_argument("--question", default="How do I reset my password?", help="Question for the first chat")
+    parser.add_argument("--fresh", action="store_true", help="Start from empty data directories")
+    parser.add_argument("--no-server", action="store_true", help="Only measure import time")
+    parser.add_argument("--no-chat", action="store_true", help="Stop at readiness; no OpenAI calls")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds to wait for each milestone")
+    parser.add_argument("--output", type=Path, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    report = {"import": measure_import(args.runs)}
+    if not args.no_server:
+        report["server"] = measure_server(
+            agent_id=args.agent or default_agent(),
+            question=args.question,
+            fresh=args.fresh,
+            chat=not args.no_chat,
+            timeout=args.timeout
+        )
+    print(format_markdown(report))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Parse throughput of ticket files: JSON arrays, NDJSON and CSV.
+
+Writes synthetic tickets (or uses the given files) and times
+`ticket_loader.load_tickets` with orjson (when installed) and with the
+standard-library parser, against the previous loader (`json.load` plus one
+SupportTicket per row). Times are the best of `--runs`; speedup is relative
+to the first loader listed for the same file.
+
+Usage (from backend/):
+    python -m benchmarks.ticket_loading
+    python -m benchmarks.ticket_loading --tickets 500000 --runs 5 --output loading.json
+    python -m benchmarks.ticket_loading --files data/agents/pricing_tickets.json
+"""
+
+import argparse
+import csv
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from app.models.schemas import SupportTicket
+from app.services import ticket_loader
+
+WORDS = (
+    "pricing case opportunity client cortex approval rate consultant office staffing "
+    "access error dropdown teamlet capability industry partner linked missing wrong "
+    "update request tool login export sync dashboard webhook role permission"
+).split()
+
+
+def synthetic_rows(n: int, seed: int = 0) -> list[dict]:
+    """Tickets with query/resolution lengths similar to the agent data files"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        rows.append({
+            "id": f"T{i:07d}",
+            "query": " ".join(rng.choices(WORDS, k=rng.randint(6, 20))),
+            "resolution": " ".join(rng.choices(WORDS, k=rng.randint(20, 80))),
+            "category": rng.choice(["access", "cortex", "approval", "data", None]),
+        })
+    return rows
+
+
+def write_files(rows: list[dict], directory: Path) -> list[Path]:
+    json_path = directory / "tickets.json"
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(rows, f)
+
+    ndjson_path = directory / "tickets.ndjson"
+    with open(ndjson_path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+
+    csv_path = directory / "tickets.csv"
+    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["id", "query", "resolution", "category"])
+        writer.writeheader()
+        writer.writerows(rows)
+    return [json_path, ndjson_path, csv_path]
+
+
+def previous_loader(path: Path) -> list[SupportTicket]:
+    """The loader this module replaced, kept as the baseline"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    tickets = []
+    for item in data:
+        ticket = SupportTicket(
+            id=str(item.get("id", "")),
+            query=item.get("query", item.get("question", "")),
+            resolution=item.get("resolution", item.get("answer", "")),
+            category=item.get("category")
+        )
+        if ticket.query and ticket.resolution:
+            tickets.append(ticket)
+    return tickets
+
+
+def best_time(fn, path: Path, runs: int) -> tuple[float, int]:
+    best, count = float("inf"), 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        count = len(fn(path))
+        best = min(best, time.perf_counter() - started)
+    return best, count
+
+
+def run_report(paths: list[Path], runs: int) -> list[dict]:
+    installed = ticket_loader.orjson
+    parsers = {"stdlib": None}
+    if installed is not None:
+        parsers["orjson"] = installed
+
+    results = []
+    try:
+        for path in paths:
+            fmt = ticket_loader.detect_format(path.name)
+            size_mb = path.stat().st_size / 1e6
+            # (name, loader, orjson module the loader sees)
+            variants = []
+            if fmt == "json":
+                variants.append(("previous (json.load + per-row model)", previous_loader, None))
+            for name, module in parsers.items():
+                # CSV never touches the JSON parser
+                if fmt != "csv" or module is None:
+                    variants.append((f"load_tickets ({name})", ticket_loader.load_tickets, module))
+
+            baseline = None
+            for name, loader, module in variants:
+                ticket_loader.orjson = module
+                seconds, count = best_time(loader, path, runs)
+                baseline = baseline or seconds
+                results.append({
+                    "file": path.name,
+                    "format": fmt,
+                    "loader": name,
+                    "tickets": count,
+                    "size_mb": round(size_mb, 2),
+                    "seconds": round(seconds, 4),
+                    "tickets_per_second": round(count / seconds) if seconds else None,
+                    "mb_per_second": round(size_mb / seconds, 1) if seconds else None,
+                    "speedup": round(baseline / seconds, 2) if seconds else None,
+                })
+    finally:
+        ticket_loader.orjson = installed
+    return results
+
+
+def format_markdown(results: list[dict]) -> str:
+    lines = [
+        "| File | Loader | Tickets | MB | Seconds | Tickets/s | MB/s | Speedup |",
+        "|------|--------|---------|----|---------|-----------|------|---------|",
+    ]
+    for r in results:
+        lines.append(
+            f"| {r['file']} | {r['loader']} | {r['tickets']} | {r['size_mb']} | {r['seconds']} | "
+            f"{r['tickets_per_second']} | {r['mb_per_second']} | {r['speedup']}x |"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=100_000, help="Synthetic tickets per file")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per loader (best is reported)")
+    parser.add_argument("--files", nargs="*", type=Path, default=[], help="Ticket files to load instead of synthetic ones")
+    parser.add_argument("--output", type=Path, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    if ticket_loader.orjson is None:
+        print("orjson is not installed; only the standard-library parser is measured\n")
+
+    if args.files:
+        results = run_report(args.files, args.runs)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = write_files(synthetic_rows(args.tickets), Path(tmp))
+            results = run_report(paths, args.runs)
+    print(format_markdown(results))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
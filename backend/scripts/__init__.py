@@ -0,0 +1 @@
+"""Maintenance scripts for the support agent backend"""
@@ -0,0 +1,107 @@
+"""
+Export, verify and load prebuilt index snapshots.
+
+A snapshot holds an agent's ticket records, their embeddings, the
+embedding model and checksums. At startup the auto-indexer loads a
+snapshot that matches the agent's data file instead of re-embedding it.
+
+Usage (from backend/):
+    python -m scripts.index_snapshots export                  # all agents
+    python -m scripts.index_snapshots export --agents pricing
+    python -m scripts.index_snapshots verify
+    python -m scripts.index_snapshots load --agents pricing   # reindex from snapshot
+"""
+
+import argparse
+import sys
+
+from app.services.auto_indexer import AutoIndexerService
+from app.services.coordination import ReadOnlyWorkerError
+from app.services.index_snapshot import (
+    SnapshotError,
+    file_sha256,
+    read_snapshot,
+    snapshot_path,
+    stale_reason,
+)
+
+
+def select_agents(indexer: AutoIndexerService, agent_ids: list[str]):
+    agents = [a for a in indexer.get_agents() if not agent_ids or a.id in agent_ids]
+    unknown = set(agent_ids) - {a.id for a in agents}
+    if unknown:
+        sys.exit(f"Unknown agents: {', '.join(sorted(unknown))}")
+    return agents
+
+
+def export(indexer: AutoIndexerService, agent_ids: list[str]) -> int:
+    failures = 0
+    for agent in select_agents(indexer, agent_ids):
+        try:
+            # Builds the index if the collection is empty or has the wrong dimension
+            # (all tickets are re-embedded then); an indexed agent is exported as is
+            indexer.index_agent(agent, force=False)
+            manifest = indexer.export_snapshot(agent)
+        except (ValueError, ReadOnlyWorkerError) as e:
+            print(f"{agent.id}: FAILED - {e}")
+            failures += 1
+            continue
+        path = snapshot_path(indexer.snapshot_root, agent.id)
+        print(f"{agent.id}: {manifest['count']} vectors x {manifest['dimension']} -> {path}")
+    return failures
+
+
+def verify(indexer: AutoIndexerService, agent_ids: list[str]) -> int:
+    failures = 0
+    for agent in select_agents(indexer, agent_ids):
+        path = snapshot_path(indexer.snapshot_root, agent.id)
+        if not path.exists():
+            print(f"{agent.id}: missing")
+            failures += 1
+            continue
+        try:
+            snapshot = read_snapshot(path)
+        except SnapshotError as e:
+            print(f"{agent.id}: INVALID - {e}")
+            failures += 1
+            continue
+        reason = stale_reason(
+            snapshot.manifest,
+            embedding_model=indexer.embedding_service.model,
+            requested_dimensions=agent.embedding_dimensions,
+            source_sha256=file_sha256(indexer._data_source_path(agent.data_source))
+        )
+        if reason:
+            print(f"{agent.id}: STALE - {reason}")
+            failures += 1
+        else:
+            print(f"{agent.id}: ok ({len(snapshot.tickets)} vectors)")
+    return failures
+
+
+def load(indexer: AutoIndexerService, agent_ids: list[str]) -> int:
+    failures = 0
+    for agent in select_agents(indexer, agent_ids):
+        try:
+            count = indexer.index_agent(agent, force=True)
+        except ReadOnlyWorkerError as e:
+            print(f"{agent.id}: FAILED - {e}")
+            failures += 1
+            continue
+        print(f"{agent.id}: {count} tickets indexed")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["export", "verify", "load"])
+    parser.add_argument("--agents", nargs="*", default=[], help="Agent IDs (default: all)")
+    args = parser.parse_args()
+
+    indexer = AutoIndexerService.get_instance()
+    command = {"export": export, "verify": verify, "load": load}[args.command]
+    sys.exit(1 if command(indexer, args.agents) else 0)
+
+
+if __name__ == "__main__":
+    main()
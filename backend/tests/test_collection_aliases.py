@@ -0,0 +1,80 @@
+"""Tests for the collection alias registry"""
+
+import time
+
+import pytest
+
+from app.services.collection_aliases import CollectionAliases, logical_name
+
+
+@pytest.fixture
+def aliases(tmp_path) -> CollectionAliases:
+    return CollectionAliases(tmp_path / "aliases.json")
+
+
+def test_unaliased_names_resolve_to_themselves(aliases):
+    assert aliases.resolve("kb") == "kb"
+    assert aliases.versions("kb") == ["kb"]
+    assert aliases.get("kb") is None
+
+
+def test_swap_points_the_name_at_the_new_build(aliases):
+    first = aliases.next_version("kb")
+    assert first == "kb__v1"
+    assert aliases.resolve("kb") == "kb"
+
+    assert aliases.swap("kb", first) == "kb"
+    second = aliases.next_version("kb")
+    assert aliases.swap("kb", second) == first
+
+    assert aliases.resolve("kb") == "kb__v2"
+    assert aliases.versions("kb") == ["kb__v2", "kb__v1", "kb"]
+    assert logical_name(second) == "kb"
+
+
+def test_rollback_can_be_undone(aliases):
+    aliases.swap("kb", aliases.next_version("kb"))
+    aliases.swap("kb", aliases.next_version("kb"))
+
+    assert aliases.rollback("kb") == "kb__v2"
+    assert aliases.resolve("kb") == "kb__v1"
+    assert aliases.versions("kb")[:2] == ["kb__v1", "kb__v2"]
+
+    aliases.rollback("kb")
+    assert aliases.resolve("kb") == "kb__v2"
+
+
+def test_rollback_without_previous_build(aliases):
+    with pytest.raises(ValueError):
+        aliases.rollback("kb")
+
+    aliases.swap("kb", aliases.next_version("kb"))
+    aliases.forget("kb", "kb")
+    with pytest.raises(ValueError):
+        aliases.rollback("kb")
+
+
+def test_replaced_builds_expire_after_the_grace_period(aliases):
+    aliases.swap("kb", aliases.next_version("kb"))
+    assert aliases.expired(grace_seconds=60) == []
+
+    time.sleep(0.05)
+    assert aliases.expired(grace_seconds=0.01) == [("kb", "kb")]
+
+    aliases.forget("kb", "kb")
+    assert aliases.expired(grace_seconds=0) == []
+    assert aliases.versions("kb") == ["kb__v1"]
+
+
+def test_registry_is_shared_through_the_file(aliases, tmp_path):
+    aliases.swap("kb", aliases.next_version("kb"))
+    other = CollectionAliases(tmp_path / "aliases.json")
+    assert other.resolve("kb") == "kb__v1"
+
+    # Writes re-read the file, so version numbers never collide
+    assert other.next_version("kb") == "kb__v2"
+    assert aliases.next_version("kb") == "kb__v3"
+
+    other.remove("kb")
+    aliases.load()
+    assert aliases.resolve("kb") == "kb"
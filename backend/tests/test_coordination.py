@@ -0,0 +1,47 @@
+"""Tests for worker coordination"""
+
+import json
+import os
+
+import pytest
+
+from app.config import get_settings
+from app.services.coordination import WorkerCoordinator
+
+
+@pytest.fixture
+def coordinators(monkeypatch, tmp_path):
+    """A leader and a follower sharing one coordination directory"""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("COORDINATION_PATH", str(tmp_path))
+    monkeypatch.delenv("CHROMA_SERVER_HOST", raising=False)
+    get_settings.cache_clear()
+    leader, follower = WorkerCoordinator(), WorkerCoordinator()
+    assert leader.try_become_leader()
+    assert not follower.try_become_leader()
+    yield leader, follower
+    leader.release_leadership()
+    follower.release_leadership()
+    get_settings.cache_clear()
+
+
+def test_follower_sees_the_end_of_startup_indexing(coordinators):
+    leader, follower = coordinators
+    assert follower.leader_startup_state() is None
+
+    leader.publish_startup_state("done")
+    assert follower.leader_startup_state() == "done"
+
+
+def test_record_of_an_earlier_leader_is_ignored(coordinators):
+    _, follower = coordinators
+    with open(follower.startup_path, "w", encoding="utf-8") as f:
+        json.dump({"state": "done", "leader_pid": os.getpid() + 1}, f)
+    assert follower.leader_startup_state() is None
+
+
+def test_follower_takes_over_from_an_exited_leader(coordinators):
+    leader, follower = coordinators
+    leader.release_leadership()
+    assert follower.try_become_leader()
+    assert follower.is_leader
@@ -0,0 +1,76 @@
+"""Tests for ticket deduplication"""
+
+import numpy as np
+
+from app.models.schemas import SupportTicket
+from app.services.deduplicator import deduplicate
+
+
+def ticket(ticket_id: str, query: str, resolution: str = "Reset it from the settings page") -> SupportTicket:
+    return SupportTicket(id=ticket_id, query=query, resolution=resolution)
+
+
+def unit_vectors(count: int, dimension: int = 16, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).normal(size=(count, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_exact_duplicates_ignore_case_and_spacing():
+    tickets = [
+        ticket("1", "How do I reset my password?"),
+        ticket("2", "  how do I   reset my PASSWORD? "),
+        ticket("3", "How do I reset my password?", resolution="Contact support"),
+    ]
+    result = deduplicate(tickets, unit_vectors(3), threshold=2.0)
+
+    assert len(result.tickets) == 2
+    assert sorted([result.tickets[0].id] + result.tickets[0].aliases) == ["1", "2"]
+    assert result.tickets[1].id == "3"
+    assert result.exact_duplicates == 1
+    assert result.near_duplicates == 0
+    assert result.summary()["tickets_out"] == 2
+
+
+def test_near_duplicates_need_the_same_resolution():
+    vectors = unit_vectors(3)
+    vectors[1] = vectors[0] + 0.01
+    vectors[2] = vectors[0] + 0.01
+    tickets = [
+        ticket("1", "Reset password"),
+        ticket("2", "Password reset please"),
+        ticket("3", "Password reset please!", resolution="Contact support"),
+    ]
+    result = deduplicate(tickets, vectors, threshold=0.95)
+
+    assert len(result.tickets) == 2
+    assert sorted([result.tickets[0].id] + result.tickets[0].aliases) == ["1", "2"]
+    assert result.tickets[1].id == "3"
+    assert result.near_duplicates == 1
+
+
+def test_deduplicating_twice_is_a_no_op():
+    tickets = [ticket(str(i), "Same question") for i in range(5)]
+    once = deduplicate(tickets, unit_vectors(5), threshold=0.95)
+    twice = deduplicate(once.tickets, once.embeddings, threshold=0.95)
+
+    assert len(twice.tickets) == 1
+    assert sorted([twice.tickets[0].id] + twice.tickets[0].aliases) == ["0", "1", "2", "3", "4"]
+    assert twice.input_count == 5
+    assert twice.merged == 4
+
+
+def test_tiled_comparison_matches_a_single_tile():
+    # Clusters of rephrasings spread across the input, so merges cross tile boundaries
+    rng = np.random.default_rng(1)
+    centers = unit_vectors(7, seed=2)
+    labels = rng.integers(0, len(centers), size=60)
+    vectors = centers[labels] + rng.normal(scale=0.01, size=(60, 16)).astype(np.float32)
+    tickets = [ticket(str(i), f"question {i}", resolution=f"answer {label}") for i, label in enumerate(labels)]
+
+    whole = deduplicate(tickets, vectors, threshold=0.95, block_size=1024)
+    for block_size in (1, 7, 16, 59):
+        tiled = deduplicate(tickets, vectors, threshold=0.95, block_size=block_size)
+        assert [t.id for t in tiled.tickets] == [t.id for t in whole.tickets]
+        assert [sorted(t.aliases) for t in tiled.tickets] == [sorted(t.aliases) for t in whole.tickets]
+        assert tiled.near_duplicates == whole.near_duplicates
+    assert len(whole.tickets) == len(set(labels))
@@ -0,0 +1,88 @@
+"""Tests for the OpenAI rate limiter"""
+
+import time
+
+import pytest
+
+from app.config import get_settings
+from app.services.deadline import Deadline, DeadlineExceededError
+from app.services.rate_limiter import BACKGROUND, INTERACTIVE, Budget, RateLimitedError, RateLimiter
+
+
+@pytest.fixture
+def limiter(monkeypatch) -> RateLimiter:
+    """A limiter allowing one chat request per minute, and waiting at most 0.2s"""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("WORKERS", "1")
+    monkeypatch.setenv("CHAT_RPM_LIMIT", "1")
+    monkeypatch.setenv("CHAT_TPM_LIMIT", "1000")
+    monkeypatch.setenv("RATE_LIMIT_MAX_WAIT_SECONDS", "0.2")
+    get_settings.cache_clear()
+    yield RateLimiter()
+    get_settings.cache_clear()
+
+
+def test_background_leaves_the_interactive_reserve():
+    budget = Budget("chat", rpm=10, tpm=0, interactive_reserve=0.2)
+    for _ in range(8):
+        assert budget.can_take(0, BACKGROUND)
+        budget.take(time.monotonic(), 0, BACKGROUND)
+
+    # Two requests left: background needs the reserve of two on top of its own
+    assert not budget.can_take(0, BACKGROUND)
+    assert budget.can_take(0, INTERACTIVE)
+    budget.take(time.monotonic(), 0, INTERACTIVE)
+    budget.take(time.monotonic(), 0, INTERACTIVE)
+    assert not budget.can_take(0, INTERACTIVE)
+
+
+def test_background_yields_to_waiting_interactive_calls():
+    budget = Budget("chat", rpm=10, tpm=1000, interactive_reserve=0.2)
+    assert budget.can_take(100, BACKGROUND)
+    budget.waiting[INTERACTIVE] += 1
+    assert not budget.can_take(100, BACKGROUND)
+    assert budget.can_take(100, INTERACTIVE)
+
+
+def test_token_budget_reserve():
+    budget = Budget("embeddings", rpm=0, tpm=1000, interactive_reserve=0.2)
+    budget.take(time.monotonic(), 750, INTERACTIVE)
+    assert not budget.can_take(100, BACKGROUND)
+    assert budget.can_take(100, INTERACTIVE)
+    assert budget.wait_seconds(100, BACKGROUND) > 0
+
+
+def test_interactive_call_is_rejected_after_max_wait(limiter):
+    limiter.acquire("chat", 10)
+    started = time.monotonic()
+    with pytest.raises(RateLimitedError) as excinfo:
+        limiter.acquire("chat", 10)
+    assert time.monotonic() - started < 1.0
+    assert excinfo.value.budget == "chat"
+    assert excinfo.value.retry_after > 0.2
+    assert limiter.budgets["chat"].waiting[INTERACTIVE] == 0
+
+
+def test_refund_returns_the_budget(limiter):
+    reservation = limiter.acquire("chat", 10)
+    limiter.refund(reservation)
+    limiter.acquire("chat", 10)
+    assert limiter.get_stats()["budgets"]["chat"]["last_minute"][INTERACTIVE]["requests"] == 1
+
+
+def test_settle_corrects_the_token_estimate(limiter):
+    reservation = limiter.acquire("chat", 100)
+    limiter.settle(reservation, 400)
+    stats = limiter.get_stats()["budgets"]["chat"]
+    assert stats["tokens_available"] == 600
+    assert stats["last_minute"][INTERACTIVE]["tokens"] == 400
+
+
+def test_wait_is_capped_by_the_request_deadline(limiter):
+    limiter.max_wait = 30.0
+    limiter.acquire("chat", 10)
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        limiter.acquire("chat", 10, deadline=Deadline(0.2))
+    assert time.monotonic() - started < 1.0
+    assert limiter.budgets["chat"].waiting[INTERACTIVE] == 0
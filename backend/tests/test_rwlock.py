@@ -0,0 +1,137 @@
+"""Tests for the reader/writer lock"""
+
+import threading
+import time
+
+import pytest
+
+from app.services.rwlock import ReadWriteLock
+
+
+def run_in_thread(fn) -> threading.Thread:
+    thread = threading.Thread(target=fn, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_read_is_reentrant():
+    lock = ReadWriteLock()
+    with lock.read():
+        with lock.read():
+            assert lock.held_by_current_thread()
+        assert lock.held_by_current_thread()
+    assert not lock.held_by_current_thread()
+
+
+def test_readers_share_the_lock():
+    lock = ReadWriteLock()
+    inside = threading.Barrier(3, timeout=2)
+
+    def reader():
+        with lock.read():
+            inside.wait()
+
+    threads = [run_in_thread(reader) for _ in range(2)]
+    # Would time out (BrokenBarrierError) if readers excluded each other
+    with lock.read():
+        inside.wait()
+    for thread in threads:
+        thread.join(2)
+
+
+def test_reentrant_read_is_not_blocked_by_waiting_writer():
+    lock = ReadWriteLock()
+    writer_done = threading.Event()
+
+    def writer():
+        with lock.write():
+            writer_done.set()
+
+    with lock.read():
+        thread = run_in_thread(writer)
+        time.sleep(0.05)
+        # A writer is waiting, but this thread already reads: no deadlock
+        with lock.read():
+            assert not writer_done.is_set()
+    thread.join(2)
+    assert writer_done.is_set()
+
+
+def test_writer_waits_for_readers():
+    lock = ReadWriteLock()
+    release_reader = threading.Event()
+    reading = threading.Event()
+    wrote = threading.Event()
+
+    def reader():
+        with lock.read():
+            reading.set()
+            release_reader.wait(2)
+
+    def writer():
+        with lock.write():
+            wrote.set()
+
+    reader_thread = run_in_thread(reader)
+    reading.wait(2)
+    writer_thread = run_in_thread(writer)
+    time.sleep(0.05)
+    assert not wrote.is_set()
+
+    release_reader.set()
+    writer_thread.join(2)
+    reader_thread.join(2)
+    assert wrote.is_set()
+
+
+def test_waiting_writer_blocks_new_readers():
+    lock = ReadWriteLock()
+    release_first = threading.Event()
+    reading = threading.Event()
+    order = []
+
+    def first_reader():
+        with lock.read():
+            reading.set()
+            release_first.wait(2)
+
+    def writer():
+        with lock.write():
+            order.append("write")
+
+    def late_reader():
+        with lock.read():
+            order.append("read")
+
+    threads = [run_in_thread(first_reader)]
+    reading.wait(2)
+    threads.append(run_in_thread(writer))
+    time.sleep(0.05)
+    threads.append(run_in_thread(late_reader))
+    time.sleep(0.05)
+    assert order == []
+
+    release_first.set()
+    for thread in threads:
+        thread.join(2)
+    assert order == ["write", "read"]
+
+
+def test_writer_may_reenter_and_read():
+    lock = ReadWriteLock()
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                assert lock.held_by_current_thread()
+    assert not lock.held_by_current_thread()
+
+
+def test_read_to_write_upgrade_is_rejected():
+    lock = ReadWriteLock()
+    with lock.read():
+        with pytest.raises(RuntimeError):
+            with lock.write():
+                pass
+    # The failed upgrade leaves the lock usable
+    with lock.write():
+        assert lock.held_by_current_thread()
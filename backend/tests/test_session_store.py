@@ -0,0 +1,62 @@
+"""Tests for the chat session store"""
+
+import asyncio
+
+import pytest
+
+from app.config import get_settings
+from app.services.session_store import SessionAgentMismatchError, SessionBusyError, SessionStore
+
+
+@pytest.fixture
+def store(monkeypatch) -> SessionStore:
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("SESSION_STORE_PATH", "")
+    get_settings.cache_clear()
+    yield SessionStore()
+    get_settings.cache_clear()
+
+
+def test_turns_of_one_session_run_one_at_a_time(store):
+    order = []
+
+    async def turn(name: str, session_id: str):
+        async with store.turn(session_id, "pricing") as session:
+            order.append(f"{name} start")
+            await asyncio.sleep(0.05)
+            session.query = name
+            order.append(f"{name} end")
+
+    async def main():
+        await asyncio.gather(turn("a", "s1"), turn("b", "s1"), turn("c", "s2"))
+
+    asyncio.run(main())
+    assert order.index("a end") < order.index("b start")
+    # Another session is not held up
+    assert order.index("c start") < order.index("a end")
+    assert store.get("s1").query == "b"
+
+
+def test_busy_session_times_out(store):
+    async def main():
+        async with store.turn("s1", "pricing"):
+            with pytest.raises(SessionBusyError):
+                async with store.turn("s1", "pricing", timeout=0.05):
+                    pass
+        # Released once the first turn is done
+        async with store.turn("s1", "pricing", timeout=0.05) as session:
+            return session.id
+
+    assert asyncio.run(main()) == "s1"
+
+
+def test_session_belongs_to_its_agent(store):
+    async def main():
+        async with store.turn("s1", "pricing"):
+            pass
+        async with store.turn("s1", "cortex"):
+            pass
+
+    with pytest.raises(SessionAgentMismatchError):
+        asyncio.run(main())
+    assert store.get("s1").agent_id == "pricing"
@@ -98,7 +98,7 @@ export function ReindexModal({ isOpen, onClose, onReindexComplete, upload, isUpl
                 <input
                   ref={fileInputRef}
                   type="file"
-                  accept=".json,.csv"
+                  accept=".json,.ndjson,.jsonl,.csv"
                   onChange={handleFileSelect}
                   className="hidden"
                 />
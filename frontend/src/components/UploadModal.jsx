@@ -95,7 +95,7 @@ export function UploadModal({ isOpen, onUploadComplete, upload, isUploading, upl
                 <input
                   ref={fileInputRef}
                   type="file"
-                  accept=".json,.csv"
+                  accept=".json,.ndjson,.jsonl,.csv"
                   onChange={handleFileSelect}
                   className="hidden"
                 />
@@ -119,7 +119,7 @@ export function UploadModal({ isOpen, onUploadComplete, upload, isUploading, upl
                     </p>
                     <span className="inline-flex items-center gap-2 px-3 py-1 rounded-full bg-dark-800 text-dark-400 text-xs">
                       <FileJson className="w-3 h-3" />
-                      Supports: .json, .csv
+                      Supports: .json, .ndjson, .csv
                     </span>
                   </div>
                 )}
@@ -14,11 +14,11 @@ export function useFileUpload() {
     if (!file) return;
 
     // Validate file type
-    const validTypes = ['.json', '.csv'];
+    const validTypes = ['.json', '.ndjson', '.jsonl', '.csv'];
     const fileExtension = file.name.toLowerCase().slice(file.name.lastIndexOf('.'));
     
     if (!validTypes.includes(fileExtension)) {
-      setError('Please upload a JSON or CSV file');
+      setError('Please upload a JSON, NDJSON or CSV file');
       return { success: false };
     }
 